@@ -0,0 +1,149 @@
+import asyncio
+import json
+import os
+from typing import Awaitable, Callable, Dict, List, Optional
+
+# ---------------------------------------------------
+# Alert intake: bounded buffer + background routing workers
+# ---------------------------------------------------
+# /log-alert only validates, routes and enqueues, then answers 202; a
+# burst no longer waits behind Service Bus I/O. Workers drain the buffer
+# in batches and hand every batch to the sender, grouped by queue. When
+# the buffer is full the alert is dropped (and counted) so the caller gets
+# a fast 503 it can retry, instead of a timeout.
+ALERT_BUFFER_SIZE = int(os.getenv("ALERT_BUFFER_SIZE", "10000"))
+ALERT_WORKERS = int(os.getenv("ALERT_WORKERS", "4"))
+ALERT_BATCH_SIZE = int(os.getenv("ALERT_BATCH_SIZE", "100"))
+ALERT_DRAIN_SECONDS = float(os.getenv("ALERT_DRAIN_SECONDS", "10"))
+
+
+def load_routes(default: List[dict]) -> List[dict]:
+    """
+    Routing table: [{"match": "<substring of the alert rule>", "queue": "<queue>"}, ...]
+    checked in order, first match wins. ALERT_ROUTES may hold the table as
+    JSON, or ALERT_ROUTES_FILE a path to it; otherwise `default` is used.
+    """
+    raw = os.getenv("ALERT_ROUTES")
+    path = os.getenv("ALERT_ROUTES_FILE")
+    if path:
+        with open(path, "r") as f:
+            raw = f.read()
+    routes = json.loads(raw) if raw else default
+    for route in routes:
+        if not route.get("match") or not route.get("queue"):
+            raise ValueError(f"Invalid alert route {route}: needs 'match' and 'queue'")
+    return [{"match": route["match"].lower(), "queue": route["queue"]} for route in routes]
+
+
+def route_alert(routes: List[dict], alert_rule: str) -> Optional[str]:
+    alert_rule = (alert_rule or "").lower()
+    for route in routes:
+        if route["match"] in alert_rule:
+            return route["queue"]
+    return None
+
+
+class AlertPipeline:
+    def __init__(self, routes: List[dict], send_batch: Callable[[str, List[dict]], Awaitable],
+                 capacity: int = ALERT_BUFFER_SIZE, workers: int = ALERT_WORKERS, batch_size: int = ALERT_BATCH_SIZE):
+        """
+        send_batch(queue_name, payloads) delivers one queue's share of a batch.
+        """
+        self.routes = routes
+        self.send_batch = send_batch
+        self.capacity = capacity
+        self.workers = workers
+        self.batch_size = batch_size
+        self._buffer: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+
+        self.accepted = 0
+        self.unrouted = 0
+        self.dropped = 0
+        self.sent = 0
+        self.failed = 0
+        self.batches = 0
+        self.last_error = None
+        self.per_queue: Dict[str, int] = {}
+
+    async def start(self):
+        if self._tasks:
+            return
+        self._buffer = asyncio.Queue(maxsize=self.capacity)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    def route(self, alert_rule: str) -> Optional[str]:
+        queue_name = route_alert(self.routes, alert_rule)
+        if queue_name is None:
+            self.unrouted += 1
+        return queue_name
+
+    def offer(self, queue_name: str, payload: dict) -> bool:
+        """
+        Enqueues without waiting; False (and counted as dropped) when full.
+        """
+        try:
+            self._buffer.put_nowait((queue_name, payload))
+        except asyncio.QueueFull:
+            self.dropped += 1
+            return False
+        self.accepted += 1
+        return True
+
+    async def _worker(self):
+        while True:
+            batch = [await self._buffer.get()]
+            while len(batch) < self.batch_size and not self._buffer.empty():
+                batch.append(self._buffer.get_nowait())
+            try:
+                await self._deliver(batch)
+            finally:
+                for _ in batch:
+                    self._buffer.task_done()
+
+    async def _deliver(self, batch):
+        groups: Dict[str, List[dict]] = {}
+        for queue_name, payload in batch:
+            groups.setdefault(queue_name, []).append(payload)
+        self.batches += 1
+
+        results = await asyncio.gather(*(self.send_batch(queue_name, payloads)
+                                         for queue_name, payloads in groups.items()), return_exceptions=True)
+        for (queue_name, payloads), result in zip(groups.items(), results):
+            if isinstance(result, Exception):
+                self.failed += len(payloads)
+                self.last_error = str(result)
+                print(f"Failed to send {len(payloads)} alerts to {queue_name}: {result}")
+            else:
+                self.sent += len(payloads)
+                self.per_queue[queue_name] = self.per_queue.get(queue_name, 0) + len(payloads)
+
+    async def stop(self, timeout: float = ALERT_DRAIN_SECONDS):
+        """
+        Gives the workers up to `timeout` seconds to drain the buffer.
+        """
+        if not self._tasks:
+            return
+        try:
+            await asyncio.wait_for(self._buffer.join(), timeout)
+        except asyncio.TimeoutError:
+            print(f"Alert buffer not drained on shutdown: {self._buffer.qsize()} alerts left")
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def stats(self) -> dict:
+        return {
+            "depth": self._buffer.qsize() if self._buffer else 0,
+            "capacity": self.capacity,
+            "workers": len(self._tasks),
+            "accepted": self.accepted,
+            "unrouted": self.unrouted,
+            "dropped": self.dropped,
+            "sent": self.sent,
+            "failed": self.failed,
+            "batches": self.batches,
+            "sent_per_queue": self.per_queue,
+            "last_error": self.last_error,
+        }
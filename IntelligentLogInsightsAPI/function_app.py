@@ -1,6 +1,6 @@
-import azure.functions as func
-import datetime
-import json
-import logging
-
+import azure.functions as func
+import datetime
+import json
+import logging
+
 app = func.FunctionApp()
\ No newline at end of file
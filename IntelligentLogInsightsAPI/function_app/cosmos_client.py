@@ -1,14 +1,28 @@
-from azure.cosmos import CosmosClient, PartitionKey
-
-COSMOS_ENDPOINT = "https://logginginsights.documents.azure.com:443/"
-COSMOS_KEY = "yYzeB4zpegzyjiP7mwkyPX88YTIvGb7LgfQCjJKSh5LWBN47JLzpfZt97CdXiAtsdc0pUl712MsOACDbmAyeBA=="
-COSMOS_DATABASE = "logdb"
-COSMOS_CONTAINER = "anomalies"
-
-# Initialize once — shared by all Functions
-client = CosmosClient(COSMOS_ENDPOINT, credential=COSMOS_KEY)
-database = client.create_database_if_not_exists(id=COSMOS_DATABASE)
-container = database.create_container_if_not_exists(
-    id=COSMOS_CONTAINER,
-    partition_key=PartitionKey(path="/pk")
-)
+import os
+import threading
+from azure.cosmos import CosmosClient
+
+# ---------------------------------------------------
+# Shared Cosmos client (one per worker process)
+# ---------------------------------------------------
+# Created on first use from the app settings and reused by every
+# invocation of every Function, so a message no longer pays for a new
+# client, connection and metadata reads.
+COSMOS_CONNECTION_SETTING = "CosmosDBConnectionString"
+COSMOS_DATABASE_SETTING = "CosmosDBDatabase"
+COSMOS_CONTAINER_SETTING = "CosmosDBContainer"
+
+_client = None
+_container = None
+_lock = threading.Lock()
+
+
+def get_container():
+    global _client, _container
+
+    with _lock:
+        if _container is None:
+            _client = CosmosClient.from_connection_string(os.environ[COSMOS_CONNECTION_SETTING])
+            database = _client.get_database_client(os.environ[COSMOS_DATABASE_SETTING])
+            _container = database.get_container_client(os.environ[COSMOS_CONTAINER_SETTING])
+        return _container
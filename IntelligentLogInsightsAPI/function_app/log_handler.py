@@ -0,0 +1,86 @@
+import json
+import logging
+import os
+import uuid
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+from azure.cosmos import exceptions
+from .cosmos_client import get_container
+from .partitioning import assign_partition_key, PARTITION_KEY_FIELD
+
+# ---------------------------------------------------
+# Shared handler for the Process*Logs Functions
+# ---------------------------------------------------
+# The triggers use cardinality "many": one invocation gets an array of
+# Service Bus messages. The logs are grouped by partition key and every
+# group is written as transactional batches of upserts (at most 100
+# operations each), the groups running concurrently on a shared pool.
+# Upserts keyed by the message id make a redelivered batch idempotent.
+COSMOS_WRITE_CONCURRENCY = int(os.getenv("COSMOS_WRITE_CONCURRENCY", "8"))
+COSMOS_BATCH_LIMIT = 100
+
+_pool = ThreadPoolExecutor(max_workers=COSMOS_WRITE_CONCURRENCY, thread_name_prefix="cosmos-write")
+
+
+def parse_messages(messages, level: str) -> List[dict]:
+    logs = []
+    for msg in messages:
+        try:
+            data = json.loads(msg.get_body().decode("utf-8"))
+        except (ValueError, UnicodeDecodeError) as ex:
+            # Redelivering a malformed message cannot help: log and drop it
+            logging.error(f" Skipping unreadable {level} message {msg.message_id}: {ex}")
+            continue
+        if not isinstance(data, dict):
+            logging.error(f" Skipping {level} message {msg.message_id}: expected a JSON object, got {type(data).__name__}")
+            continue
+        data.setdefault("id", msg.message_id or str(uuid.uuid4()))
+        logs.append(assign_partition_key(data))
+    return logs
+
+
+def group_by_partition(logs: List[dict]) -> Dict[str, List[dict]]:
+    groups = defaultdict(list)
+    for log in logs:
+        groups[log[PARTITION_KEY_FIELD]].append(log)
+    return groups
+
+
+def write_partition(container, partition_key: str, logs: List[dict]) -> int:
+    for start in range(0, len(logs), COSMOS_BATCH_LIMIT):
+        chunk = logs[start:start + COSMOS_BATCH_LIMIT]
+        container.execute_item_batch([("upsert", (log,)) for log in chunk], partition_key=partition_key)
+    return len(logs)
+
+
+def handle_messages(messages, level: str, container=None) -> int:
+    """
+    Writes one trigger batch to Cosmos; returns the number of logs written.
+    Raises if any partition failed so the runtime redelivers the batch.
+    """
+    container = container or get_container()
+    logs = parse_messages(messages, level)
+    logging.info(f" [{level}] {len(logs)} logs received")
+
+    groups = group_by_partition(logs)
+    futures = {pk: _pool.submit(write_partition, container, pk, group) for pk, group in groups.items()}
+
+    written, failed = 0, []
+    for pk, future in futures.items():
+        try:
+            written += future.result()
+        except exceptions.CosmosBatchOperationError as e:
+            failed.append(pk)
+            logging.error(f" Cosmos DB batch failed for {pk}: {e.message}")
+        except exceptions.CosmosHttpResponseError as e:
+            failed.append(pk)
+            logging.error(f" Cosmos DB HTTP error for {pk}: {e.message}")
+        except Exception as ex:
+            failed.append(pk)
+            logging.error(f" Unexpected error ({level}) for {pk}: {str(ex)}")
+
+    logging.info(f" Inserted {written} {level} logs into {len(groups)} partitions")
+    if failed:
+        raise RuntimeError(f"{len(failed)} of {len(groups)} partitions failed to write ({level})")
+    return written
@@ -0,0 +1,22 @@
+from datetime import datetime, timezone
+
+# ---------------------------------------------------
+# Synthetic partition key: "<service>|<YYYY-MM-DD>" (container path /pk)
+# ---------------------------------------------------
+# Must stay in sync with backend/partitioning.py so logs written by the
+# Functions and by the API land in the same partitions.
+PARTITION_KEY_FIELD = "pk"
+
+
+def day_bucket(timestamp) -> str:
+    try:
+        moment = datetime.fromisoformat(str(timestamp).replace("Z", "+00:00"))
+        moment = moment.replace(tzinfo=timezone.utc) if moment.tzinfo is None else moment.astimezone(timezone.utc)
+    except ValueError:
+        moment = datetime.now(timezone.utc)
+    return moment.strftime("%Y-%m-%d")
+
+
+def assign_partition_key(log: dict) -> dict:
+    log[PARTITION_KEY_FIELD] = f"{log.get('service') or 'UnknownService'}|{day_bucket(log.get('timestamp'))}"
+    return log
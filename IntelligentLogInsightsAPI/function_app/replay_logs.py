@@ -0,0 +1,129 @@
+"""
+Local replay harness for the Process*Logs handler (log_handler.py).
+
+Feeds the NDJSON logs in structured_logs.json through handle_messages in
+trigger-sized batches, as the Service Bus trigger would, and reports
+messages/sec:
+
+    python replay_logs.py --batch-size 100
+    python replay_logs.py --batch-size 1 --repeat 2 --memory --write-latency-ms 8
+    python replay_logs.py --json replay_report.json
+
+Without --memory the logs are upserted into the container named by the
+CosmosDBConnectionString / CosmosDBDatabase / CosmosDBContainer settings
+(as in local.settings.json). --memory writes to an in-process container
+that sleeps --write-latency-ms per request, to compare batch sizes offline.
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+import types
+import uuid
+
+# The Functions host imports this folder as the "__app__" package (the
+# handler uses relative imports); do the same here
+HERE = os.path.dirname(os.path.abspath(__file__))
+if "__app__" not in sys.modules:
+    sys.modules["__app__"] = types.ModuleType("__app__")
+    sys.modules["__app__"].__path__ = [HERE]
+from __app__.log_handler import handle_messages
+
+
+class ReplayMessage:
+    """
+    The parts of azure.functions.ServiceBusMessage the handler reads.
+    """
+
+    def __init__(self, body: bytes, message_id: str):
+        self._body = body
+        self.message_id = message_id
+
+    def get_body(self) -> bytes:
+        return self._body
+
+
+class MemoryContainer:
+    """
+    Stands in for the Cosmos container: one sleep per request.
+    """
+
+    def __init__(self, write_latency_ms: float):
+        self.latency = write_latency_ms / 1000
+        self.items = {}
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    def execute_item_batch(self, batch_operations, partition_key=None, **kwargs):
+        time.sleep(self.latency)
+        with self._lock:
+            self.requests += 1
+            for _, (item,) in batch_operations:
+                self.items[item["id"]] = item
+        return [{"statusCode": 200} for _ in batch_operations]
+
+
+def load_messages(path: str, repeat: int):
+    with open(path, "r") as f:
+        lines = [line.strip() for line in f if line.strip()]
+    messages = []
+    for round_ in range(repeat):
+        for n, line in enumerate(lines):
+            # Stable ids, so a replay upserts the same documents again
+            message_id = str(uuid.uuid5(uuid.NAMESPACE_URL, f"{path}#{round_}#{n}"))
+            messages.append(ReplayMessage(line.encode("utf-8"), message_id))
+    return messages
+
+
+def load_settings(path: str):
+    # Fill in unset app settings from local.settings.json, like `func start`
+    if os.path.exists(path):
+        with open(path, "r") as f:
+            for key, value in json.load(f).get("Values", {}).items():
+                os.environ.setdefault(key, value)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay structured_logs.json through the Process*Logs handler")
+    parser.add_argument("--file", default=os.path.join(HERE, "..", "structured_logs.json"))
+    parser.add_argument("--batch-size", type=int, default=100, help="messages per trigger invocation")
+    parser.add_argument("--repeat", type=int, default=1, help="replay the file this many times")
+    parser.add_argument("--memory", action="store_true", help="write to an in-process container")
+    parser.add_argument("--write-latency-ms", type=float, default=10)
+    parser.add_argument("--json", help="write the report to this JSON file")
+    args = parser.parse_args()
+
+    messages = load_messages(args.file, args.repeat)
+    if args.memory:
+        container = MemoryContainer(args.write_latency_ms)
+    else:
+        load_settings(os.path.join(HERE, "local.settings.json"))
+        container = None
+
+    start = time.perf_counter()
+    written = 0
+    for offset in range(0, len(messages), args.batch_size):
+        written += handle_messages(messages[offset:offset + args.batch_size], "REPLAY", container)
+    seconds = time.perf_counter() - start
+
+    report = {
+        "messages": len(messages),
+        "written": written,
+        "batch_size": args.batch_size,
+        "seconds": round(seconds, 3),
+        "messages_per_sec": round(len(messages) / seconds, 1) if seconds else None,
+    }
+    if args.memory:
+        report["cosmos_requests"] = container.requests
+    print(json.dumps(report, indent=4))
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=4)
+        print(f" Report written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
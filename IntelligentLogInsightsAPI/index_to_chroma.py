@@ -1,23 +1,194 @@
-import chromadb
-from chromadb.config import Settings
-import json, os
-from dotenv import load_dotenv
-
-load_dotenv()
-db_dir = os.getenv("VECTOR_DB_DIR", "./vectorstore")
-client = chromadb.Client(Settings(chroma_db_impl="duckdb+parquet", persist_directory=db_dir))
-
-collection = client.get_or_create_collection(name="logs")
-
-with open("logs_with_embeddings.json", "r", encoding="utf-8") as f:
-    logs = json.load(f)
-
-ids = [log["id"] for log in logs]
-texts = [log["message"] for log in logs]
-metadatas = [{"level": log.get("level", ""), "region": log.get("region", ""), "timestamp": log.get("timestamp", "")} for log in logs]
-embeddings = [log["embedding"] for log in logs]
-
-collection.add(ids=ids, embeddings=embeddings, documents=texts, metadatas=metadatas)
-client.persist()
-
-print(f" Stored {len(logs)} logs in Chroma Vector DB")
+import chromadb
+from chromadb.config import Settings
+import argparse
+import json, os, time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from dotenv import load_dotenv
+
+load_dotenv()
+db_dir = os.getenv("VECTOR_DB_DIR", "./vectorstore")
+
+# Loader settings (overridable from the command line)
+INPUT_FILE = os.getenv("CHROMA_INPUT_FILE", "logs_with_embeddings.json")
+CHUNK_SIZE = int(os.getenv("CHROMA_CHUNK_SIZE", "500"))
+WORKERS = int(os.getenv("CHROMA_WORKERS", "2"))
+CHECKPOINT_FILE = os.getenv("CHROMA_CHECKPOINT_FILE", "index_to_chroma.checkpoint.json")
+READ_SIZE = 1 << 20
+
+
+# ---------------------------------------------------
+# Incremental JSON reader (array or NDJSON)
+# ---------------------------------------------------
+def iter_json_records(path, read_size=READ_SIZE):
+    """Yields the objects of a top-level JSON array (or NDJSON) without loading the whole file."""
+    decoder = json.JSONDecoder()
+    with open(path, "r", encoding="utf-8") as f:
+        buf, pos, in_array = "", 0, None
+        eof = False
+
+        while True:
+            # Skip whitespace / array punctuation between records
+            while pos < len(buf) and buf[pos] in " \t\r\n,":
+                pos += 1
+            if in_array is None and pos < len(buf):
+                in_array = buf[pos] == "["
+                if in_array:
+                    pos += 1
+                    continue
+            if in_array and pos < len(buf) and buf[pos] == "]":
+                return
+
+            if pos < len(buf):
+                try:
+                    record, end = decoder.raw_decode(buf, pos)
+                    yield record
+                    pos = end
+                    continue
+                except json.JSONDecodeError:
+                    if eof:
+                        raise
+
+            if eof:
+                return
+
+            # Need more input: drop what was consumed and read the next block
+            more = f.read(read_size)
+            eof = not more
+            buf, pos = buf[pos:] + more, 0
+
+
+def iter_chunks(records, chunk_size):
+    chunk = []
+    for record in records:
+        chunk.append(record)
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+# ---------------------------------------------------
+# Checkpoint (records already stored, contiguous from the start)
+# ---------------------------------------------------
+def load_checkpoint(path, input_file):
+    if not os.path.exists(path):
+        return 0
+    with open(path, "r") as f:
+        state = json.load(f)
+    return state.get("records_done", 0) if state.get("file") == input_file else 0
+
+
+def save_checkpoint(path, input_file, records_done):
+    with open(path + ".tmp", "w") as f:
+        json.dump({"file": input_file, "records_done": records_done, "updated": time.time()}, f)
+    os.replace(path + ".tmp", path)
+
+
+# ---------------------------------------------------
+# Chroma writes
+# ---------------------------------------------------
+def to_columns(logs):
+    ids = [log["id"] for log in logs]
+    texts = [log["message"] for log in logs]
+    metadatas = [{"level": log.get("level", ""), "region": log.get("region", ""), "timestamp": log.get("timestamp", "")} for log in logs]
+    embeddings = [log["embedding"] for log in logs]
+    return ids, texts, metadatas, embeddings
+
+
+def write_chunk(collection, logs):
+    ids, texts, metadatas, embeddings = to_columns(logs)
+    # upsert keeps a resumed run idempotent when a chunk is replayed
+    write = collection.upsert if hasattr(collection, "upsert") else collection.add
+    write(ids=ids, embeddings=embeddings, documents=texts, metadatas=metadatas)
+    return len(ids)
+
+
+def load_into_chroma(collection, input_file=INPUT_FILE, chunk_size=CHUNK_SIZE, workers=WORKERS,
+                     checkpoint_file=CHECKPOINT_FILE, persist=None):
+    """
+    persist() (e.g. client.persist) runs before every checkpoint save, so the
+    checkpoint never counts logs that are not on disk yet.
+    """
+    records_done = load_checkpoint(checkpoint_file, input_file)
+    if records_done:
+        print(f" Resuming after {records_done} already stored logs")
+
+    records = iter_json_records(input_file)
+    for _ in range(records_done):
+        next(records, None)
+
+    start = time.time()
+    stored = 0
+    done_chunks = set()
+    next_contiguous = 0
+    chunk_sizes = {}
+    pending = {}
+
+    def advance_checkpoint():
+        nonlocal next_contiguous, records_done
+        before = records_done
+        while next_contiguous in done_chunks:
+            done_chunks.discard(next_contiguous)
+            records_done += chunk_sizes.pop(next_contiguous)
+            next_contiguous += 1
+        if records_done == before:
+            return
+        if persist is not None:
+            persist()
+        save_checkpoint(checkpoint_file, input_file, records_done)
+
+    def collect(done):
+        nonlocal stored
+        error = None
+        for future in done:
+            seq = pending.pop(future)
+            if future.exception() is not None:
+                error = error or future.exception()
+                continue
+            stored += future.result()
+            done_chunks.add(seq)
+        # Chunks that did finish still move the checkpoint before a failure is raised
+        advance_checkpoint()
+        if error is not None:
+            raise error
+        elapsed = time.time() - start
+        print(f" Stored {stored} logs ({stored / elapsed:.0f} docs/sec)")
+
+    # At most 2 chunks per worker are held in memory at any time
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for seq, chunk in enumerate(iter_chunks(records, chunk_size)):
+            chunk_sizes[seq] = len(chunk)
+            pending[pool.submit(write_chunk, collection, chunk)] = seq
+            if len(pending) >= workers * 2:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                collect(done)
+        if pending:
+            done, _ = wait(pending)
+            collect(done)
+
+    elapsed = time.time() - start
+    rate = stored / elapsed if elapsed else 0.0
+    return {"stored": stored, "total_done": records_done, "seconds": round(elapsed, 2), "docs_per_sec": round(rate, 1)}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stream logs_with_embeddings.json into Chroma in chunks")
+    parser.add_argument("--file", default=INPUT_FILE)
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--workers", type=int, default=WORKERS)
+    parser.add_argument("--checkpoint", default=CHECKPOINT_FILE)
+    parser.add_argument("--restart", action="store_true", help="ignore an existing checkpoint")
+    args = parser.parse_args()
+
+    if args.restart and os.path.exists(args.checkpoint):
+        os.remove(args.checkpoint)
+
+    client = chromadb.Client(Settings(chroma_db_impl="duckdb+parquet", persist_directory=db_dir))
+    collection = client.get_or_create_collection(name="logs")
+
+    result = load_into_chroma(collection, args.file, args.chunk_size, args.workers, args.checkpoint,
+                              persist=getattr(client, "persist", None))
+
+    print(f" Stored {result['total_done']} logs in Chroma Vector DB "
+          f"({result['stored']} this run, {result['docs_per_sec']} docs/sec)")
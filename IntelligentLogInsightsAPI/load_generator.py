@@ -0,0 +1,332 @@
+"""
+Load generator and end-to-end latency harness for the ingestion path.
+
+Generates logs from configurable level / service / region / message
+distributions at a target rate, sends them to one target with a fixed
+number of concurrent workers and writes throughput and latency
+percentiles to a JSON results file:
+
+    python load_generator.py --target logs --url http://localhost:8000 --rate 500 --concurrency 32 --duration 60
+    python load_generator.py --target log-alert --url http://localhost:8001 --rate 200 --levels CRITICAL=1,ERROR=3
+    python load_generator.py --target servicebus --queue critical-alerts-queue --rate 2000 --concurrency 64
+    python load_generator.py --target stub --stub-latency-ms 5 --rate 5000 --concurrency 50 --count 50000
+    python load_generator.py --profile load_profile.json --results results/run1.json
+
+Targets:
+    logs        POST {url}/logs (backend API)
+    log-alert   POST {url}/log-alert (IntelligentLogInsightsAPI, common alert schema)
+    servicebus  send to --queue through the pooled senders (SERVICE_BUS_CONNECTION_STR)
+    stub        Service Bus stand-in: sleeps --stub-latency-ms per send, no network
+
+The schedule is open-loop: request n is due at start + n / rate. Latency
+is measured from that due time, so time spent waiting for a free worker
+when the target falls behind counts against it (no coordinated omission);
+the pure request time is reported separately as "service" latency.
+"""
+import argparse
+import json
+import os
+import random
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+import requests
+from requests.adapters import HTTPAdapter
+
+DEFAULT_PROFILE = {
+    "levels": {"INFO": 60, "DEBUG": 15, "WARNING": 12, "ERROR": 9, "CRITICAL": 4},
+    "services": {"auth-service": 30, "order-service": 25, "payment-service": 25, "user-service": 20},
+    "regions": {"eastus": 50, "westus": 30, "centralus": 20},
+    # {placeholders} are filled per log, so most messages are distinct
+    "messages": {
+        "INFO": ["User {user} login successful from {ip}", "Order {order} processed in {ms} ms",
+                 "GET /api/v1/items/{item} 200 in {ms} ms"],
+        "DEBUG": ["Cache refreshed for key session:{user}", "Retrying connection to shard {shard}"],
+        "WARNING": ["Service latency {ms} ms above threshold for {endpoint}", "Inventory low for SKU {item}"],
+        "ERROR": ["Database connection lost on shard {shard} (request {request})",
+                  "Token validation failed for user {user}", "Payment {order} declined: upstream timeout"],
+        "CRITICAL": ["Simulated critical failure in {endpoint} (trace {request})",
+                     "Disk usage {pct}% on node {node}"],
+    },
+    # Distinct values per placeholder (high-cardinality fields use large pools)
+    "cardinality": {"user": 100000, "order": 1000000, "item": 50000, "shard": 32, "node": 200,
+                    "endpoint": 40, "ip": 65536},
+}
+
+
+def parse_weights(text: str) -> Dict[str, float]:
+    """
+    "INFO=60,ERROR=10" -> {"INFO": 60.0, "ERROR": 10.0}
+    """
+    weights = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        weights[name.strip()] = float(weight) if weight else 1.0
+    return weights
+
+
+class LogFactory:
+    """
+    Draws logs from the profile's weighted distributions.
+    """
+
+    def __init__(self, profile: dict, seed: Optional[int] = None):
+        self.random = random.Random(seed)
+        self.profile = profile
+        self._levels = list(profile["levels"].items())
+        self._services = list(profile["services"].items())
+        self._regions = list(profile["regions"].items())
+        self._lock = threading.Lock()
+
+    def _pick(self, weighted) -> str:
+        return self.random.choices([name for name, _ in weighted], weights=[w for _, w in weighted])[0]
+
+    def _fill(self, template: str) -> str:
+        cardinality = self.profile["cardinality"]
+        values = {
+            "user": f"u{self.random.randrange(cardinality['user'])}",
+            "order": f"ord-{self.random.randrange(cardinality['order'])}",
+            "item": f"sku-{self.random.randrange(cardinality['item'])}",
+            "shard": self.random.randrange(cardinality["shard"]),
+            "node": f"node-{self.random.randrange(cardinality['node'])}",
+            "endpoint": f"/api/v1/endpoint{self.random.randrange(cardinality['endpoint'])}",
+            "ip": f"10.0.{self.random.randrange(cardinality['ip']) // 256}.{self.random.randrange(256)}",
+            "ms": int(self.random.lognormvariate(4, 0.8)),
+            "pct": self.random.randint(85, 100),
+            "request": uuid.UUID(int=self.random.getrandbits(128)).hex[:16],
+        }
+        return template.format(**values)
+
+    def make(self, timestamp: str) -> dict:
+        with self._lock:
+            level = self._pick(self._levels)
+            templates = self.profile["messages"].get(level) or [f"{level} event"]
+            return {
+                "timestamp": timestamp,
+                "service": self._pick(self._services),
+                "level": level,
+                "message": self._fill(self.random.choice(templates)),
+                "region": self._pick(self._regions),
+            }
+
+
+# ---------------------------------------------------
+# Targets: send(log) -> raises on failure
+# ---------------------------------------------------
+class HttpTarget:
+    def __init__(self, url: str, concurrency: int, timeout: float):
+        self.url = url
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=concurrency)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def body(self, log: dict) -> dict:
+        return log
+
+    def send(self, log: dict):
+        response = self.session.post(self.url, json=self.body(log), timeout=self.timeout)
+        if response.status_code >= 400:
+            raise RuntimeError(f"HTTP {response.status_code}")
+
+    def close(self):
+        self.session.close()
+
+
+class AlertTarget(HttpTarget):
+    def body(self, log: dict) -> dict:
+        # Azure Monitor common alert schema; the rule name carries the level for routing
+        return {
+            "schemaId": "azureMonitorCommonAlertSchema",
+            "data": {"essentials": {
+                "alertRule": f"{log['level'].title()} alert - {log['service']}",
+                "severity": {"CRITICAL": "Sev0", "ERROR": "Sev1", "WARNING": "Sev2"}.get(log["level"], "Sev4"),
+                "description": log["message"],
+                "firedDateTime": log["timestamp"],
+                "monitoringService": "Log Analytics",
+            }},
+        }
+
+
+class ServiceBusTarget:
+    def __init__(self, queue_name: str):
+        from azure.servicebus import ServiceBusClient, ServiceBusMessage
+        from servicebus_pool import SenderPool
+        connection_str = os.getenv("SERVICE_BUS_CONNECTION_STR")
+        if not connection_str:
+            raise SystemExit("❌ Missing SERVICE_BUS_CONNECTION_STR")
+        self.queue_name = queue_name
+        self.message = ServiceBusMessage
+        self.client = ServiceBusClient.from_connection_string(connection_str)
+        self.pool = SenderPool(lambda: self.client)
+        self.pool.open([queue_name])
+
+    def send(self, log: dict):
+        self.pool.send(self.queue_name, self.message(json.dumps(log)))
+
+    def close(self):
+        self.pool.close()
+        self.client.close()
+
+
+class StubTarget:
+    """
+    Service Bus stand-in: a fixed per-send cost, no network.
+    """
+
+    def __init__(self, latency_ms: float):
+        self.latency = latency_ms / 1000
+
+    def send(self, log: dict):
+        time.sleep(self.latency)
+
+    def close(self):
+        pass
+
+
+# ---------------------------------------------------
+# Open-loop runner
+# ---------------------------------------------------
+def percentiles(values: List[float]) -> dict:
+    if not values:
+        return {"p50": None, "p95": None, "p99": None, "max": None, "mean": None}
+    ordered = sorted(values)
+
+    def at(q):
+        return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000, 2)
+
+    return {"p50": at(0.50), "p95": at(0.95), "p99": at(0.99), "max": round(ordered[-1] * 1000, 2),
+            "mean": round(sum(ordered) / len(ordered) * 1000, 2)}
+
+
+def run(target, factory: LogFactory, rate: float, concurrency: int, total: int) -> dict:
+    lock = threading.Lock()
+    next_index = [0]
+    latencies, service_times, errors = [], [], {}
+    start = time.perf_counter() + 0.1
+    # Due time n also stamps the log, so timestamps (the backend's default id) are unique
+    wall_start = datetime.now(timezone.utc).timestamp() + 0.1
+
+    def worker():
+        while True:
+            with lock:
+                n = next_index[0]
+                if n >= total:
+                    return
+                next_index[0] += 1
+            due = start + n / rate
+            wait = due - time.perf_counter()
+            if wait > 0:
+                time.sleep(wait)
+            log = factory.make(datetime.fromtimestamp(wall_start + n / rate, timezone.utc).isoformat())
+            sent_at = time.perf_counter()
+            try:
+                target.send(log)
+                error = None
+            except Exception as ex:
+                error = str(ex).split(":")[0][:80]
+            done = time.perf_counter()
+            with lock:
+                if error:
+                    errors[error] = errors.get(error, 0) + 1
+                else:
+                    latencies.append(done - due)
+                    service_times.append(done - sent_at)
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    succeeded = len(latencies)
+    return {
+        "sent": total,
+        "succeeded": succeeded,
+        "failed": total - succeeded,
+        "errors": errors,
+        "elapsed_seconds": round(elapsed, 3),
+        "target_rate": rate,
+        "achieved_rate": round(succeeded / elapsed, 1) if elapsed > 0 else None,
+        "latency_ms": percentiles(latencies),
+        "service_latency_ms": percentiles(service_times),
+    }
+
+
+def load_profile(path: Optional[str]) -> dict:
+    profile = json.loads(json.dumps(DEFAULT_PROFILE))
+    if path:
+        with open(path, "r") as f:
+            profile.update(json.load(f))
+    return profile
+
+
+def make_target(args):
+    if args.target == "logs":
+        return HttpTarget(args.url.rstrip("/") + "/logs", args.concurrency, args.timeout)
+    if args.target == "log-alert":
+        return AlertTarget(args.url.rstrip("/") + "/log-alert", args.concurrency, args.timeout)
+    if args.target == "servicebus":
+        return ServiceBusTarget(args.queue)
+    return StubTarget(args.stub_latency_ms)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingestion load generator (rate, concurrency, latency percentiles)")
+    parser.add_argument("--target", choices=["logs", "log-alert", "servicebus", "stub"], default="stub")
+    parser.add_argument("--url", default="http://localhost:8000", help="API base URL (logs / log-alert)")
+    parser.add_argument("--queue", default="critical-alerts-queue", help="queue for --target servicebus")
+    parser.add_argument("--rate", type=float, default=100, help="target requests per second")
+    parser.add_argument("--concurrency", type=int, default=16, help="concurrent workers")
+    parser.add_argument("--duration", type=float, default=30, help="seconds (ignored with --count)")
+    parser.add_argument("--count", type=int, help="total requests")
+    parser.add_argument("--levels", help="level weights, e.g. INFO=60,ERROR=10,CRITICAL=2")
+    parser.add_argument("--services", help="service weights, e.g. auth-service=3,payment-service=1")
+    parser.add_argument("--regions", help="region weights")
+    parser.add_argument("--profile", help="JSON file overriding levels/services/regions/messages/cardinality")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--timeout", type=float, default=30, help="HTTP timeout in seconds")
+    parser.add_argument("--stub-latency-ms", type=float, default=5)
+    parser.add_argument("--results", default="load_results.json", help="results file (JSON)")
+    args = parser.parse_args()
+
+    profile = load_profile(args.profile)
+    for key in ("levels", "services", "regions"):
+        if getattr(args, key):
+            profile[key] = parse_weights(getattr(args, key))
+    total = args.count or max(1, int(args.rate * args.duration))
+
+    started = datetime.now(timezone.utc).isoformat()
+    target = make_target(args)
+    print(f" Sending {total} logs to '{args.target}' at {args.rate}/s with {args.concurrency} workers...")
+    try:
+        result = run(target, LogFactory(profile, args.seed), args.rate, args.concurrency, total)
+    finally:
+        target.close()
+
+    latency = result["latency_ms"]
+    print(f" {result['succeeded']}/{result['sent']} ok in {result['elapsed_seconds']}s  "
+          f"{result['achieved_rate']}/s  p50 {latency['p50']} ms  p95 {latency['p95']} ms  p99 {latency['p99']} ms")
+    if result["errors"]:
+        print(f" Errors: {result['errors']}")
+
+    report = {
+        "started": started,
+        "config": {"target": args.target, "url": args.url if args.target in ("logs", "log-alert") else None,
+                   "queue": args.queue if args.target == "servicebus" else None, "rate": args.rate,
+                   "concurrency": args.concurrency, "count": total, "profile": profile},
+        "result": result,
+    }
+    if os.path.dirname(args.results):
+        os.makedirs(os.path.dirname(args.results), exist_ok=True)
+    with open(args.results, "w") as f:
+        json.dump(report, f, indent=4)
+    print(f" Results written to {args.results}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+import base64
+import gzip
+import hashlib
+import hmac
+import json
+import os
+import queue
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import List, Optional
+import requests
+from requests.adapters import HTTPAdapter
+
+# ---------------------------------------------------
+# Log shipper for the Log Analytics HTTP Data Collector API
+# ---------------------------------------------------
+# ship() only appends to an in-memory queue, so the caller never waits on
+# disk or network. A background flush thread serialises each log once,
+# appends it to the local backup file (one buffered writer, kept open) and
+# packs logs into batches by payload size. Batches are posted gzipped by a
+# few sender threads over one keep-alive requests.Session; throttling,
+# 5xx and connection errors are retried with exponential backoff.
+DATA_COLLECTOR_MAX_BYTES = 30 * 1024 * 1024  # API limit per post
+
+SHIPPER_MAX_BATCH_BYTES = min(int(os.getenv("SHIPPER_MAX_BATCH_BYTES", str(4 * 1024 * 1024))),
+                              DATA_COLLECTOR_MAX_BYTES)
+SHIPPER_FLUSH_INTERVAL = float(os.getenv("SHIPPER_FLUSH_INTERVAL", "2"))
+SHIPPER_QUEUE_SIZE = int(os.getenv("SHIPPER_QUEUE_SIZE", "100000"))
+SHIPPER_SENDERS = int(os.getenv("SHIPPER_SENDERS", "2"))
+SHIPPER_MAX_RETRIES = int(os.getenv("SHIPPER_MAX_RETRIES", "5"))
+SHIPPER_TIMEOUT = float(os.getenv("SHIPPER_TIMEOUT", "30"))
+SHIPPER_GZIP = os.getenv("SHIPPER_GZIP", "true").lower() == "true"
+
+RETRY_STATUSES = {408, 429, 500, 502, 503, 504}
+
+
+# Azure signature (SharedKey auth for the Data Collector API)
+def build_signature(customer_id, shared_key, date, content_length, method, content_type, resource):
+    x_headers = f"x-ms-date:{date}"
+    string_to_hash = f"{method}\n{str(content_length)}\n{content_type}\n{x_headers}\n{resource}"
+    bytes_to_hash = bytes(string_to_hash, encoding="utf-8")
+    decoded_key = base64.b64decode(shared_key)
+    encoded_hash = base64.b64encode(
+        hmac.new(decoded_key, bytes_to_hash, hashlib.sha256).digest()
+    ).decode()
+    return f"SharedKey {customer_id}:{encoded_hash}"
+
+
+class LogShipper:
+    def __init__(self, workspace_id: Optional[str], shared_key: Optional[str], log_type: str = "CustomAppLogs",
+                 backup_path: Optional[str] = None, max_batch_bytes: int = SHIPPER_MAX_BATCH_BYTES,
+                 flush_interval: float = SHIPPER_FLUSH_INTERVAL, queue_size: int = SHIPPER_QUEUE_SIZE,
+                 senders: int = SHIPPER_SENDERS, max_retries: int = SHIPPER_MAX_RETRIES, compress: bool = SHIPPER_GZIP):
+        self.workspace_id = workspace_id
+        self.shared_key = shared_key
+        self.log_type = log_type
+        self.max_batch_bytes = min(max_batch_bytes, DATA_COLLECTOR_MAX_BYTES)
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.compress = compress
+        self.uri = f"https://{workspace_id}.ods.opinsights.azure.com/api/logs?api-version=2016-04-01"
+
+        self._queue: "queue.Queue" = queue.Queue(maxsize=queue_size)
+        self._backup = open(backup_path, "a", buffering=1024 * 1024) if backup_path else None
+        self._session = requests.Session()
+        self._session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=senders))
+        # Bounded hand-off to the senders: the flush thread waits when all are busy
+        self._senders = ThreadPoolExecutor(max_workers=senders, thread_name_prefix="log-shipper-send")
+        self._in_flight = threading.BoundedSemaphore(senders * 2)
+        self._stop = threading.Event()
+
+        # ship() callers, the flush thread and the senders all update these
+        self._counters_lock = threading.Lock()
+        self.queued = 0
+        self.dropped = 0
+        self.shipped = 0
+        self.failed = 0
+        self.batches = 0
+        self.retries = 0
+        self.bytes_raw = 0
+        self.bytes_sent = 0
+        self.last_error = None
+
+        self._thread = threading.Thread(target=self._run, name="log-shipper-flush", daemon=True)
+        self._thread.start()
+
+    def ship(self, entry: dict) -> bool:
+        """
+        Queues one log; never blocks. False (counted as dropped) when full.
+        """
+        try:
+            self._queue.put_nowait(entry)
+        except queue.Full:
+            with self._counters_lock:
+                self.dropped += 1
+            return False
+        with self._counters_lock:
+            self.queued += 1
+        return True
+
+    # ---------------------------------------------------
+    # Flush thread: serialise, back up, pack by size
+    # ---------------------------------------------------
+    def _run(self):
+        batch: List[str] = []
+        size = 2  # "[" + "]"
+        deadline = time.monotonic() + self.flush_interval
+        while True:
+            try:
+                entry = self._queue.get(timeout=max(deadline - time.monotonic(), 0.01))
+            except queue.Empty:
+                entry = None
+
+            if entry is not None:
+                line = json.dumps(entry)
+                if self._backup is not None:
+                    self._backup.write(line + "\n")
+                if len(line) + 1 + size > self.max_batch_bytes and batch:
+                    self._submit(batch)
+                    batch, size = [], 2
+                batch.append(line)
+                size += len(line) + 1
+
+            if time.monotonic() >= deadline or (entry is None and self._stop.is_set()):
+                if batch:
+                    self._submit(batch)
+                    batch, size = [], 2
+                if self._backup is not None:
+                    self._backup.flush()
+                deadline = time.monotonic() + self.flush_interval
+                if self._stop.is_set() and self._queue.empty():
+                    return
+
+    def _submit(self, lines: List[str]):
+        self._in_flight.acquire()
+        future = self._senders.submit(self._post, "[" + ",".join(lines) + "]", len(lines))
+        future.add_done_callback(lambda _: self._in_flight.release())
+
+    # ---------------------------------------------------
+    # Sender threads: gzip + post with retry / backoff
+    # ---------------------------------------------------
+    def _headers(self, content_length: int) -> dict:
+        content_type = "application/json"
+        rfc1123date = datetime.now(timezone.utc).strftime("%a, %d %b %Y %H:%M:%S GMT")
+        signature = build_signature(self.workspace_id, self.shared_key, rfc1123date, content_length,
+                                    "POST", content_type, "/api/logs")
+        headers = {
+            "Content-Type": content_type,
+            "Authorization": signature,
+            "Log-Type": self.log_type,
+            "x-ms-date": rfc1123date
+        }
+        if self.compress:
+            headers["Content-Encoding"] = "gzip"
+        return headers
+
+    def _post(self, payload: str, count: int):
+        if not self.workspace_id or not self.shared_key:
+            with self._counters_lock:
+                self.failed += count
+            self.last_error = "Workspace ID or Shared Key missing"
+            return
+
+        raw = payload.encode("utf-8")
+        body = gzip.compress(raw, compresslevel=5) if self.compress else raw
+        for attempt in range(self.max_retries + 1):
+            delay = min(2 ** attempt, 30) * (0.5 + random.random() / 2)
+            try:
+                # Signed per attempt: x-ms-date must be fresh
+                response = self._session.post(self.uri, data=body, headers=self._headers(len(body)),
+                                              timeout=(5, SHIPPER_TIMEOUT))
+                if 200 <= response.status_code <= 299:
+                    with self._counters_lock:
+                        self.shipped += count
+                        self.batches += 1
+                        self.bytes_raw += len(raw)
+                        self.bytes_sent += len(body)
+                    return
+                self.last_error = f"{response.status_code} -> {response.text[:200]}"
+                if response.status_code not in RETRY_STATUSES:
+                    break
+                retry_after = response.headers.get("Retry-After")
+                if retry_after and retry_after.isdigit():
+                    delay = float(retry_after)
+            except requests.RequestException as ex:
+                self.last_error = str(ex)
+
+            if attempt < self.max_retries:
+                with self._counters_lock:
+                    self.retries += 1
+                time.sleep(delay)
+
+        with self._counters_lock:
+            self.failed += count
+        print(f" Failed to ship batch of {count} logs: {self.last_error}")
+
+    # ---------------------------------------------------
+    # Shutdown / stats
+    # ---------------------------------------------------
+    def close(self, timeout: Optional[float] = None):
+        """
+        Ships everything still queued, then releases the file and session.
+        """
+        self._stop.set()
+        self._thread.join(timeout)
+        self._senders.shutdown(wait=True)
+        if self._backup is not None:
+            self._backup.close()
+        self._session.close()
+
+    def stats(self) -> dict:
+        with self._counters_lock:
+            return {
+                "queued": self.queued,
+                "pending": self._queue.qsize(),
+                "dropped": self.dropped,
+                "shipped": self.shipped,
+                "failed": self.failed,
+                "batches": self.batches,
+                "retries": self.retries,
+                "avg_batch_size": round(self.shipped / self.batches, 1) if self.batches else 0,
+                "compression_ratio": round(self.bytes_raw / self.bytes_sent, 2) if self.bytes_sent else None,
+                "last_error": self.last_error,
+            }
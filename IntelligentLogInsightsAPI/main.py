@@ -1,60 +1,122 @@
-from fastapi import FastAPI, Request
-from azure.servicebus import ServiceBusClient, ServiceBusMessage
-from dotenv import load_dotenv
-import os
-import json
-
-# Load environment variables
-load_dotenv()
-
-app = FastAPI()
-
-# Azure Service Bus connection string
-SERVICE_BUS_CONNECTION_STR = os.getenv("SERVICE_BUS_CONNECTION_STR")
-
-# Queue names
-QUEUES = {
-    "critical": "critical-alerts-queue",
-    "error": "error-alerts-queue",
-    "security": "security-alerts-queue",
-    "performance": "performance-alerts-queue"
-}
-
-
-def send_to_queue(queue_name: str, payload: dict):
-    """Helper function to send message to Service Bus queue"""
-    with ServiceBusClient.from_connection_string(SERVICE_BUS_CONNECTION_STR) as client:
-        sender = client.get_queue_sender(queue_name)
-        with sender:
-            msg = ServiceBusMessage(json.dumps(payload))
-            sender.send_messages(msg)
-
-
-@app.post("/log-alert")
-async def receive_alert(request: Request):
-    """Receives alerts from Log Analytics (Azure Monitor)"""
-    body = await request.json()
-    essentials = body.get("data", {}).get("essentials", {})
-    alert_rule = essentials.get("alertRule", "").lower()
-
-    payload = {
-        "alertName": essentials.get("alertRule"),
-        "severity": essentials.get("severity"),
-        "description": essentials.get("description"),
-        "firedTime": essentials.get("firedDateTime"),
-        "monitorService": essentials.get("monitoringService")
-    }
-
-    # Routing logic
-    if "critical" in alert_rule:
-        send_to_queue(QUEUES["critical"], payload)
-    elif "error" in alert_rule:
-        send_to_queue(QUEUES["error"], payload)
-    elif "security" in alert_rule:
-        send_to_queue(QUEUES["security"], payload)
-    elif "performance" in alert_rule:
-        send_to_queue(QUEUES["performance"], payload)
-    else:
-        print("No matching alert type found.")
-
-    return {"status": "Alert processed", "queue": alert_rule}
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request, HTTPException
+from fastapi.responses import JSONResponse
+from azure.servicebus import ServiceBusClient, ServiceBusMessage
+from dotenv import load_dotenv
+import asyncio
+import os
+import json
+import threading
+from alert_pipeline import AlertPipeline, load_routes
+
+from servicebus_pool import SenderPool
+
+# Load environment variables
+load_dotenv()
+
+# Azure Service Bus connection string
+SERVICE_BUS_CONNECTION_STR = os.getenv("SERVICE_BUS_CONNECTION_STR")
+
+# Queue names
+QUEUES = {
+    "critical": "critical-alerts-queue",
+    "error": "error-alerts-queue",
+    "security": "security-alerts-queue",
+    "performance": "performance-alerts-queue"
+}
+
+# Alert rule substring -> queue, first match wins (override: ALERT_ROUTES / ALERT_ROUTES_FILE)
+ALERT_ROUTES = load_routes([
+    {"match": "critical", "queue": QUEUES["critical"]},
+    {"match": "error", "queue": QUEUES["error"]},
+    {"match": "security", "queue": QUEUES["security"]},
+    {"match": "performance", "queue": QUEUES["performance"]},
+])
+
+# One client and one long-lived, batching sender per queue (servicebus_pool.py)
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = ServiceBusClient.from_connection_string(SERVICE_BUS_CONNECTION_STR)
+        return _client
+
+
+ALERT_QUEUES = {route["queue"] for route in ALERT_ROUTES}
+sender_pool = SenderPool(get_client, queues=ALERT_QUEUES)
+
+
+async def send_to_queue(queue_name: str, payloads: list):
+    """Helper function to send a batch of messages to a Service Bus queue"""
+    await asyncio.gather(*(asyncio.wrap_future(sender_pool.submit(queue_name, ServiceBusMessage(json.dumps(payload))))
+                           for payload in payloads))
+
+
+alert_pipeline = AlertPipeline(ALERT_ROUTES, send_to_queue)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await alert_pipeline.start()
+    try:
+        await asyncio.to_thread(sender_pool.open, ALERT_QUEUES)
+    except Exception as ex:
+        # Senders connect on first send instead
+        print(f"Service Bus senders not opened at startup: {ex}")
+    yield
+    await alert_pipeline.stop()
+    await asyncio.to_thread(sender_pool.close)
+    if _client is not None:
+        _client.close()
+
+
+app = FastAPI(lifespan=lifespan)
+
+
+@app.post("/log-alert", status_code=202)
+async def receive_alert(request: Request):
+    """Receives alerts from Log Analytics (Azure Monitor); queued for delivery"""
+    try:
+        body = await request.json()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Body is not valid JSON")
+    data = body.get("data") if isinstance(body, dict) else None
+    essentials = data.get("essentials") if isinstance(data, dict) else None
+    if not isinstance(essentials, dict) or not isinstance(essentials.get("alertRule"), str):
+        raise HTTPException(status_code=400, detail="Expected a common alert schema payload (data.essentials.alertRule)")
+    alert_rule = essentials["alertRule"].lower()
+
+    payload = {
+        "alertName": essentials.get("alertRule"),
+        "severity": essentials.get("severity"),
+        "description": essentials.get("description"),
+        "firedTime": essentials.get("firedDateTime"),
+        "monitorService": essentials.get("monitoringService")
+    }
+
+    queue_name = alert_pipeline.route(alert_rule)
+    if queue_name is None:
+        print("No matching alert type found.")
+        return JSONResponse({"status": "No matching alert type", "queue": None}, status_code=200)
+
+    if not alert_pipeline.offer(queue_name, payload):
+        # Buffer full: shed load quickly so Azure Monitor retries
+        raise HTTPException(status_code=503, detail="Alert buffer full", headers={"Retry-After": "1"})
+
+    return {"status": "Alert accepted", "queue": queue_name}
+
+
+@app.get("/log-alert/stats")
+async def alert_stats():
+    """Alert buffer depth, drops and delivery counts"""
+    return alert_pipeline.stats()
+
+
+@app.get("/servicebus/senders")
+async def sender_stats():
+    """Pooled sender / batching stats"""
+    return sender_pool.stats()
@@ -0,0 +1,38 @@
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from alert_pipeline import AlertPipeline, route_alert
+
+ROUTES = [
+    {"match": "critical", "queue": "critical-alerts-queue"},
+    {"match": "error", "queue": "error-alerts-queue"},
+]
+
+
+def test_route_alert_first_match_wins():
+    assert route_alert(ROUTES, "Critical Error Rate") == "critical-alerts-queue"
+    assert route_alert(ROUTES, "db error") == "error-alerts-queue"
+    assert route_alert(ROUTES, "disk usage") is None
+
+
+def test_pipeline_delivers_batches_and_counts_drops():
+    delivered = []
+
+    async def send_batch(queue_name, payloads):
+        delivered.extend((queue_name, p["n"]) for p in payloads)
+
+    async def run():
+        pipeline = AlertPipeline(ROUTES, send_batch, capacity=3, workers=1)
+        await pipeline.start()
+        accepted = [pipeline.offer(pipeline.route("critical"), {"n": n}) for n in range(5)]
+        await pipeline.stop()
+        return pipeline, accepted
+
+    pipeline, accepted = asyncio.run(run())
+    assert accepted == [True, True, True, False, False]
+    assert delivered == [("critical-alerts-queue", 0), ("critical-alerts-queue", 1), ("critical-alerts-queue", 2)]
+    assert pipeline.stats()["dropped"] == 2
+    assert pipeline.stats()["sent"] == 3
@@ -0,0 +1,178 @@
+"""
+Recall / latency / memory benchmark for the semantic index storage modes.
+
+Compares every mode in vector_store.INDEX_MODES against the exact float32
+baseline on the same corpus and queries, then sweeps the pq settings
+(--pq-m x --pq-rerank) to show the recall / bytes-per-vector tradeoff and
+which configurations meet --recall-target:
+
+    python benchmark_vector_index.py --synthetic 50000
+    python benchmark_vector_index.py --modes flat,pq --pq-m 16,24,48 --pq-rerank 0,10,20
+    python benchmark_vector_index.py --logs ../IntelligentLogInsightsAPI/structured_logs.json --json results.json
+
+--logs embeds real messages with the configured SentenceTransformer (slow);
+--synthetic uses clustered random unit vectors so it runs without the model.
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+import faiss
+import numpy as np
+from vector_store import INDEX_MODES, PQ_M, PQ_RERANK, build_index
+
+# recall@k the configured pq defaults are chosen to meet
+RECALL_TARGET = 0.95
+
+
+# -----------------------------------------
+# Corpus / queries
+# -----------------------------------------
+def synthetic_corpus(n: int, dim: int, clusters: int, seed: int = 7) -> np.ndarray:
+    # Clustered data behaves much more like sentence embeddings than uniform noise
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dim)).astype("float32")
+    vectors = centers[rng.integers(0, clusters, n)] + 0.35 * rng.standard_normal((n, dim)).astype("float32")
+    faiss.normalize_L2(vectors)
+    return vectors
+
+
+def embedded_corpus(path: str, limit: int) -> np.ndarray:
+    from generate_embedding_faiss import encode_texts
+
+    messages = []
+    with open(path, "r") as f:
+        for line in f:
+            if line.strip():
+                messages.append(json.loads(line)["message"])
+            if len(messages) >= limit:
+                break
+    return encode_texts(messages)
+
+
+def make_queries(corpus: np.ndarray, n: int, seed: int = 11) -> np.ndarray:
+    # Perturbed corpus vectors: realistic "near duplicate" queries
+    rng = np.random.default_rng(seed)
+    queries = corpus[rng.integers(0, len(corpus), n)] + 0.1 * rng.standard_normal((n, corpus.shape[1])).astype("float32")
+    faiss.normalize_L2(queries)
+    return queries
+
+
+# -----------------------------------------
+# Measurements
+# -----------------------------------------
+def index_file_bytes(index) -> int:
+    with tempfile.NamedTemporaryFile(suffix=".index", delete=False) as tmp:
+        path = tmp.name
+    try:
+        faiss.write_index(index, path)
+        return os.path.getsize(path)
+    finally:
+        os.remove(path)
+
+
+def recall_at_k(truth: np.ndarray, found: np.ndarray) -> float:
+    hits = sum(len(set(t) & set(f)) for t, f in zip(truth.tolist(), found.tolist()))
+    return hits / truth.size
+
+
+def percentile_ms(samples, pct) -> float:
+    return round(float(np.percentile(samples, pct)) * 1000, 3)
+
+
+def benchmark_mode(mode: str, corpus: np.ndarray, queries: np.ndarray, k: int, truth: np.ndarray,
+                   label: str = None, **options) -> dict:
+    start = time.perf_counter()
+    index = build_index(corpus, mode, **options)
+    build_seconds = time.perf_counter() - start
+
+    # Single-query latency (what /semantic-search does per request)
+    latencies = []
+    for q in queries:
+        t = time.perf_counter()
+        index.search(q.reshape(1, -1), k)
+        latencies.append(time.perf_counter() - t)
+
+    # Whole batch in one call (one matrix multiply for every query)
+    t = time.perf_counter()
+    _, found = index.search(queries, k)
+    batch_seconds = time.perf_counter() - t
+
+    code_bytes = index.sa_code_size() * index.ntotal
+    return {
+        "mode": label or mode,
+        "vectors": index.ntotal,
+        "code_bytes": code_bytes,
+        "bytes_per_vector": index.sa_code_size(),
+        "file_bytes": index_file_bytes(index),
+        "compression_vs_float32": round(corpus.nbytes / code_bytes, 2),
+        "build_seconds": round(build_seconds, 3),
+        "latency_p50_ms": percentile_ms(latencies, 50),
+        "latency_p95_ms": percentile_ms(latencies, 95),
+        "latency_p99_ms": percentile_ms(latencies, 99),
+        "batch_queries_per_sec": round(len(queries) / batch_seconds, 1),
+        f"recall@{k}": round(recall_at_k(truth, found), 4),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark semantic index storage modes")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--synthetic", type=int, default=20000, help="number of synthetic vectors")
+    source.add_argument("--logs", help="NDJSON log file to embed (e.g. structured_logs.json)")
+    parser.add_argument("--limit", type=int, default=20000, help="max log lines to embed with --logs")
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--clusters", type=int, default=200)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--modes", default=",".join(INDEX_MODES))
+    parser.add_argument("--pq-m", default=f"16,{PQ_M},48", help="PQ sub-quantizer counts to sweep (empty: no sweep)")
+    parser.add_argument("--pq-rerank", default=f"0,{PQ_RERANK}", help="re-rank factors to sweep (0: PQ codes only)")
+    parser.add_argument("--recall-target", type=float, default=RECALL_TARGET)
+    parser.add_argument("--json", help="write results to this JSON file")
+    args = parser.parse_args()
+
+    if args.logs:
+        corpus = embedded_corpus(args.logs, args.limit)
+    else:
+        corpus = synthetic_corpus(args.synthetic, args.dim, args.clusters)
+    queries = make_queries(corpus, args.queries)
+
+    # Exact float32 baseline defines the ground truth for recall@k
+    _, truth = build_index(corpus, "flat").search(queries, args.k)
+
+    runs = [(mode.strip(), None, {}) for mode in args.modes.split(",")]
+    for m in (int(v) for v in args.pq_m.split(",") if v.strip()):
+        for rerank in (int(v) for v in args.pq_rerank.split(",") if v.strip()):
+            runs.append(("pq", f"pq M={m} rerank={rerank}", {"pq_m": m, "pq_rerank": rerank}))
+
+    recall_key = f"recall@{args.k}"
+    results = []
+    for mode, label, options in runs:
+        result = benchmark_mode(mode, corpus, queries, args.k, truth, label, **options)
+        result["meets_target"] = result[recall_key] >= args.recall_target
+        results.append(result)
+        print(f"{result['mode']:>20}  {result['bytes_per_vector']:>5} B/vec  "
+              f"x{result['compression_vs_float32']:<6} p50 {result['latency_p50_ms']:>8} ms  "
+              f"p95 {result['latency_p95_ms']:>8} ms  {recall_key} {result[recall_key]:<6} "
+              f"{'ok' if result['meets_target'] else 'below target'}")
+
+    # Recall / size tradeoff: the smallest configuration that still meets the target
+    passing = [r for r in results if r["meets_target"]]
+    if passing:
+        best = min(passing, key=lambda r: (r["bytes_per_vector"], r["latency_p50_ms"]))
+        print(f" Smallest at {recall_key} >= {args.recall_target}: {best['mode']} "
+              f"({best['bytes_per_vector']} B/vec, x{best['compression_vs_float32']})")
+    else:
+        print(f" Nothing reaches {recall_key} >= {args.recall_target}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"vectors": len(corpus), "dim": corpus.shape[1], "queries": len(queries),
+                       "k": args.k, "recall_target": args.recall_target, "results": results}, f, indent=4)
+        print(f" Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,275 @@
+import asyncio
+import json
+import os
+import threading
+import time
+from typing import Awaitable, Callable, Dict, List, Optional
+
+# ---------------------------------------------------
+# Cosmos DB change-feed consumer
+# ---------------------------------------------------
+# One task per feed range reads the container's change feed and hands each
+# page of changed logs to the view updater (semantic index, rollups,
+# top-K). Every write path (API, bulk, Functions) shows up in the views
+# within about CHANGE_FEED_POLL_SECONDS.
+#
+# Leases only move after the views are on disk: every
+# CHANGE_FEED_CHECKPOINT_SECONDS the consumers pause, persist() writes the
+# views out and then the continuation tokens of the applied pages are
+# saved. A crash loses nothing; it replays the pages since the last
+# checkpoint (at-least-once). Documents the views cannot use are skipped.
+#
+# Handler errors are sorted by type. A bad document (ValueError, KeyError,
+# TypeError, ... on its own) is dead-lettered so it cannot stall its range;
+# anything else (model / executor / disk unavailable) is transient: the page
+# is not recorded and the range re-reads it with exponential backoff, so a
+# short outage never drops logs from the views.
+CHANGE_FEED_ENABLED = os.getenv("CHANGE_FEED_ENABLED", "false").lower() == "true"
+CHANGE_FEED_POLL_SECONDS = float(os.getenv("CHANGE_FEED_POLL_SECONDS", "2"))
+CHANGE_FEED_MAX_ITEMS = int(os.getenv("CHANGE_FEED_MAX_ITEMS", "500"))
+CHANGE_FEED_CHECKPOINT_SECONDS = float(os.getenv("CHANGE_FEED_CHECKPOINT_SECONDS", "30"))
+CHANGE_FEED_DEAD_LETTER_FILE = os.getenv("CHANGE_FEED_DEAD_LETTER_FILE", "change_feed_dead_letters.jsonl")
+CHANGE_FEED_MAX_BACKOFF_SECONDS = float(os.getenv("CHANGE_FEED_MAX_BACKOFF_SECONDS", "60"))
+
+# Errors that say "this document is bad", as opposed to "try again later"
+DETERMINISTIC_ERRORS = (ValueError, KeyError, TypeError, AttributeError, IndexError)
+# Where a range with no checkpoint starts: "Now" (history comes from the
+# rollup / index backfills) or "Beginning" (replay the whole container)
+CHANGE_FEED_START = os.getenv("CHANGE_FEED_START", "Now")
+CHANGE_FEED_LEASE_FILE = os.getenv("CHANGE_FEED_LEASE_FILE", "change_feed_leases.json")
+
+
+def range_key(feed_range: dict) -> str:
+    return json.dumps(feed_range, sort_keys=True)
+
+
+def item_key(item: dict) -> str:
+    return f"{item.get('id')}|{item.get('_etag')}"
+
+
+class TransientFailure(Exception):
+    """
+    The handler failed for a reason other than the documents themselves;
+    the page is retried instead of dead-lettered.
+    """
+
+
+class FileLeaseStore:
+    """
+    Feed range -> continuation token, persisted to a JSON file.
+    Holds leases for a single consumer process.
+    """
+
+    def __init__(self, path: str = CHANGE_FEED_LEASE_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._leases: Dict[str, dict] = {}
+        if os.path.exists(path):
+            with open(path, "r") as f:
+                self._leases = json.load(f)
+
+    def continuation(self, key: str) -> Optional[str]:
+        with self._lock:
+            return self._leases.get(key, {}).get("continuation")
+
+    def checkpoint(self, tokens: Dict[str, str]):
+        with self._lock:
+            for key, continuation in tokens.items():
+                self._leases[key] = {"continuation": continuation, "updated": time.time()}
+            tmp = self.path + ".tmp"
+            with open(tmp, "w") as f:
+                json.dump(self._leases, f)
+            os.replace(tmp, self.path)
+
+
+class ChangeFeedProcessor:
+    def __init__(self, get_container: Callable[[], Awaitable], handler: Callable[[List[dict]], Awaitable],
+                 persist: Optional[Callable[[], Awaitable]] = None, accept: Optional[Callable[[dict], bool]] = None,
+                 leases: Optional[FileLeaseStore] = None, poll_seconds: float = CHANGE_FEED_POLL_SECONDS,
+                 max_items: int = CHANGE_FEED_MAX_ITEMS, start_from: str = CHANGE_FEED_START,
+                 checkpoint_seconds: float = CHANGE_FEED_CHECKPOINT_SECONDS,
+                 dead_letter_path: str = CHANGE_FEED_DEAD_LETTER_FILE):
+        """
+        handler(items) applies a page to the views; persist() writes the
+        views to disk; accept(item) filters out documents that are not logs.
+        """
+        self.get_container = get_container
+        self.handler = handler
+        self.persist = persist
+        self.accept = accept
+        self.leases = leases
+        self.poll_seconds = poll_seconds
+        self.max_items = max_items
+        self.start_from = start_from
+        self.checkpoint_seconds = checkpoint_seconds
+        self.dead_letter_path = dead_letter_path
+        self._tasks: List[asyncio.Task] = []
+        self._checkpointer: Optional[asyncio.Task] = None
+        # Pages applied since the last checkpoint: range -> continuation token
+        self._pending: Dict[str, str] = {}
+        # Items of a page that is being retried that already reached the views
+        self._partial: Dict[str, set] = {}
+        # Held while a page is applied and while checkpointing, so a checkpoint
+        # persists exactly the pages whose tokens it saves
+        self._apply_lock = asyncio.Lock()
+
+        self.changes = 0
+        self.batches = 0
+        self.skipped = 0
+        self.dead_lettered = 0
+        self.retries = 0
+        self.checkpoints = 0
+        self.errors = 0
+        self.last_change_at = None
+        self.last_error = None
+
+    async def start(self):
+        """
+        Discovers the feed ranges and starts one consumer task per range.
+        """
+        if self._tasks:
+            return
+        if self.leases is None:
+            self.leases = FileLeaseStore()
+        container = await self.get_container()
+        ranges = [feed_range async for feed_range in container.read_feed_ranges()]
+        self._tasks = [asyncio.create_task(self._consume(container, feed_range)) for feed_range in ranges]
+        self._checkpointer = asyncio.create_task(self._checkpoint_loop())
+        print(f"🔹 Change feed: consuming {len(ranges)} feed ranges")
+
+    async def _read_once(self, container, key: str, feed_range: dict) -> int:
+        continuation = self._pending.get(key) or self.leases.continuation(key)
+        if continuation:
+            feed = container.query_items_change_feed(continuation=continuation, max_item_count=self.max_items)
+        else:
+            feed = container.query_items_change_feed(feed_range=feed_range, start_time=self.start_from,
+                                                     max_item_count=self.max_items)
+
+        pages = feed.by_page()
+        read = 0
+        async for page in pages:
+            items = [item async for item in page]
+            async with self._apply_lock:
+                if items:
+                    await self._apply(key, items)
+                    read += len(items)
+                    self.batches += 1
+                    self.last_change_at = time.time()
+                # Applied in memory; the lease moves at the next checkpoint
+                self._partial.pop(key, None)
+                token = pages.continuation_token
+                if token and token != (self._pending.get(key) or self.leases.continuation(key)):
+                    self._pending[key] = token
+        return read
+
+    async def _apply(self, key: str, items: List[dict]):
+        if self.accept is not None:
+            logs = [item for item in items if isinstance(item, dict) and self.accept(item)]
+            self.skipped += len(items) - len(logs)
+        else:
+            logs = items
+        # A retried page only re-applies what did not make it the last time
+        done = self._partial.get(key)
+        if done:
+            logs = [log for log in logs if item_key(log) not in done]
+        if not logs:
+            return
+        try:
+            await self.handler(logs)
+            self.changes += len(logs)
+            return
+        except DETERMINISTIC_ERRORS:
+            pass
+        except Exception as ex:
+            raise TransientFailure(str(ex)) from ex
+
+        # Find the bad document(s) one at a time; the rest still go through
+        done = self._partial.setdefault(key, set())
+        for log in logs:
+            try:
+                await self.handler([log])
+                self.changes += 1
+            except DETERMINISTIC_ERRORS as ex:
+                await asyncio.to_thread(self._dead_letter, key, log, ex)
+            except Exception as ex:
+                raise TransientFailure(str(ex)) from ex
+            done.add(item_key(log))
+
+    def _dead_letter(self, key: str, item: dict, error: Exception):
+        self.dead_lettered += 1
+        self.last_error = f"{item.get('id')}: {error}"
+        print(f"⚠ Change feed: dead-lettering {item.get('id')}: {error}")
+        with open(self.dead_letter_path, "a") as f:
+            f.write(json.dumps({"range": key, "error": str(error), "at": time.time(), "item": item}, default=str) + "\n")
+
+    async def checkpoint(self):
+        """
+        Persists the views, then saves the tokens of the pages they include.
+        """
+        async with self._apply_lock:
+            if not self._pending:
+                return
+            if self.persist is not None:
+                await self.persist()
+            tokens = dict(self._pending)
+            await asyncio.to_thread(self.leases.checkpoint, tokens)
+            self._pending.clear()
+            self.checkpoints += 1
+
+    async def _checkpoint_loop(self):
+        while True:
+            await asyncio.sleep(self.checkpoint_seconds)
+            try:
+                await self.checkpoint()
+            except Exception as ex:
+                # Leases stay put; the next attempt covers these pages too
+                self.errors += 1
+                self.last_error = str(ex)
+                print(f"⚠ Change feed checkpoint failed: {ex}")
+
+    async def _consume(self, container, feed_range: dict):
+        key = range_key(feed_range)
+        failures = 0
+        while True:
+            try:
+                read = await self._read_once(container, key, feed_range)
+                failures = 0
+                if not read:
+                    await asyncio.sleep(self.poll_seconds)
+            except asyncio.CancelledError:
+                raise
+            except Exception as ex:
+                # The failed page was not recorded: the next read starts from it again
+                failures += 1
+                self.errors += 1
+                if isinstance(ex, TransientFailure):
+                    self.retries += 1
+                self.last_error = str(ex)
+                delay = min(self.poll_seconds * 2 ** failures, CHANGE_FEED_MAX_BACKOFF_SECONDS)
+                print(f"⚠ Change feed range failed, retrying in {delay:.0f}s: {ex}")
+                await asyncio.sleep(delay)
+
+    async def stop(self):
+        tasks = self._tasks + ([self._checkpointer] if self._checkpointer else [])
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._tasks, self._checkpointer = [], None
+        if self.leases is not None:
+            await self.checkpoint()
+
+    def stats(self) -> dict:
+        return {
+            "enabled": bool(self._tasks),
+            "feed_ranges": len(self._tasks),
+            "changes": self.changes,
+            "batches": self.batches,
+            "skipped": self.skipped,
+            "dead_lettered": self.dead_lettered,
+            "retries": self.retries,
+            "checkpoints": self.checkpoints,
+            "uncheckpointed_ranges": len(self._pending),
+            "errors": self.errors,
+            "last_error": self.last_error,
+            "seconds_since_last_change": round(time.time() - self.last_change_at, 1) if self.last_change_at else None,
+        }
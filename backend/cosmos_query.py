@@ -1,88 +1,397 @@
-import os
-from dotenv import load_dotenv
-from azure.cosmos import CosmosClient, exceptions
-
-# ---------------------------------------------------
-# Load Environment Variables
-# ---------------------------------------------------
-load_dotenv()
-
-COSMOS_URI = os.getenv("COSMOS_URI")
-COSMOS_KEY = os.getenv("COSMOS_KEY")
-DATABASE_NAME = os.getenv("COSMOS_DB")
-CONTAINER_NAME = os.getenv("COSMOS_CONTAINER")
-
-if not COSMOS_URI or not COSMOS_KEY:
-    raise ValueError(" CosmosDB credentials missing. Check .env file.")
-
-# ---------------------------------------------------
-# Cosmos DB Client Initialization
-# ---------------------------------------------------
-client = CosmosClient(COSMOS_URI, COSMOS_KEY)
-database = client.get_database_client(DATABASE_NAME)
-container = database.get_container_client(CONTAINER_NAME)
-
-# ---------------------------------------------------
-# Insert Log
-# ---------------------------------------------------
-def insert_log_into_cosmos(log: dict):
-    log["id"] = log.get("id") or log["timestamp"]  # or generate UUID
-    container.create_item(log)
-    return {"status": "inserted", "log": log}
-
-# ---------------------------------------------------
-# Fetch All Logs
-# ---------------------------------------------------
-def get_all_logs():
-    query = "SELECT * FROM c"
-    items = list(container.query_items(query, enable_cross_partition_query=True))
-    return items
-
-# ---------------------------------------------------
-# Fetch Single Log
-# ---------------------------------------------------
-def get_log_by_id(log_id: str):
-    query = f"SELECT * FROM c WHERE c.id = '{log_id}'"
-    items = list(container.query_items(query, enable_cross_partition_query=True))
-    return items[0] if items else None
-
-# ---------------------------------------------------
-# Filter Logs by severity/service/region
-# ---------------------------------------------------
-def filter_logs(level=None, service=None, region=None):
-    query = "SELECT * FROM c WHERE 1=1"
-
-    if level:
-        query += f" AND c.level = '{level.upper()}'"
-    if service:
-        query += f" AND c.service = '{service}'"
-    if region:
-        query += f" AND c.region = '{region}'"
-
-    items = list(container.query_items(query, enable_cross_partition_query=True))
-    return items
-
-# ---------------------------------------------------
-# Pie Chart Distribution by Severity
-# ---------------------------------------------------
-def count_logs_by_severity():
-    query = """
-    SELECT c.level, COUNT(1) AS count 
-    FROM c 
-    GROUP BY c.level
-    """
-    items = list(container.query_items(query, enable_cross_partition_query=True))
-    return {"distribution": items}
-
-# ---------------------------------------------------
-# Top 10 Critical Events
-# ---------------------------------------------------
-def top_critical_logs():
-    query = """
-    SELECT TOP 10 * 
-    FROM c 
-    WHERE c.level = 'CRITICAL'
-    ORDER BY c.timestamp DESC
-    """
-    items = list(container.query_items(query, enable_cross_partition_query=True))
-    return items
+import os
+import asyncio
+import uuid
+import aiohttp
+from collections import OrderedDict
+from dotenv import load_dotenv
+from azure.core.pipeline.transport import AioHttpTransport
+from azure.cosmos.aio import CosmosClient
+from azure.cosmos import exceptions
+import ingest_hooks
+import partitioning
+from query_cache import QueryResultCache, RequestCharge, build_filter_query, normalize_filters
+from log_store import (LogStore, LogExists, AGGREGATE_FIELDS, LOGS_PAGE_SIZE, encode_cursor, decode_cursor)
+
+# ---------------------------------------------------
+# Load Environment Variables
+# ---------------------------------------------------
+load_dotenv()
+
+COSMOS_URI = os.getenv("COSMOS_URI")
+COSMOS_KEY = os.getenv("COSMOS_KEY")
+DATABASE_NAME = os.getenv("COSMOS_DB")
+CONTAINER_NAME = os.getenv("COSMOS_CONTAINER")
+
+# Connection pool shared by every request of this worker
+COSMOS_MAX_CONNECTIONS = int(os.getenv("COSMOS_MAX_CONNECTIONS", "100"))
+COSMOS_MAX_CONNECTIONS_PER_HOST = int(os.getenv("COSMOS_MAX_CONNECTIONS_PER_HOST", "0"))  # 0 = no per-host cap
+
+# Document field the container is partitioned on: the synthetic
+# "<service>|<day>" key from partitioning.py unless overridden
+PARTITION_KEY_FIELD = os.getenv("COSMOS_PARTITION_KEY_FIELD", partitioning.PARTITION_KEY_FIELD)
+ROUTED_QUERIES = PARTITION_KEY_FIELD == partitioning.PARTITION_KEY_FIELD
+# Recently written ids -> partition key, so GET /logs/{id} can use a point read
+LOG_ID_CACHE_SIZE = int(os.getenv("LOG_ID_CACHE_SIZE", "100000"))
+
+# POST /logs/bulk: transactional batch size (Cosmos caps it at 100), batches
+# in flight at once, and how often one batch is retried after a 429
+BULK_BATCH_SIZE = min(int(os.getenv("BULK_BATCH_SIZE", "100")), 100)
+BULK_CONCURRENCY = int(os.getenv("BULK_CONCURRENCY", "8"))
+BULK_MAX_RETRIES = int(os.getenv("BULK_MAX_RETRIES", "5"))
+
+# ---------------------------------------------------
+# Cosmos DB Client (asyncio, one per process)
+# ---------------------------------------------------
+# Opened by the app lifespan (or lazily on first use) and closed on shutdown.
+# Every call below awaits the network round trip instead of blocking the
+# event loop, so one uvicorn worker can keep many Cosmos requests in flight.
+_client = None
+_session = None
+_container = None
+_container_lock = asyncio.Lock()
+
+
+async def open_cosmos():
+    global _client, _session, _container
+
+    async with _container_lock:
+        if _container is None:
+            if not COSMOS_URI or not COSMOS_KEY:
+                raise ValueError(" CosmosDB credentials missing. Check .env file.")
+            _session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=COSMOS_MAX_CONNECTIONS, limit_per_host=COSMOS_MAX_CONNECTIONS_PER_HOST),
+                cookie_jar=aiohttp.DummyCookieJar(),
+                auto_decompress=False,
+            )
+            client = CosmosClient(COSMOS_URI, COSMOS_KEY, transport=AioHttpTransport(session=_session, session_owner=False))
+            try:
+                # Reads the account topology once, up front
+                await client.__aenter__()
+            except Exception:
+                await client.close()
+                await _session.close()
+                _session = None
+                raise
+            _client = client
+            _container = client.get_database_client(DATABASE_NAME).get_container_client(CONTAINER_NAME)
+        return _container
+
+
+async def get_container():
+    return _container if _container is not None else await open_cosmos()
+
+
+async def close_cosmos():
+    global _client, _session, _container
+
+    async with _container_lock:
+        client, session = _client, _session
+        _client = _session = _container = None
+    if client is not None:
+        await client.close()
+    if session is not None:
+        await session.close()
+
+
+async def _query(query: str, **kwargs) -> list:
+    # The aio client fans out across partitions on its own; no flag needed
+    container = await get_container()
+    return [item async for item in container.query_items(query, **kwargs)]
+
+
+# ---------------------------------------------------
+# Pagination (continuation tokens behind log_store cursors)
+# ---------------------------------------------------
+async def query_page(query: str, limit: int = LOGS_PAGE_SIZE, cursor: str = None, **kwargs) -> dict:
+    """
+    One result page plus the cursor for the next one (None when exhausted).
+    """
+    container = await get_container()
+    pages = container.query_items(query, max_item_count=limit, **kwargs).by_page(decode_cursor(cursor))
+
+    items = []
+    async for page in pages:
+        items = [item async for item in page]
+        break
+    next_cursor = encode_cursor(pages.continuation_token)
+    return {"items": items, "count": len(items), "next_cursor": next_cursor}
+
+
+async def iter_query_pages(query: str, page_size: int = LOGS_PAGE_SIZE, cursor: str = None, **kwargs):
+    """
+    Yields result pages as Cosmos returns them; only one page is held in memory.
+    """
+    container = await get_container()
+    pages = container.query_items(query, max_item_count=page_size, **kwargs).by_page(decode_cursor(cursor))
+    async for page in pages:
+        yield [item async for item in page]
+
+
+# ---------------------------------------------------
+# Partition keys (id -> pk LRU filled at ingest)
+# ---------------------------------------------------
+_pk_by_id = OrderedDict()
+
+
+def partition_key_of(log: dict):
+    return log.get(PARTITION_KEY_FIELD)
+
+
+def remember_partition_key(log_id: str, partition_key):
+    if log_id is None or partition_key is None:
+        return
+    _pk_by_id[log_id] = partition_key
+    _pk_by_id.move_to_end(log_id)
+    while len(_pk_by_id) > LOG_ID_CACHE_SIZE:
+        _pk_by_id.popitem(last=False)
+
+
+def cached_partition_key(log_id: str):
+    partition_key = _pk_by_id.get(log_id)
+    if partition_key is not None:
+        _pk_by_id.move_to_end(log_id)
+    return partition_key
+
+
+# ---------------------------------------------------
+# Insert Log
+# ---------------------------------------------------
+def _after_insert(logs: list):
+    for log in logs:
+        remember_partition_key(log["id"], partition_key_of(log))
+    filter_cache.invalidate_many(logs)
+    ingest_hooks.publish(logs)
+
+
+async def insert_log_into_cosmos(log: dict):
+    log["id"] = log.get("id") or log.get("timestamp") or str(uuid.uuid4())
+    partitioning.assign_partition_key(log)
+    container = await get_container()
+    await container.create_item(log)
+    _after_insert([log])
+    return {"status": "inserted", "log": log}
+
+# ---------------------------------------------------
+# Bulk Insert (partition-grouped transactional batches)
+# ---------------------------------------------------
+def _retry_after_seconds(ex) -> float:
+    headers = getattr(ex, "headers", None) or {}
+    return int(headers.get("x-ms-retry-after-ms", 1000)) / 1000
+
+
+async def _write_batch(container, partition_key, entries, statuses):
+    """
+    Writes up to BULK_BATCH_SIZE logs of one partition as a single transaction.
+    A rejected item gets its own status and the rest are retried without it;
+    429s wait for the advertised retry-after.
+    """
+    retries = 0
+    while entries:
+        try:
+            await container.execute_item_batch([("create", (log,)) for _, log in entries], partition_key=partition_key)
+            for index, log in entries:
+                statuses[index] = {"index": index, "id": log["id"], "status": 201}
+            return
+        except exceptions.CosmosBatchOperationError as ex:
+            failed = ex.error_index
+            response = (ex.operation_responses or [{}])[failed] if failed is not None else {}
+            code = response.get("statusCode", ex.status_code)
+            if code != 429 and failed is None:
+                # No failing operation to drop: the whole batch gets the batch status
+                for index, log in entries:
+                    statuses[index] = {"index": index, "id": log["id"], "status": ex.status_code or 500, "error": str(ex)}
+                return
+            if code != 429:
+                index, log = entries.pop(failed)
+                statuses[index] = {"index": index, "id": log["id"], "status": code, "error": response.get("message") or str(ex)}
+                continue
+            if retries >= BULK_MAX_RETRIES:
+                raise
+            retries += 1
+            await asyncio.sleep(_retry_after_seconds(ex))
+        except exceptions.CosmosHttpResponseError as ex:
+            if ex.status_code != 429 or retries >= BULK_MAX_RETRIES:
+                for index, log in entries:
+                    statuses[index] = {"index": index, "id": log["id"], "status": ex.status_code or 500, "error": str(ex)}
+                return
+            retries += 1
+            await asyncio.sleep(_retry_after_seconds(ex))
+
+
+async def bulk_insert_logs(logs: list) -> dict:
+    """
+    Inserts many logs: grouped by partition key, BULK_BATCH_SIZE per
+    transactional batch, at most BULK_CONCURRENCY batches in flight.
+    Returns a status per input position (201 or the Cosmos error code).
+    """
+    container = await get_container()
+
+    groups = {}
+    for index, log in enumerate(logs):
+        log["id"] = log.get("id") or log.get("timestamp") or str(uuid.uuid4())
+        partitioning.assign_partition_key(log)
+        groups.setdefault(partition_key_of(log), []).append((index, log))
+
+    statuses = [None] * len(logs)
+    semaphore = asyncio.Semaphore(BULK_CONCURRENCY)
+
+    async def write(partition_key, entries):
+        async with semaphore:
+            try:
+                await _write_batch(container, partition_key, entries, statuses)
+            except Exception as ex:
+                # Throttled past BULK_MAX_RETRIES, or a transport error
+                for index, log in entries:
+                    if statuses[index] is None:
+                        statuses[index] = {"index": index, "id": log["id"], "status": getattr(ex, "status_code", None) or 500, "error": str(ex)}
+
+    await asyncio.gather(*(
+        write(partition_key, entries[start:start + BULK_BATCH_SIZE])
+        for partition_key, entries in groups.items()
+        for start in range(0, len(entries), BULK_BATCH_SIZE)
+    ))
+
+    # One cache invalidation / hook publish for the whole request
+    written = [log for log, status in zip(logs, statuses) if status["status"] == 201]
+    _after_insert(written)
+
+    inserted = len(written)
+    return {"status": "completed", "inserted": inserted, "failed": len(logs) - inserted, "items": statuses}
+
+# ---------------------------------------------------
+# Fetch All Logs
+# ---------------------------------------------------
+ALL_LOGS_QUERY = "SELECT * FROM c"
+
+
+async def get_all_logs(limit: int = LOGS_PAGE_SIZE, cursor: str = None):
+    return await query_page(ALL_LOGS_QUERY, limit, cursor)
+
+# ---------------------------------------------------
+# Fetch Single Log
+# ---------------------------------------------------
+async def get_log_by_id(log_id: str, partition_key=None):
+    """
+    1 RU point read when the partition key is given or cached; otherwise a
+    (parameterised) cross-partition query, whose result seeds the cache.
+    """
+    container = await get_container()
+    from_cache = partition_key is None
+    if from_cache:
+        partition_key = cached_partition_key(log_id)
+
+    if partition_key is not None:
+        try:
+            return await container.read_item(item=log_id, partition_key=partition_key)
+        except exceptions.CosmosResourceNotFoundError:
+            if not from_cache:
+                return None
+            _pk_by_id.pop(log_id, None)  # stale entry: fall back to the query
+
+    query = "SELECT * FROM c WHERE c.id = @id"
+    items = await _query(query, parameters=[{"name": "@id", "value": log_id}])
+    if not items:
+        return None
+    remember_partition_key(log_id, partition_key_of(items[0]))
+    return items[0]
+
+# ---------------------------------------------------
+# Filter Logs by severity/service/region
+# ---------------------------------------------------
+filter_cache = QueryResultCache()
+
+
+def _routed_filter_query(level=None, service=None, region=None, start_time=None, end_time=None):
+    """
+    (query, kwargs): one partition -> single-partition query; a few -> pk IN (...); else fan-out.
+    """
+    partitions = partitioning.route(service, start_time, end_time) if ROUTED_QUERIES else None
+    query, parameters = build_filter_query(level, service, region, start_time, end_time, partitions)
+    kwargs = {"parameters": parameters}
+    if partitions and len(partitions) == 1:
+        kwargs["partition_key"] = partitions[0]
+    return query, kwargs
+
+
+async def filter_logs(level=None, service=None, region=None, limit: int = LOGS_PAGE_SIZE, cursor: str = None,
+                      start_time=None, end_time=None):
+    filters = normalize_filters(level, service, region, start_time, end_time)
+    key = (filters, limit, cursor)
+    cached = filter_cache.get(key)
+    if cached is not None:
+        return cached
+
+    query, kwargs = _routed_filter_query(*filters)
+    charge = RequestCharge()
+    result = await query_page(query, limit, cursor, response_hook=charge, **kwargs)
+    filter_cache.put(key, filters, result, charge.total)
+    return result
+
+# ---------------------------------------------------
+# Counts grouped by level / service / region
+# ---------------------------------------------------
+async def count_logs_by(field: str = "level", **filters):
+    if field not in AGGREGATE_FIELDS:
+        raise ValueError(f"Cannot group by '{field}'")
+    query, kwargs = _routed_filter_query(**filters)
+    query = query.replace("SELECT *", f"SELECT c.{field}, COUNT(1) AS count", 1) + f" GROUP BY c.{field}"
+    return await _query(query, **kwargs)
+
+# ---------------------------------------------------
+# Most Recent Events of one level (default: top 10 critical)
+# ---------------------------------------------------
+async def top_critical_logs(limit: int = 10, level: str = "CRITICAL"):
+    query = """
+    SELECT TOP @limit *
+    FROM c
+    WHERE c.level = @level
+    ORDER BY c.timestamp DESC
+    """
+    parameters = [{"name": "@limit", "value": limit}, {"name": "@level", "value": level.upper()}]
+    items = await _query(query, parameters=parameters)
+    return items
+
+
+# ---------------------------------------------------
+# LogStore implementation (LOG_STORE=cosmos)
+# ---------------------------------------------------
+class CosmosLogStore(LogStore):
+    name = "cosmos"
+
+    async def open(self):
+        await open_cosmos()
+
+    async def close(self):
+        await close_cosmos()
+
+    async def insert(self, log: dict) -> dict:
+        try:
+            return await insert_log_into_cosmos(log)
+        except exceptions.CosmosResourceExistsError:
+            raise LogExists(log.get("id"))
+
+    async def bulk_insert(self, logs):
+        return await bulk_insert_logs(logs)
+
+    async def get(self, log_id, partition_key=None):
+        return await get_log_by_id(log_id, partition_key)
+
+    async def page(self, limit=LOGS_PAGE_SIZE, cursor=None, **filters):
+        if any(filters.values()):
+            return await filter_logs(limit=limit, cursor=cursor, **filters)
+        return await get_all_logs(limit, cursor)
+
+    def iter_pages(self, page_size=LOGS_PAGE_SIZE, cursor=None, fields=None, **filters):
+        query, kwargs = _routed_filter_query(**filters)
+        if fields:
+            query = query.replace("SELECT *", "SELECT " + ", ".join(f"c.{f}" for f in fields), 1)
+        return iter_query_pages(query, page_size, cursor, **kwargs)
+
+    async def count_by(self, field="level", **filters):
+        return await count_logs_by(field, **filters)
+
+    async def top(self, level="CRITICAL", limit=10):
+        return await top_critical_logs(limit, level)
+
+    async def stats(self):
+        return {"store": self.name, "filter_cache": filter_cache.stats()}
@@ -0,0 +1,154 @@
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+
+# ---------------------------------------------------
+# Executor settings
+# ---------------------------------------------------
+# Embedding (torch) and scoring (FAISS) release the GIL, so a small thread
+# pool keeps them off the event loop without a second copy of the model
+# or of the vector index per process.
+WORKERS = int(os.getenv("EMBEDDING_WORKERS", "2"))
+# Requests allowed to wait for a worker before new ones are rejected (503)
+MAX_QUEUE = int(os.getenv("EMBEDDING_MAX_QUEUE", "64"))
+# Threads each torch / FAISS call may use; keeps WORKERS x threads <= cores
+COMPUTE_THREADS = int(os.getenv("EMBEDDING_COMPUTE_THREADS", str(max(1, (os.cpu_count() or 1) // WORKERS))))
+
+
+class ExecutorSaturated(Exception):
+    """
+    Raised when the CPU pool already has MAX_QUEUE requests waiting.
+    """
+
+
+def configure_compute_threads():
+    """
+    Caps intra-op threads for torch and FAISS so pool workers don't oversubscribe the CPU.
+    """
+    try:
+        import faiss
+        faiss.omp_set_num_threads(COMPUTE_THREADS)
+    except ImportError:
+        pass
+    try:
+        import torch
+        torch.set_num_threads(COMPUTE_THREADS)
+    except ImportError:
+        pass
+
+
+class CpuExecutor:
+    """
+    Bounded thread pool for CPU-bound work with admission control and metrics.
+
+    run()        - request path: rejected with ExecutorSaturated when the queue is full
+    run_always() - background work (e.g. indexing ingested logs): always queued
+    """
+
+    def __init__(self, workers: int = WORKERS, max_queue: int = MAX_QUEUE):
+        self.workers = workers
+        self.max_queue = max_queue
+        self._pool = None
+        self._lock = threading.Lock()
+
+        self.in_flight = 0
+        self.queued = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.max_queued_seen = 0
+        self._wait_total = 0.0
+        self._run_total = 0.0
+
+    def _executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(
+                    max_workers=self.workers,
+                    thread_name_prefix="embedding",
+                    initializer=configure_compute_threads,
+                )
+            return self._pool
+
+    def _timed(self, submitted: float, fn: Callable, args: tuple):
+        started = time.perf_counter()
+        with self._lock:
+            self.queued -= 1
+            self.in_flight += 1
+            self._wait_total += started - submitted
+        try:
+            return fn(*args)
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+                self._run_total += time.perf_counter() - started
+
+    def _on_done(self, job):
+        if job.cancelled():
+            with self._lock:
+                self.queued -= 1
+
+    def check_admission(self):
+        """
+        Raises ExecutorSaturated if a new request-path job would be rejected right now.
+        """
+        with self._lock:
+            if self.queued >= self.max_queue:
+                self.rejected += 1
+                raise ExecutorSaturated(f"Embedding executor busy ({self.queued} requests queued)")
+
+    async def _submit(self, fn: Callable, args: tuple, admit: bool):
+        if admit:
+            self.check_admission()
+        with self._lock:
+            self.queued += 1
+            self.max_queued_seen = max(self.max_queued_seen, self.queued)
+
+        job = self._executor().submit(self._timed, time.perf_counter(), fn, args)
+        # A job cancelled before a worker picked it up (e.g. the client went away) never runs _timed
+        job.add_done_callback(self._on_done)
+        try:
+            result = await asyncio.wrap_future(job)
+        except Exception:
+            with self._lock:
+                self.failed += 1
+            raise
+        with self._lock:
+            self.completed += 1
+        return result
+
+    async def run(self, fn: Callable, *args):
+        return await self._submit(fn, args, admit=True)
+
+    async def run_always(self, fn: Callable, *args):
+        return await self._submit(fn, args, admit=False)
+
+    def shutdown(self):
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=True)
+
+    def stats(self) -> dict:
+        with self._lock:
+            done = self.completed + self.failed
+            return {
+                "workers": self.workers,
+                "compute_threads_per_worker": COMPUTE_THREADS,
+                "max_queue": self.max_queue,
+                "queue_depth": self.queued,
+                "max_queue_depth_seen": self.max_queued_seen,
+                "in_flight": self.in_flight,
+                "completed": self.completed,
+                "failed": self.failed,
+                "rejected": self.rejected,
+                "avg_wait_ms": round(self._wait_total / done * 1000, 3) if done else 0.0,
+                "avg_run_ms": round(self._run_total / done * 1000, 3) if done else 0.0,
+            }
+
+
+# Shared by query encoding, search scoring and ingest-time indexing
+cpu_pool = CpuExecutor()
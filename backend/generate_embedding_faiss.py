@@ -1,66 +1,366 @@
-from sentence_transformers import SentenceTransformer, util
-import json
-import os
-from typing import List
-
-# Load embedding model
-model = SentenceTransformer("all-MiniLM-L6-v2")
-
-# JSON file to store embeddings and logs
-INDEX_FILE = "log_embeddings.json"
-
-
-# -----------------------------------------
-# Save logs + store embeddings in JSON file
-# -----------------------------------------
-def save_logs_to_index(logs: List[str]):
-    print("🔹 Generating local embeddings using SentenceTransformer...")
-
-    # Generate embeddings (as tensors)
-    embeddings = model.encode(logs, convert_to_tensor=True).tolist()
-
-    # Prepare data
-    data = [{"log": log, "embedding": emb} for log, emb in zip(logs, embeddings)]
-
-    # Save to file
-    with open(INDEX_FILE, "w") as f:
-        json.dump(data, f, indent=4)
-
-    print(f" Saved {len(logs)} logs to local index successfully!")
-
-
-# -----------------------------------------
-# Semantic search using cosine similarity
-# -----------------------------------------
-def semantic_search_logs(query: str, top_k: int = 3):
-
-    if not os.path.exists(INDEX_FILE):
-        return {"error": "❌ No log index found. Add logs first."}
-
-    # Load stored logs and embeddings
-    with open(INDEX_FILE, "r") as f:
-        data = json.load(f)
-
-    # Extract only logs
-    corpus_logs = [item["log"] for item in data]
-
-    # Re-encode logs (tensor needed for cosine similarity)
-    corpus_embeddings = model.encode(corpus_logs, convert_to_tensor=True)
-
-    # Encode query
-    query_embedding = model.encode(query, convert_to_tensor=True)
-
-    # Calculate similarity
-    scores = util.cos_sim(query_embedding, corpus_embeddings)[0]
-
-    # Get best matches
-    top_results = scores.topk(top_k)
-
-    results = []
-    for score, idx in zip(top_results.values.tolist(), top_results.indices.tolist()):
-        results.append({
-            "log": corpus_logs[idx],
-            "score": float(score)
-        })
-
-    return {"query": query, "results": results}
+import json
+import os
+import threading
+import numpy as np
+from collections import defaultdict
+from typing import Dict, List, Optional, Union
+from vector_store import VectorStore
+from query_embedder import QueryEmbedder
+from embedding_executor import cpu_pool, configure_compute_threads
+from log_templates import TemplateMiner, tokenize
+from metadata_index import matches
+
+# Embedding model (loaded on first use / warmup, not at import)
+MODEL_NAME = os.getenv("EMBEDDING_MODEL", "all-MiniLM-L6-v2")
+_model = None
+_model_lock = threading.Lock()
+
+# Segmented FAISS index (float32 vectors) + the log records behind each row
+INDEX_DIR = os.getenv("VECTOR_INDEX_DIR", "log_index")
+
+# Single-file index written by older versions; adopted as the first segment
+INDEX_FILE = os.getenv("VECTOR_INDEX_FILE", "log_vectors.index")
+TEXTS_FILE = os.getenv("VECTOR_TEXTS_FILE", "log_texts.json")
+
+# Loaded once, shared by every request
+store = VectorStore(INDEX_DIR, legacy_index=INDEX_FILE, legacy_records=TEXTS_FILE)
+
+# Only unique message templates get a vector; each row keeps its member logs.
+# Membership is append-only (one JSON line per log) next to the segments.
+# A template that was generalised since its row was stored gets a
+# {"row", "template"} line there too; the last one wins on load.
+# Lines of rows still in the vector buffer are held back and written when
+# the buffer is flushed, so the file never names a row that is not on disk.
+MEMBERS_FILE = os.path.join(INDEX_DIR, "members.jsonl")
+MEMBER_FIELDS = ("id", "level", "service", "region", "timestamp")
+MEMBER_IDS_LIMIT = int(os.getenv("TEMPLATE_MEMBER_IDS_LIMIT", "20"))
+
+miner = TemplateMiner()
+# row -> current template text (as last written to the index / members file)
+_templates: Dict[int, str] = {}
+_members: Dict[int, List[dict]] = defaultdict(list)
+_templates_loaded = False
+_ingest_lock = threading.Lock()
+
+# Guards the members file; taken inside the store lock by _on_flush, so
+# nothing holding it may call into the store
+_members_file_lock = threading.Lock()
+_durable_rows = 0
+_unflushed: List[tuple] = []  # (row, line) waiting for their row's segment
+
+
+# -----------------------------------------
+# Embedding helpers
+# -----------------------------------------
+def get_model():
+    global _model
+
+    with _model_lock:
+        if _model is None:
+            # Importing sentence_transformers pulls in torch; keep it off the import path
+            from sentence_transformers import SentenceTransformer
+            _model = SentenceTransformer(MODEL_NAME)
+            configure_compute_threads()
+        return _model
+
+
+def encode_texts(texts: List[str]) -> np.ndarray:
+    """
+    Encodes texts as unit-length float32 vectors, so inner product == cosine similarity.
+    """
+    embeddings = get_model().encode(texts, convert_to_numpy=True, normalize_embeddings=True)
+    return np.ascontiguousarray(embeddings, dtype="float32")
+
+
+def _record_text(record) -> str:
+    return record["message"] if isinstance(record, dict) else str(record)
+
+
+def _to_record(log) -> dict:
+    if not isinstance(log, dict):
+        return {"message": log}
+    keys = ("id", "message", "level", "service", "region", "timestamp")
+    return {k: log[k] for k in keys if log.get(k) is not None}
+
+
+def _to_member(record: dict) -> dict:
+    return {k: record[k] for k in MEMBER_FIELDS if k in record}
+
+
+def _is_template(record) -> bool:
+    return isinstance(record, dict) and "template" in record
+
+
+# -----------------------------------------
+# Load the on-disk index (once)
+# -----------------------------------------
+def _load_templates():
+    global _templates_loaded
+
+    # Rebind every stored row to a template so new logs dedupe against it
+    clusters = {}
+    for row, record in store.records():
+        template = record["template"] if _is_template(record) else _record_text(record)
+        clusters[row] = miner.restore(template, row)
+        _templates[row] = template
+        if not _is_template(record) and isinstance(record, dict):
+            # Rows from before template mining are their own single member
+            _members[row].append(_to_member(record))
+
+    global _durable_rows
+    total = store.total_rows()
+    with _members_file_lock:
+        _durable_rows = total
+    if os.path.exists(MEMBERS_FILE):
+        with open(MEMBERS_FILE, "r") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                member = json.loads(line)
+                row = member.pop("row")
+                # Only lines of flushed rows are written; older files may still name lost rows
+                if row >= total:
+                    continue
+                if "template" in member:
+                    # Kept in the tree node of the stored template, as before the restart
+                    clusters[row].tokens = tokenize(member["template"])
+                    _templates[row] = member["template"]
+                    continue
+                _members[row].append(member)
+                store.add_metadata(row, member)
+
+    _templates_loaded = True
+
+
+def load_index():
+    store.load()
+    with _ingest_lock:
+        if not _templates_loaded:
+            _load_templates()
+    return store
+
+
+def _group_by_template(logs: List[Union[str, dict]], base_row: int):
+    """
+    Runs logs through the template miner (inside a miner transaction; nothing
+    else is touched). Returns (new template records, member refs,
+    {existing row: generalised template}).
+    """
+    new_clusters, members, touched = [], [], {}
+    for log in logs:
+        record = _to_record(log)
+        message = _record_text(record)
+        cluster, is_new = miner.add_message(message)
+        if is_new:
+            cluster.row = base_row + len(new_clusters)
+            new_clusters.append((cluster, message))
+        elif cluster.row < base_row:
+            touched[cluster.row] = cluster
+
+        member = _to_member(record)
+        params = miner.parameters(cluster, message)
+        if params:
+            member["params"] = params
+        members.append((cluster.row, member))
+
+    # New rows are stored with their final template, existing ones get an update line
+    new_records = [{"template_id": c.row, "template": c.template, "message": m} for c, m in new_clusters]
+    updates = {row: c.template for row, c in touched.items() if c.template != _templates.get(row)}
+    return new_records, members, updates
+
+
+def _write_member_lines(lines: List[tuple], mode: str = "a"):
+    with open(MEMBERS_FILE, mode) as f:
+        for _, line in lines:
+            f.write(line + "\n")
+
+
+def _on_flush(durable_rows: int):
+    global _durable_rows, _unflushed
+    with _members_file_lock:
+        _durable_rows = durable_rows
+        ready = [entry for entry in _unflushed if entry[0] < durable_rows]
+        if ready:
+            _write_member_lines(ready)
+            _unflushed = [entry for entry in _unflushed if entry[0] >= durable_rows]
+
+
+store.add_flush_listener(_on_flush)
+
+
+def _add_members(records: list, members: list, updates: dict, mode: str = "a"):
+    global _unflushed
+    lines = [(row, json.dumps({"row": row, **member})) for row, member in members]
+    lines += [(row, json.dumps({"row": row, "template": template})) for row, template in updates.items()]
+    with _members_file_lock:
+        if mode == "w":
+            _unflushed = []
+        _write_member_lines([entry for entry in lines if entry[0] < _durable_rows], mode)
+        _unflushed.extend(entry for entry in lines if entry[0] >= _durable_rows)
+
+    for record in records:
+        _templates[record["template_id"]] = record["template"]
+    for row, member in members:
+        _members[row].append(member)
+        store.add_metadata(row, member)
+    for row, template in updates.items():
+        _templates[row] = template
+
+
+# -----------------------------------------
+# Save logs + store embeddings in a FAISS index (full rebuild)
+# -----------------------------------------
+def save_logs_to_index(logs: List[Union[str, dict]]):
+    global miner
+    print("🔹 Generating local embeddings using SentenceTransformer...")
+
+    load_index()
+    with _ingest_lock:
+        fresh = TemplateMiner()
+        miner, previous = fresh, miner
+        try:
+            records, members, updates = _group_by_template(logs, 0)
+            embeddings = encode_texts([_record_text(r) for r in records])
+            store.replace_all(records, embeddings)
+        except Exception:
+            miner = previous
+            raise
+        _members.clear()
+        _templates.clear()
+        _add_members(records, members, updates, mode="w")
+
+    print(f" Saved {len(logs)} logs as {len(records)} templates to local index successfully!")
+
+
+# -----------------------------------------
+# Append newly ingested logs to the index
+# -----------------------------------------
+def index_logs(logs: List[Union[str, dict]]):
+    """
+    Maps each log to a template; only templates never seen before are embedded.
+    """
+    if not logs:
+        return
+    load_index()
+    with _ingest_lock:
+        # Rows are only handed out for good once their vectors are in the store
+        miner.begin()
+        try:
+            records, members, updates = _group_by_template(logs, store.total_rows())
+            if records:
+                store.append(records, encode_texts([_record_text(r) for r in records]))
+        except Exception:
+            miner.rollback()
+            raise
+        miner.commit()
+        _add_members(records, members, updates)
+
+
+def index_stats() -> dict:
+    with _ingest_lock:
+        logs = sum(len(m) for m in _members.values())
+    templates = store.total_rows()
+    return {
+        "templates": templates,
+        "logs": logs,
+        "logs_per_template": round(logs / templates, 2) if templates else 0.0,
+        "segments": len(store.segments),
+        "storage_mode": store.mode,
+    }
+
+
+# Concurrent /semantic-search queries share batched encode calls + an LRU cache
+query_embedder = QueryEmbedder(encode_texts, runner=cpu_pool.run)
+
+
+# -----------------------------------------
+# Semantic search using cosine similarity
+# -----------------------------------------
+RESULT_FIELDS = ("id", "level", "service", "region", "timestamp")
+
+
+def _template_members(row: int, record: dict, filters: dict) -> dict:
+    with _ingest_lock:
+        members = [m for m in _members.get(row, []) if matches(m, **filters)] if filters else list(_members.get(row, []))
+    return {
+        "template_id": record["template_id"],
+        # The stored record keeps the template as first seen; this one is current
+        "template": _templates.get(row, record["template"]),
+        "count": len(members),
+        "log_ids": [m["id"] for m in members[-MEMBER_IDS_LIMIT:] if "id" in m],
+    }
+
+
+def _clean_filters(filters: Optional[dict]) -> dict:
+    return {k: v for k, v in (filters or {}).items() if v}
+
+
+def _format_hit(hit: dict, filters: dict) -> dict:
+    record = hit["record"]
+    result = {"log": _record_text(record), "score": hit["score"]}
+    if _is_template(record):
+        result.update(_template_members(hit["row"], record, filters))
+    elif isinstance(record, dict):
+        result.update({k: record[k] for k in RESULT_FIELDS if k in record})
+    return result
+
+
+def semantic_search_batch(queries: List[dict], query_embeddings: Optional[np.ndarray] = None) -> List[dict]:
+    """
+    Searches many queries at once. Each query is {"query", "top_k", "filters"}.
+
+    All query texts are encoded in one model call, and queries sharing the
+    same filters are scored together with one search (one matrix multiply per
+    segment). Responses come back in input order.
+    """
+    if load_index().total_rows() == 0:
+        return [{"error": "❌ No log index found. Add logs first."} for _ in queries]
+
+    if query_embeddings is None:
+        query_embeddings = encode_texts([q["query"] for q in queries])
+
+    groups = defaultdict(list)
+    for i, q in enumerate(queries):
+        groups[tuple(sorted(_clean_filters(q.get("filters")).items()))].append(i)
+
+    responses = [None] * len(queries)
+    for key, positions in groups.items():
+        # Metadata filters narrow the candidate rows before any scoring
+        filters = dict(key)
+        candidates = store.candidates(**filters) if filters else None
+        top_k = max(queries[i].get("top_k", 3) for i in positions)
+
+        # Postings are per member, so a template can pass a multi-field filter
+        # through different members without one member matching all of it.
+        # Those hits are dropped and the search over-fetches until top_k is filled.
+        fetch = top_k
+        while True:
+            if candidates is None or len(candidates):
+                hits = store.search(query_embeddings[positions], fetch, candidates)
+            else:
+                hits = [[] for _ in positions]
+            results = [[r for r in (_format_hit(hit, filters) for hit in query_hits)
+                        if not filters or r.get("count") != 0] for query_hits in hits]
+            short = any(len(r) < queries[i].get("top_k", 3) and len(h) == fetch
+                        for i, r, h in zip(positions, results, hits))
+            if not filters or not short or fetch >= len(candidates):
+                break
+            fetch = min(fetch * 4, len(candidates))
+
+        for i, query_results in zip(positions, results):
+            response = {
+                "query": queries[i]["query"],
+                "results": query_results[:queries[i].get("top_k", 3)],
+            }
+            if filters:
+                response["filters"] = filters
+                response["candidates"] = len(candidates)
+            responses[i] = response
+
+    return responses
+
+
+def semantic_search_logs(query: str, top_k: int = 3, query_embedding: Optional[np.ndarray] = None,
+                         filters: Optional[dict] = None):
+    # Only the query is encoded; corpus vectors come straight from the index
+    return semantic_search_batch([{"query": query, "top_k": top_k, "filters": filters}], query_embedding)[0]
@@ -0,0 +1,46 @@
+from typing import Callable, Iterable, List
+
+# ---------------------------------------------------
+# Ingest hooks (derived views updated per stored log)
+# ---------------------------------------------------
+# Views such as the dashboard rollups register a callback here; the log
+# store publishes every log it has stored. Hooks must be cheap and
+# in-memory: they run inline on the request path.
+#
+# With the change-feed consumer enabled (change_feed.py) the store's
+# publish() calls are ignored and the consumer dispatches instead, so
+# logs written straight to Cosmos (e.g. by the Functions) reach the views too.
+_hooks: List[Callable[[dict], None]] = []
+_change_feed = False
+
+
+def register(hook: Callable[[dict], None]) -> Callable[[dict], None]:
+    _hooks.append(hook)
+    return hook
+
+
+def use_change_feed(enabled: bool = True):
+    global _change_feed
+    _change_feed = enabled
+
+
+def change_feed_enabled() -> bool:
+    return _change_feed
+
+
+def publish(logs: Iterable[dict]):
+    """
+    Called by the log store after a write (a no-op in change-feed mode).
+    """
+    if not _change_feed:
+        dispatch(logs)
+
+
+def dispatch(logs: Iterable[dict]):
+    for log in logs:
+        for hook in _hooks:
+            try:
+                hook(log)
+            except Exception as ex:
+                # A broken view must never fail the write that already succeeded
+                print(f"⚠ Ingest hook {getattr(hook, '__qualname__', hook)} failed: {ex}")
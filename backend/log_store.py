@@ -0,0 +1,100 @@
+import base64
+import os
+from typing import AsyncIterator, List, Optional, Sequence
+
+# ---------------------------------------------------
+# Log storage backend (LOG_STORE=cosmos | sqlite)
+# ---------------------------------------------------
+# The routes only talk to a LogStore. "cosmos" is the Azure container
+# (cosmos_query.py); "sqlite" is a local embedded engine (sqlite_store.py)
+# so the API can be load-tested and profiled on one box without the cloud.
+LOG_STORE = os.getenv("LOG_STORE", "cosmos").lower()
+
+# Page sizes for GET /logs and /logs/filter
+LOGS_PAGE_SIZE = int(os.getenv("LOGS_PAGE_SIZE", "100"))
+LOGS_MAX_PAGE_SIZE = int(os.getenv("LOGS_MAX_PAGE_SIZE", "1000"))
+
+# Fields count_by() may group on
+AGGREGATE_FIELDS = ("level", "service", "region")
+
+
+class LogExists(Exception):
+    """
+    A log with this id is already stored.
+    """
+
+
+# ---------------------------------------------------
+# Pagination (opaque cursors over backend continuation tokens)
+# ---------------------------------------------------
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(token):
+    if not token:
+        return None
+    return base64.urlsafe_b64encode(str(token).encode()).decode()
+
+
+def decode_cursor(cursor):
+    if not cursor:
+        return None
+    try:
+        return base64.b64decode(cursor.encode(), altchars=b"-_", validate=True).decode()
+    except (ValueError, UnicodeDecodeError):
+        raise InvalidCursor("Invalid cursor")
+
+
+class LogStore:
+    """
+    Storage interface behind the log routes. `filters` are always the
+    keyword arguments level / service / region / start_time / end_time.
+    """
+    name = "base"
+
+    async def open(self):
+        """Connects (idempotent); raises if the backend is unusable."""
+
+    async def close(self):
+        pass
+
+    async def insert(self, log: dict) -> dict:
+        raise NotImplementedError
+
+    async def bulk_insert(self, logs: List[dict]) -> dict:
+        """{"status", "inserted", "failed", "items": [{"index", "id", "status"[, "error"]}]}"""
+        raise NotImplementedError
+
+    async def get(self, log_id: str, partition_key=None) -> Optional[dict]:
+        raise NotImplementedError
+
+    async def page(self, limit: int = LOGS_PAGE_SIZE, cursor: str = None, **filters) -> dict:
+        """{"items", "count", "next_cursor"}"""
+        raise NotImplementedError
+
+    def iter_pages(self, page_size: int = LOGS_PAGE_SIZE, cursor: str = None,
+                   fields: Optional[Sequence[str]] = None, **filters) -> AsyncIterator[List[dict]]:
+        """Result pages as they are read; `fields` projects each log to those keys."""
+        raise NotImplementedError
+
+    async def count_by(self, field: str = "level", **filters) -> List[dict]:
+        """[{field: value, "count": n}, ...]"""
+        raise NotImplementedError
+
+    async def top(self, level: str = "CRITICAL", limit: int = 10) -> List[dict]:
+        """The `limit` most recent logs of one level, newest first."""
+        raise NotImplementedError
+
+    async def stats(self) -> dict:
+        return {"store": self.name}
+
+
+def create_store(kind: str = LOG_STORE) -> LogStore:
+    if kind == "cosmos":
+        from cosmos_query import CosmosLogStore
+        return CosmosLogStore()
+    if kind == "sqlite":
+        from sqlite_store import SqliteLogStore
+        return SqliteLogStore()
+    raise ValueError(f"Unknown LOG_STORE '{kind}' (expected cosmos or sqlite)")
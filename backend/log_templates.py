@@ -0,0 +1,158 @@
+import os
+import re
+from typing import Callable, Dict, List, Optional, Tuple
+
+# ---------------------------------------------------
+# Drain-style online log template mining
+# ---------------------------------------------------
+# Messages are tokenised, obvious parameters (ids, numbers, IPs, ...) are
+# masked, and the message is routed through a fixed-depth tree
+# (token count -> leading tokens) to a small list of clusters. It joins the
+# most similar cluster if similarity >= SIM_THRESHOLD; tokens that differ
+# become parameter slots (<*>). Otherwise it starts a new template.
+PARAM = "<*>"
+SIM_THRESHOLD = float(os.getenv("TEMPLATE_SIM_THRESHOLD", "0.5"))
+TREE_DEPTH = int(os.getenv("TEMPLATE_TREE_DEPTH", "4"))
+MAX_CHILDREN = int(os.getenv("TEMPLATE_MAX_CHILDREN", "100"))
+
+MASKS = [
+    re.compile(r"\b[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}\b"),  # uuid
+    re.compile(r"\b\d{1,3}(?:\.\d{1,3}){3}(?::\d+)?\b"),                                            # ip[:port]
+    re.compile(r"\b0x[0-9a-fA-F]+\b"),                                                              # hex
+    re.compile(r"(?<!\w)[-+]?\d+(?:\.\d+)?(?:ms|s|%)?(?!\w)"),                                      # numbers
+]
+
+
+def mask_parameters(message: str) -> str:
+    for pattern in MASKS:
+        message = pattern.sub(PARAM, message)
+    return message
+
+
+def tokenize(message: str) -> List[str]:
+    return mask_parameters(message).split()
+
+
+class LogCluster:
+    """
+    One template. `row` is the vector-store row that holds its embedding.
+    """
+    __slots__ = ("tokens", "row", "size")
+
+    def __init__(self, tokens: List[str], row: Optional[int] = None):
+        self.tokens = tokens
+        self.row = row
+        self.size = 0
+
+    @property
+    def template(self) -> str:
+        return " ".join(self.tokens)
+
+
+class TemplateMiner:
+    def __init__(self, depth: int = TREE_DEPTH, sim_threshold: float = SIM_THRESHOLD, max_children: int = MAX_CHILDREN):
+        # depth counts the root and length levels, like the original Drain paper
+        self.prefix_depth = max(depth - 2, 1)
+        self.sim_threshold = sim_threshold
+        self.max_children = max_children
+        self.root: Dict[int, dict] = {}
+        self.clusters: List[LogCluster] = []
+        # Undo steps since begin(); None outside a transaction
+        self._journal: Optional[List[Callable[[], None]]] = None
+
+    # ---------------------------------------------------
+    # Transactions (a failed ingest leaves no trace in the tree)
+    # ---------------------------------------------------
+    def begin(self):
+        self._journal = []
+
+    def commit(self):
+        self._journal = None
+
+    def rollback(self):
+        for undo in reversed(self._journal or []):
+            undo()
+        self._journal = None
+
+    def _record(self, undo: Callable[[], None]):
+        if self._journal is not None:
+            self._journal.append(undo)
+
+    def _child(self, node: dict, key):
+        if key not in node:
+            node[key] = [] if key == "__clusters__" else {}
+            self._record(lambda: node.pop(key, None))
+        return node[key]
+
+    # ---------------------------------------------------
+    # Tree navigation
+    # ---------------------------------------------------
+    def _leaf(self, tokens: List[str]) -> list:
+        node = self._child(self.root, len(tokens))
+
+        for token in tokens[:self.prefix_depth]:
+            key = PARAM if any(ch.isdigit() for ch in token) else token
+            if key not in node and len(node) >= self.max_children:
+                key = PARAM
+            node = self._child(node, key)
+
+        return self._child(node, "__clusters__")
+
+    @staticmethod
+    def _similarity(template: List[str], tokens: List[str]) -> Tuple[float, int]:
+        same, params = 0, 0
+        for a, b in zip(template, tokens):
+            if a == PARAM:
+                params += 1
+            elif a == b:
+                same += 1
+        return (same / len(tokens) if tokens else 1.0), params
+
+    # ---------------------------------------------------
+    # Public API
+    # ---------------------------------------------------
+    def add_message(self, message: str) -> Tuple[LogCluster, bool]:
+        """
+        Maps a message to its template. Returns (cluster, is_new).
+        """
+        tokens = tokenize(message)
+        leaf = self._leaf(tokens)
+
+        best, best_key = None, (-1.0, -1)
+        for cluster in leaf:
+            key = self._similarity(cluster.tokens, tokens)
+            if key > best_key:
+                best, best_key = cluster, key
+
+        if best is not None and best_key[0] >= self.sim_threshold:
+            old_tokens, old_size = best.tokens, best.size
+            self._record(lambda: (setattr(best, "tokens", old_tokens), setattr(best, "size", old_size)))
+            best.tokens = [a if a == b else PARAM for a, b in zip(best.tokens, tokens)]
+            best.size += 1
+            return best, False
+
+        cluster = LogCluster(tokens)
+        cluster.size = 1
+        leaf.append(cluster)
+        self.clusters.append(cluster)
+        self._record(lambda: (leaf.remove(cluster), self.clusters.remove(cluster)))
+        return cluster, True
+
+    def restore(self, template: str, row: int) -> LogCluster:
+        """
+        Re-creates a known template (e.g. after a restart) bound to its vector row.
+        """
+        tokens = tokenize(template)
+        cluster = LogCluster(tokens, row)
+        self._leaf(tokens).append(cluster)
+        self.clusters.append(cluster)
+        return cluster
+
+    def parameters(self, cluster: LogCluster, message: str) -> List[str]:
+        """
+        The raw values that fill the cluster's <*> slots for one message.
+        """
+        tokens = message.split()
+        if len(tokens) != len(cluster.tokens):
+            return []
+        return [value for slot, value in zip(cluster.tokens, tokens) if slot == PARAM]
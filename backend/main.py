@@ -1,216 +1,568 @@
-import os
-from datetime import datetime
-from fastapi import FastAPI, HTTPException
-from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, Field
-from sample_data import SAMPLE_EXAMPLE_QUERIES
-from typing import Optional, Dict, Any
-from dotenv import load_dotenv
-
-# Load environment
-load_dotenv()
-
-# -----------------------------
-# IMPORT HELPERS
-# -----------------------------
-from cosmos_query import (
-    insert_log_into_cosmos,
-    get_all_logs,
-    get_log_by_id,
-    filter_logs,
-    count_logs_by_severity,
-    top_critical_logs
-)
-
-from generate_embedding_faiss import semantic_search_logs
-from automation_trigger import send_logic_app_alert
-from sample_data import SAMPLE_EXAMPLE_QUERIES
-
-from servicebus_client import (
-    send_message_to_servicebus,
-    list_servicebus_queues,
-    check_servicebus_health
-)
-
-# -----------------------------
-# SWAGGER TAG METADATA
-# -----------------------------
-tags_metadata = [
-    {"name": "Logs", "description": "Insert, fetch, filter logs stored in Cosmos DB."},
-    {"name": "Semantic Search", "description": "AI-based log similarity search using embeddings."},
-    {"name": "Service Bus", "description": "Queue messaging, listing queues, and health checks."},
-    {"name": "Alerts", "description": "Trigger Logic App alerts and automation flows."},
-    {"name": "Dashboard", "description": "Severity distribution & top critical events for UI."},
-    {"name": "Admin", "description": "API health, configuration, version & system diagnostics."}
-]
-
-# -----------------------------
-# FASTAPI APP CONFIG
-# -----------------------------
-app = FastAPI(
-    title="Intelligent Log Insights API",
-    description="Cloud-Native Observability Platform with Semantic Search, Cosmos DB, and Azure Service Bus.",
-    version="1.0.0",
-    openapi_tags=tags_metadata,
-)
-
-# CORS
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
-
-# -----------------------------
-# Pydantic Models
-# -----------------------------
-class LogItem(BaseModel):
-    level: str = Field(..., description="Log level: INFO, WARNING, ERROR, CRITICAL")
-    service: str = Field(..., description="Microservice name")
-    message: str = Field(..., description="Log message content")
-    region: Optional[str] = Field("eastus", description="Azure region")
-    timestamp: Optional[str] = Field(None, description="ISO8601 timestamp")
-
-
-class SemanticRequest(BaseModel):
-    query: str = Field(..., description="Search query text")
-
-
-class QueueMessage(BaseModel):
-    queue: str = Field(..., description="Target queue name")
-    content: Dict[str, Any] = Field(..., description="Content of message")
-
-
-class AlertTrigger(BaseModel):
-    message: str = Field(..., description="Alert message body")
-
-
-# ---------------------------------------------------------------------
-# A) LOG INGESTION & STORAGE
-# ---------------------------------------------------------------------
-@app.post("/logs", tags=["Logs"], summary="Insert a new log")
-async def insert_log(log: LogItem):
-    return insert_log_into_cosmos(log.dict())
-
-
-@app.get("/logs", tags=["Logs"], summary="Fetch all logs")
-async def read_logs():
-    return get_all_logs()
-
-
-@app.get("/logs/{log_id}", tags=["Logs"], summary="Fetch a single log by ID")
-async def read_log(log_id: str):
-    result = get_log_by_id(log_id)
-    if not result:
-        raise HTTPException(404, "Log not found")
-    return result
-
-
-@app.get("/logs/filter", tags=["Logs"], summary="Filter logs by severity/service/region")
-async def filter_logs_endpoint(level: Optional[str] = None,
-                               service: Optional[str] = None,
-                               region: Optional[str] = None):
-    return filter_logs(level, service, region)
-
-
-# ---------------------------------------------------------------------
-# B) SEMANTIC SEARCH
-# ---------------------------------------------------------------------
-@app.post("/semantic-search", tags=["Semantic Search"], summary="Semantic log search using embeddings")
-async def semantic_search(request: SemanticRequest):
-    return semantic_search_logs(request.query)
-
-
-@app.get("/semantic-search/example-queries", tags=["Semantic Search"], summary="Useful example queries")
-async def example_queries():
-    return SAMPLE_EXAMPLE_QUERIES
-
-
-# ---------------------------------------------------------------------
-# C) SERVICE BUS INTEGRATION
-# ---------------------------------------------------------------------
-@app.post("/send-to-queue", tags=["Service Bus"], summary="Send message to a Service Bus queue")
-async def send_message(msg: QueueMessage):
-    return send_message_to_servicebus(msg.queue, msg.content)
-
-
-@app.get("/servicebus/health", tags=["Service Bus"], summary="Check Service Bus health")
-async def sb_health():
-    return check_servicebus_health()
-
-
-@app.get("/servicebus/queues", tags=["Service Bus"], summary="List all available queues")
-async def sb_queues():
-    return list_servicebus_queues()
-
-
-# ---------------------------------------------------------------------
-# D) ALERTS & AUTOMATION
-# ---------------------------------------------------------------------
-@app.post("/trigger-alert", tags=["Alerts"], summary="Trigger Logic App alert manually")
-async def logic_alert(alert: AlertTrigger):
-    return send_logic_app_alert(alert.message)
-
-
-@app.post("/simulate-high-error", tags=["Alerts"], summary="Simulate high error rate")
-async def simulate_error():
-    return send_logic_app_alert("ERROR_THRESHOLD_EXCEEDED")
-
-
-@app.get("/alerts/status", tags=["Alerts"], summary="Mock alert statistics")
-async def alert_status():
-    return {"alerts_triggered": 18, "today": 5}  # sample
-
-
-@app.post("/alerts/trigger", tags=["Alerts"], summary="Force trigger alert event")
-async def manual_alert(alert: AlertTrigger):
-    return {"status": "Alert sent", "message": alert.message}
-
-
-# ---------------------------------------------------------------------
-# E) DASHBOARD / OBSERVABILITY
-# ---------------------------------------------------------------------
-@app.get("/dashboard/severity-distribution", tags=["Dashboard"], summary="Pie chart severity distribution")
-async def severity_distribution():
-    return count_logs_by_severity()
-
-
-@app.get("/dashboard/top-critical-events", tags=["Dashboard"], summary="Top 10 critical events")
-async def critical_events():
-    return top_critical_logs()
-
-
-# ---------------------------------------------------------------------
-# F) ADMIN / DEVOPS
-# ---------------------------------------------------------------------
-@app.get("/health", tags=["Admin"], summary="API health check")
-async def health():
-    return {"status": "healthy", "timestamp": datetime.utcnow()}
-
-
-@app.get("/config", tags=["Admin"], summary="Safe environment configuration")
-async def config():
-    return {
-        "cosmos": True,
-        "faiss_index": True,
-        "service_bus": True,
-        "logic_app": True,
-        "env_variables_loaded": True,
-    }
-
-
-@app.get("/version", tags=["Admin"], summary="API version")
-async def version():
-    return {"version": "1.0.0", "build": "2025.1111"}
-
-
-@app.get("/status", tags=["Admin"], summary="Systemwide health")
-async def status():
-    return {
-        "CosmosDB": "OK",
-        "FAISS": "Loaded",
-        "ServiceBus": check_servicebus_health(),
-        "LogicApp": "Reachable",
-    }
+import os
+import gzip
+import time
+import asyncio
+import warmup  # first import: process uptime is measured from here
+from contextlib import asynccontextmanager
+from datetime import datetime
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Request, Query
+from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi.middleware.cors import CORSMiddleware
+from pydantic import BaseModel, Field
+from sample_data import SAMPLE_EXAMPLE_QUERIES
+import json
+from typing import Optional, Dict, Any, List, Literal
+from dotenv import load_dotenv
+
+# Load environment
+load_dotenv()
+
+# -----------------------------
+# IMPORT HELPERS
+# -----------------------------
+from log_store import (
+    create_store,
+    decode_cursor,
+    InvalidCursor,
+    LogExists,
+    LOGS_PAGE_SIZE,
+    LOGS_MAX_PAGE_SIZE
+)
+import ingest_hooks
+from change_feed import ChangeFeedProcessor, CHANGE_FEED_ENABLED
+from cosmos_query import get_container
+from rollups import rollups
+from top_events import top_events, TOP_EVENTS_LEVELS, TOP_EVENTS_PER_SERVICE
+
+from generate_embedding_faiss import (
+    semantic_search_logs,
+    semantic_search_batch,
+    load_index,
+    index_logs,
+    encode_texts,
+    query_embedder,
+    index_stats,
+    store as vector_store
+)
+from embedding_executor import cpu_pool, ExecutorSaturated
+from automation_trigger import send_logic_app_alert
+from sample_data import SAMPLE_EXAMPLE_QUERIES
+
+from servicebus_client import (
+    open_servicebus,
+    close_servicebus,
+    sender_pool,
+    send_message_to_servicebus,
+    list_servicebus_queues,
+    check_servicebus_health
+)
+
+warmup.record_phase("imports", time.perf_counter() - warmup.STARTED_AT)
+
+# -----------------------------
+# LAZY DEPENDENCIES / WARMUP
+# -----------------------------
+# Nothing below is touched at import time; each phase runs in the background
+# after startup (WARMUP_ON_STARTUP) or on POST /warmup, and a failing
+# dependency only affects the routes that need it.
+WARMUP_ON_STARTUP = os.getenv("WARMUP_ON_STARTUP", "true").lower() == "true"
+
+# Cosmos DB or the local SQLite engine, per LOG_STORE
+log_store = create_store()
+
+# Rebuild the dashboard rollups from the log store when no snapshot exists (one paged scan)
+ROLLUP_BACKFILL = os.getenv("ROLLUP_BACKFILL", "true").lower() == "true"
+ROLLUP_BACKFILL_FIELDS = ("level", "service", "region", "timestamp")
+
+# Most recent events per level read from Cosmos to seed the top-K tracker
+TOP_EVENTS_SEED_LIMIT = int(os.getenv("TOP_EVENTS_SEED_LIMIT", "2000"))
+
+ingest_hooks.register(rollups.add)
+ingest_hooks.register(top_events.add)
+
+
+# Change-feed mode (Cosmos only): the consumer, not the write path, updates
+# the semantic index, rollups and top-K, so Functions writes are seen too
+def is_log_document(doc: dict) -> bool:
+    # Other documents in the container (e.g. alerts) have no message to index
+    return isinstance(doc.get("message"), str) and bool(doc.get("level"))
+
+
+async def update_views(logs: List[dict]):
+    # Index first: it is the step that can fail, and the page (or the single
+    # log, when the processor retries one at a time) must not have been
+    # counted in the rollups yet when it does
+    await cpu_pool.run_always(index_logs, logs)
+    ingest_hooks.dispatch(logs)
+
+
+def persist_views():
+    vector_store.flush()
+    rollups.save()
+
+
+change_feed = ChangeFeedProcessor(get_container, update_views, persist=lambda: asyncio.to_thread(persist_views),
+                                  accept=is_log_document)
+USE_CHANGE_FEED = CHANGE_FEED_ENABLED and log_store.name == "cosmos"
+ingest_hooks.use_change_feed(USE_CHANGE_FEED)
+
+
+async def load_rollups():
+    if await asyncio.to_thread(rollups.load) or not ROLLUP_BACKFILL:
+        return
+    # Logs ingested while this runs may be counted twice; the scan only happens once
+    async for page in log_store.iter_pages(LOGS_MAX_PAGE_SIZE, fields=ROLLUP_BACKFILL_FIELDS):
+        rollups.loaded = True  # a retry after a partial scan would double count
+        for log in page:
+            rollups.add(log)
+    await asyncio.to_thread(rollups.save)
+
+
+async def seed_top_events():
+    for level in TOP_EVENTS_LEVELS:
+        for log in await log_store.top(level, TOP_EVENTS_SEED_LIMIT):
+            top_events.add(log)
+
+
+WARMUP_PHASES = {
+    "vector_index": load_index,
+    "rollups": load_rollups,
+    "top_events": seed_top_events,
+    "embedding_model": lambda: encode_texts(["warmup"]),
+    "log_store": log_store.open,
+    "service_bus": open_servicebus,
+}
+if USE_CHANGE_FEED:
+    WARMUP_PHASES["change_feed"] = change_feed.start
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    vector_store.start_background_compaction()
+    if not USE_CHANGE_FEED:
+        # With the change feed, rollups are saved by its checkpoints (in step with the leases)
+        rollups.start_background_persist()
+    if WARMUP_ON_STARTUP:
+        app.state.warmup_task = asyncio.create_task(warmup.run_warmup(WARMUP_PHASES))
+    yield
+    await change_feed.stop()
+    await asyncio.to_thread(close_servicebus)
+    await log_store.close()
+    rollups.close()
+    vector_store.close()
+    cpu_pool.shutdown()
+
+
+# -----------------------------
+# SWAGGER TAG METADATA
+# -----------------------------
+tags_metadata = [
+    {"name": "Logs", "description": "Insert, fetch, filter logs stored in Cosmos DB."},
+    {"name": "Semantic Search", "description": "AI-based log similarity search using embeddings."},
+    {"name": "Service Bus", "description": "Queue messaging, listing queues, and health checks."},
+    {"name": "Alerts", "description": "Trigger Logic App alerts and automation flows."},
+    {"name": "Dashboard", "description": "Severity distribution & top critical events for UI."},
+    {"name": "Admin", "description": "API health, configuration, version & system diagnostics."}
+]
+
+# -----------------------------
+# FASTAPI APP CONFIG
+# -----------------------------
+app = FastAPI(
+    title="Intelligent Log Insights API",
+    description="Cloud-Native Observability Platform with Semantic Search, Cosmos DB, and Azure Service Bus.",
+    version="1.0.0",
+    openapi_tags=tags_metadata,
+    lifespan=lifespan,
+)
+
+@app.exception_handler(InvalidCursor)
+async def invalid_cursor_handler(request: Request, exc: InvalidCursor):
+    return JSONResponse(status_code=400, content={"detail": "Invalid cursor"})
+
+
+@app.exception_handler(LogExists)
+async def log_exists_handler(request: Request, exc: LogExists):
+    return JSONResponse(status_code=409, content={"error": f"Log '{exc}' already exists"})
+
+
+@app.exception_handler(ExecutorSaturated)
+async def executor_saturated_handler(request: Request, exc: ExecutorSaturated):
+    # Search load sheds here instead of piling up behind the event loop
+    return JSONResponse(status_code=503, content={"error": str(exc)}, headers={"Retry-After": "1"})
+
+
+# CORS
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=["*"],
+    allow_methods=["*"],
+    allow_headers=["*"],
+)
+
+
+# -----------------------------
+# Pydantic Models
+# -----------------------------
+class LogItem(BaseModel):
+    level: str = Field(..., description="Log level: INFO, WARNING, ERROR, CRITICAL")
+    service: str = Field(..., description="Microservice name")
+    message: str = Field(..., description="Log message content")
+    region: Optional[str] = Field("eastus", description="Azure region")
+    timestamp: Optional[str] = Field(None, description="ISO8601 timestamp")
+
+
+class SemanticRequest(BaseModel):
+    query: str = Field(..., description="Search query text")
+    top_k: int = Field(3, ge=1, le=100, description="Number of results to return")
+    level: Optional[str] = Field(None, description="Only logs with this level")
+    service: Optional[str] = Field(None, description="Only logs from this service")
+    region: Optional[str] = Field(None, description="Only logs from this region")
+    start_time: Optional[str] = Field(None, description="ISO8601 lower bound on timestamp")
+    end_time: Optional[str] = Field(None, description="ISO8601 upper bound on timestamp")
+
+    def filters(self) -> Dict[str, Any]:
+        return {
+            "level": self.level,
+            "service": self.service,
+            "region": self.region,
+            "start_time": self.start_time,
+            "end_time": self.end_time,
+        }
+
+
+class BatchSemanticRequest(BaseModel):
+    queries: List[SemanticRequest] = Field(..., description="Queries, each with its own top_k / filters")
+    stream: bool = Field(False, description="Stream results as NDJSON (one line per query, in order)")
+
+
+class QueueMessage(BaseModel):
+    queue: str = Field(..., description="Target queue name")
+    content: Dict[str, Any] = Field(..., description="Content of message")
+
+
+class AlertTrigger(BaseModel):
+    message: str = Field(..., description="Alert message body")
+
+
+# ---------------------------------------------------------------------
+# A) LOG INGESTION & STORAGE
+# ---------------------------------------------------------------------
+@app.post("/logs", tags=["Logs"], summary="Insert a new log")
+async def insert_log(log: LogItem, background_tasks: BackgroundTasks):
+    result = await log_store.insert(log.dict())
+    # Embed + append to the semantic index after the response is sent
+    if not USE_CHANGE_FEED:
+        background_tasks.add_task(cpu_pool.run_always, index_logs, [result["log"]])
+    return result
+
+
+def _check_cursor(cursor: Optional[str]):
+    try:
+        decode_cursor(cursor)
+    except InvalidCursor:
+        raise HTTPException(400, "Invalid cursor")
+
+
+async def _stream_logs(pages):
+    # Credentials / connectivity errors surface before the 200 goes out
+    await log_store.open()
+
+    async def ndjson_lines():
+        async for page in pages:
+            yield "".join(json.dumps(item, default=str) + "\n" for item in page)
+
+    return StreamingResponse(ndjson_lines(), media_type="application/x-ndjson")
+
+
+BULK_MAX_ITEMS = int(os.getenv("BULK_MAX_ITEMS", "10000"))
+
+
+def _parse_bulk_body(body: bytes, content_type: str, content_encoding: str) -> list:
+    # gzip is detected from the header or the magic bytes
+    if "gzip" in content_encoding or body[:2] == b"\x1f\x8b":
+        body = gzip.decompress(body)
+    text = body.decode("utf-8")
+    if "ndjson" in content_type or not text.lstrip().startswith("["):
+        return [json.loads(line) for line in text.splitlines() if line.strip()]
+    return json.loads(text)
+
+
+@app.post("/logs/bulk", tags=["Logs"], summary="Insert many logs (JSON array or gzip NDJSON)")
+async def insert_logs_bulk(request: Request, background_tasks: BackgroundTasks):
+    try:
+        raw = _parse_bulk_body(await request.body(),
+                               request.headers.get("content-type", ""),
+                               request.headers.get("content-encoding", ""))
+    except (ValueError, OSError, EOFError) as ex:
+        raise HTTPException(400, f"Unreadable bulk body: {ex}")
+    if not isinstance(raw, list):
+        raise HTTPException(400, "Expected a JSON array or NDJSON lines of logs")
+    if len(raw) > BULK_MAX_ITEMS:
+        raise HTTPException(413, f"At most {BULK_MAX_ITEMS} logs per request")
+
+    # Invalid items are reported individually; the rest are still written
+    statuses = [None] * len(raw)
+    valid, positions = [], []
+    for index, item in enumerate(raw):
+        try:
+            valid.append(LogItem(**item).dict())
+            positions.append(index)
+        except (ValueError, TypeError) as ex:
+            statuses[index] = {"index": index, "id": None, "status": 422, "error": str(ex)}
+
+    result = await log_store.bulk_insert(valid)
+    for position, item_status in zip(positions, result["items"]):
+        statuses[position] = {**item_status, "index": position}
+
+    inserted = [log for log, item_status in zip(valid, result["items"]) if item_status["status"] == 201]
+    if inserted and not USE_CHANGE_FEED:
+        background_tasks.add_task(cpu_pool.run_always, index_logs, inserted)
+    return {
+        "status": "completed",
+        "received": len(raw),
+        "inserted": len(inserted),
+        "failed": len(raw) - len(inserted),
+        "items": statuses,
+    }
+
+
+@app.get("/logs", tags=["Logs"], summary="Fetch logs, one page at a time (or streamed as NDJSON)")
+async def read_logs(limit: int = Query(LOGS_PAGE_SIZE, ge=1, le=LOGS_MAX_PAGE_SIZE, description="Page size"),
+                    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+                    stream: bool = Query(False, description="Stream every remaining log as NDJSON")):
+    _check_cursor(cursor)
+    if stream:
+        return await _stream_logs(log_store.iter_pages(limit, cursor))
+    return await log_store.page(limit, cursor)
+
+
+@app.get("/logs/filter/stats", tags=["Logs"], summary="Log store stats (Cosmos: filter cache hit ratio & RU savings)")
+async def filter_cache_stats():
+    return await log_store.stats()
+
+
+# Declared before /logs/{log_id}, otherwise "filter" is captured as a log id
+@app.get("/logs/filter", tags=["Logs"], summary="Filter logs by severity/service/region/time range")
+async def filter_logs_endpoint(level: Optional[str] = None,
+                               service: Optional[str] = None,
+                               region: Optional[str] = None,
+                               start_time: Optional[str] = Query(None, description="ISO8601 lower bound on timestamp"),
+                               end_time: Optional[str] = Query(None, description="ISO8601 upper bound on timestamp"),
+                               limit: int = Query(LOGS_PAGE_SIZE, ge=1, le=LOGS_MAX_PAGE_SIZE, description="Page size"),
+                               cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+                               stream: bool = Query(False, description="Stream every remaining match as NDJSON")):
+    # Cosmos: service + a time range is routed to just the "<service>|<day>" partitions it covers
+    _check_cursor(cursor)
+    filters = {"level": level, "service": service, "region": region, "start_time": start_time, "end_time": end_time}
+    if stream:
+        return await _stream_logs(log_store.iter_pages(limit, cursor, **filters))
+    return await log_store.page(limit, cursor, **filters)
+
+
+@app.get("/logs/{log_id}", tags=["Logs"], summary="Fetch a single log by ID")
+async def read_log(log_id: str,
+                   partition_key: Optional[str] = Query(None, description="Partition key value (enables a point read)")):
+    result = await log_store.get(log_id, partition_key)
+    if not result:
+        raise HTTPException(404, "Log not found")
+    return result
+
+
+# ---------------------------------------------------------------------
+# B) SEMANTIC SEARCH
+# ---------------------------------------------------------------------
+@app.post("/semantic-search", tags=["Semantic Search"], summary="Semantic log search using embeddings")
+async def semantic_search(request: SemanticRequest):
+    query_embedding = await query_embedder.embed(request.query)
+    return await cpu_pool.run(semantic_search_logs, request.query, request.top_k, query_embedding, request.filters())
+
+
+SEMANTIC_BATCH_MAX_QUERIES = int(os.getenv("SEMANTIC_BATCH_MAX_QUERIES", "1000"))
+SEMANTIC_BATCH_CHUNK = int(os.getenv("SEMANTIC_BATCH_CHUNK", "256"))
+
+
+async def _search_chunk(queries: List[SemanticRequest], admit: bool = True) -> List[dict]:
+    run = cpu_pool.run if admit else cpu_pool.run_always
+    embeddings = await query_embedder.embed_many([q.query for q in queries], runner=run)
+    return await run(
+        semantic_search_batch,
+        [{"query": q.query, "top_k": q.top_k, "filters": q.filters()} for q in queries],
+        embeddings,
+    )
+
+
+@app.post("/semantic-search/batch", tags=["Semantic Search"], summary="Run many semantic searches in one call")
+async def semantic_search_batch_endpoint(request: BatchSemanticRequest):
+    if not request.queries:
+        raise HTTPException(422, "queries must not be empty")
+    if len(request.queries) > SEMANTIC_BATCH_MAX_QUERIES:
+        raise HTTPException(422, f"At most {SEMANTIC_BATCH_MAX_QUERIES} queries per batch")
+
+    if not request.stream:
+        return {"results": await _search_chunk(request.queries)}
+
+    # Admission is decided before the 200 goes out; once streaming, every chunk is queued
+    cpu_pool.check_admission()
+
+    async def ndjson_lines():
+        # Large batches are encoded + scored chunk by chunk so the first lines go out early
+        for start in range(0, len(request.queries), SEMANTIC_BATCH_CHUNK):
+            for result in await _search_chunk(request.queries[start:start + SEMANTIC_BATCH_CHUNK], admit=False):
+                yield json.dumps(result, default=str) + "\n"
+
+    return StreamingResponse(ndjson_lines(), media_type="application/x-ndjson")
+
+
+@app.get("/semantic-search/stats", tags=["Semantic Search"], summary="Query embedding cache, batching & index stats")
+async def semantic_search_stats():
+    return {"query_embeddings": query_embedder.stats(), "index": index_stats(), "executor": cpu_pool.stats()}
+
+
+@app.get("/semantic-search/example-queries", tags=["Semantic Search"], summary="Useful example queries")
+async def example_queries():
+    return SAMPLE_EXAMPLE_QUERIES
+
+
+# ---------------------------------------------------------------------
+# C) SERVICE BUS INTEGRATION
+# ---------------------------------------------------------------------
+@app.post("/send-to-queue", tags=["Service Bus"], summary="Send message to a Service Bus queue")
+async def send_message(msg: QueueMessage):
+    return await send_message_to_servicebus(msg.queue, msg.content)
+
+
+@app.get("/servicebus/senders", tags=["Service Bus"], summary="Pooled sender / batching stats")
+async def sb_senders():
+    return sender_pool.stats()
+
+
+@app.get("/servicebus/health", tags=["Service Bus"], summary="Check Service Bus health")
+async def sb_health():
+    return check_servicebus_health()
+
+
+@app.get("/servicebus/queues", tags=["Service Bus"], summary="List all available queues")
+async def sb_queues():
+    return list_servicebus_queues()
+
+
+# ---------------------------------------------------------------------
+# D) ALERTS & AUTOMATION
+# ---------------------------------------------------------------------
+@app.post("/trigger-alert", tags=["Alerts"], summary="Trigger Logic App alert manually")
+async def logic_alert(alert: AlertTrigger):
+    return send_logic_app_alert(alert.message)
+
+
+@app.post("/simulate-high-error", tags=["Alerts"], summary="Simulate high error rate")
+async def simulate_error():
+    return send_logic_app_alert("ERROR_THRESHOLD_EXCEEDED")
+
+
+@app.get("/alerts/status", tags=["Alerts"], summary="Mock alert statistics")
+async def alert_status():
+    return {"alerts_triggered": 18, "today": 5}  # sample
+
+
+@app.post("/alerts/trigger", tags=["Alerts"], summary="Force trigger alert event")
+async def manual_alert(alert: AlertTrigger):
+    return {"status": "Alert sent", "message": alert.message}
+
+
+# ---------------------------------------------------------------------
+# E) DASHBOARD / OBSERVABILITY
+# ---------------------------------------------------------------------
+@app.get("/dashboard/severity-distribution", tags=["Dashboard"], summary="Pie chart severity distribution")
+async def severity_distribution(start_time: Optional[str] = Query(None, description="ISO8601 range start (default: all time)"),
+                                end_time: Optional[str] = Query(None, description="ISO8601 range end"),
+                                service: Optional[str] = None,
+                                region: Optional[str] = None,
+                                by: Literal["level", "service", "region"] = "level",
+                                exact: bool = Query(False, description="Aggregate in the log store instead of the rollups")):
+    if exact:
+        counts = await log_store.count_by(by, service=service, region=region, start_time=start_time, end_time=end_time)
+        return {"distribution": sorted(counts, key=lambda row: -row["count"])}
+    return rollups.distribution(start_time, end_time, service=service, region=region, by=by)
+
+
+@app.get("/dashboard/timeseries", tags=["Dashboard"], summary="Log counts per minute / hour bucket")
+async def dashboard_timeseries(granularity: Literal["minute", "hour"] = "minute",
+                               start_time: Optional[str] = Query(None, description="ISO8601 (default: 60 buckets ago)"),
+                               end_time: Optional[str] = Query(None, description="ISO8601 (default: now)"),
+                               level: Optional[str] = None,
+                               service: Optional[str] = None,
+                               region: Optional[str] = None,
+                               by: Literal["level", "service", "region"] = "level"):
+    try:
+        return rollups.timeseries(granularity, start_time, end_time, level, service, region, by)
+    except ValueError as ex:
+        raise HTTPException(422, str(ex))
+
+
+@app.get("/dashboard/rollups/stats", tags=["Dashboard"], summary="Rollup series / bucket counts")
+async def rollup_stats():
+    return rollups.stats()
+
+
+@app.get("/dashboard/top-critical-events", tags=["Dashboard"], summary="Most recent critical events")
+async def critical_events(k: int = Query(min(10, TOP_EVENTS_PER_SERVICE), ge=1, le=TOP_EVENTS_PER_SERVICE,
+                                         description="Number of events (at most TOP_EVENTS_PER_SERVICE are kept)"),
+                          service: Optional[str] = None,
+                          since: Optional[str] = Query(None, description="ISO8601: only events at or after this time"),
+                          level: str = Query(TOP_EVENTS_LEVELS[0], description="One of TOP_EVENTS_LEVELS")):
+    if level.upper() not in TOP_EVENTS_LEVELS:
+        raise HTTPException(422, f"level must be one of {', '.join(TOP_EVENTS_LEVELS)}")
+    return top_events.top(k, level, service, since)
+
+
+# ---------------------------------------------------------------------
+# F) ADMIN / DEVOPS
+# ---------------------------------------------------------------------
+@app.get("/health", tags=["Admin"], summary="API health check")
+async def health():
+    return {"status": "healthy", "timestamp": datetime.utcnow()}
+
+
+@app.post("/warmup", tags=["Admin"], summary="Initialise model, index, Cosmos DB and Service Bus now")
+async def warmup_dependencies(force: bool = False):
+    return await warmup.run_warmup(WARMUP_PHASES, force)
+
+
+@app.get("/change-feed/status", tags=["Admin"], summary="Change-feed consumer progress")
+async def change_feed_status():
+    return change_feed.stats()
+
+
+@app.get("/startup", tags=["Admin"], summary="Per-phase startup / warmup timings")
+async def startup_timings():
+    return warmup.startup_report()
+
+
+@app.get("/config", tags=["Admin"], summary="Safe environment configuration")
+async def config():
+    return {
+        "cosmos": log_store.name == "cosmos",
+        "log_store": log_store.name,
+        "faiss_index": True,
+        "service_bus": True,
+        "logic_app": True,
+        "env_variables_loaded": True,
+    }
+
+
+@app.get("/version", tags=["Admin"], summary="API version")
+async def version():
+    return {"version": "1.0.0", "build": "2025.1111"}
+
+
+@app.get("/status", tags=["Admin"], summary="Systemwide health")
+async def status():
+    return {
+        "CosmosDB": warmup.phase_status("log_store") if log_store.name == "cosmos" else "disabled",
+        "LogStore": {"backend": log_store.name, "status": warmup.phase_status("log_store")},
+        "FAISS": warmup.phase_status("vector_index"),
+        "EmbeddingModel": warmup.phase_status("embedding_model"),
+        "ServiceBus": check_servicebus_health(),
+        "LogicApp": "Reachable",
+    }
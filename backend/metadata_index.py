@@ -0,0 +1,114 @@
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Optional, Set
+import numpy as np
+
+# Metadata fields with exact-match posting lists
+FILTER_FIELDS = ("level", "service", "region")
+
+
+def parse_timestamp(value) -> Optional[float]:
+    """
+    ISO8601 (with 'T' or space, optional 'Z') -> epoch seconds, or None if unparseable.
+    """
+    if value is None or value == "":
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, datetime):
+        return value.timestamp()
+    try:
+        return datetime.fromisoformat(str(value).replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        return None
+
+
+def _normalize(field: str, value) -> str:
+    value = str(value)
+    return value.upper() if field == "level" else value
+
+
+def matches(record: dict, level: Optional[str] = None, service: Optional[str] = None,
+            region: Optional[str] = None, start_time=None, end_time=None) -> bool:
+    """
+    Same filter semantics as MetadataIndex.candidates(), for a single record.
+    """
+    for field, value in (("level", level), ("service", service), ("region", region)):
+        if value and _normalize(field, record.get(field, "")) != _normalize(field, value):
+            return False
+
+    start, end = parse_timestamp(start_time), parse_timestamp(end_time)
+    if start is not None or end is not None:
+        ts = parse_timestamp(record.get("timestamp"))
+        if ts is None or (start is not None and ts < start) or (end is not None and ts > end):
+            return False
+    return True
+
+
+class MetadataIndex:
+    """
+    In-memory posting lists over vector-store rows:
+    field -> value -> set of row ids, plus the earliest / latest timestamp
+    of each row for time-range lookups. Used to narrow the candidate rows
+    before any similarity scoring happens.
+
+    A row is a template that many logs add to, so the time index keeps one
+    (min, max) pair per row, updated in O(1) per log. A time range selects
+    the rows whose span overlaps it; which members fall inside is checked
+    later with matches().
+    """
+
+    def __init__(self):
+        self.postings: Dict[str, Dict[str, Set[int]]] = {f: defaultdict(set) for f in FILTER_FIELDS}
+        # Indexed by row; rows without a timestamp keep (inf, -inf) and never match a range
+        self._low = np.full(0, np.inf)
+        self._high = np.full(0, -np.inf)
+
+    def _grow(self, row: int):
+        size = max(row + 1, 2 * len(self._low), 1024)
+        self._low = np.concatenate([self._low, np.full(size - len(self._low), np.inf)])
+        self._high = np.concatenate([self._high, np.full(size - len(self._high), -np.inf)])
+
+    def add(self, row: int, record: dict):
+        for field in FILTER_FIELDS:
+            if record.get(field):
+                self.postings[field][_normalize(field, record[field])].add(row)
+
+        ts = parse_timestamp(record.get("timestamp"))
+        if ts is not None:
+            if row >= len(self._low):
+                self._grow(row)
+            self._low[row] = min(self._low[row], ts)
+            self._high[row] = max(self._high[row], ts)
+
+    def candidates(self, level: Optional[str] = None, service: Optional[str] = None,
+                   region: Optional[str] = None, start_time=None, end_time=None) -> Optional[np.ndarray]:
+        """
+        Returns the sorted row ids matching every given filter, or None when no filter is set.
+        """
+        sets = []
+        for field, value in (("level", level), ("service", service), ("region", region)):
+            if value:
+                sets.append(self.postings[field].get(_normalize(field, value), set()))
+
+        start, end = parse_timestamp(start_time), parse_timestamp(end_time)
+        if start is not None or end is not None:
+            overlaps = self._low <= (np.inf if end is None else end)
+            overlaps &= self._high >= (-np.inf if start is None else start)
+            sets.append(set(np.flatnonzero(overlaps).tolist()))
+
+        if not sets:
+            return None
+
+        # Intersect smallest-first so the work is bounded by the most selective filter
+        sets.sort(key=len)
+        rows = set(sets[0])
+        for other in sets[1:]:
+            rows &= other
+            if not rows:
+                break
+        return np.array(sorted(rows), dtype="int64")
+
+    def stats(self) -> dict:
+        return {field: {value: len(rows) for value, rows in values.items()}
+                for field, values in self.postings.items()}
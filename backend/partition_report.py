@@ -0,0 +1,101 @@
+"""
+RU / latency report: fan-out vs. partition-routed filter queries.
+
+Runs the same service + time-range filters against the Cosmos container
+twice: once as a plain cross-partition query (the old behaviour) and once
+routed to the "<service>|<day>" partitions the range covers:
+
+    python partition_report.py --service payments --service auth --days 1,7
+    python partition_report.py --service payments --end 2025-11-11 --json partition_report.json
+
+Needs COSMOS_URI / COSMOS_KEY / COSMOS_DB / COSMOS_CONTAINER and a
+container partitioned on /pk.
+"""
+import argparse
+import asyncio
+import json
+import time
+from datetime import datetime, timedelta, timezone
+import numpy as np
+import partitioning
+from cosmos_query import open_cosmos, close_cosmos
+from query_cache import RequestCharge, build_filter_query
+
+
+async def measure(container, query: str, kwargs: dict) -> dict:
+    charge = RequestCharge()
+    start = time.perf_counter()
+    items = [item async for item in container.query_items(query, response_hook=charge, **kwargs)]
+    return {"items": len(items), "ru": charge.total, "seconds": time.perf_counter() - start}
+
+
+def summarize(runs: list) -> dict:
+    latencies = [run["seconds"] for run in runs]
+    return {
+        "items": runs[-1]["items"],
+        "ru_avg": round(sum(run["ru"] for run in runs) / len(runs), 2),
+        "latency_p50_ms": round(float(np.percentile(latencies, 50)) * 1000, 2),
+        "latency_p95_ms": round(float(np.percentile(latencies, 95)) * 1000, 2),
+    }
+
+
+async def compare(container, service: str, start: datetime, end: datetime, repeat: int) -> dict:
+    start_time, end_time = start.isoformat(), end.isoformat()
+    partitions = partitioning.route(service, start_time, end_time)
+
+    fanout_query, fanout_params = build_filter_query(service=service, start_time=start_time, end_time=end_time)
+    routed_query, routed_params = build_filter_query(service=service, start_time=start_time, end_time=end_time,
+                                                     partitions=partitions)
+    routed_kwargs = {"parameters": routed_params}
+    if partitions and len(partitions) == 1:
+        routed_kwargs["partition_key"] = partitions[0]
+
+    fanout, routed = [], []
+    for _ in range(repeat):
+        fanout.append(await measure(container, fanout_query, {"parameters": fanout_params}))
+        routed.append(await measure(container, routed_query, routed_kwargs))
+
+    before, after = summarize(fanout), summarize(routed)
+    return {
+        "service": service,
+        "start_time": start_time,
+        "end_time": end_time,
+        "partitions": len(partitions or []),
+        "fanout": before,
+        "routed": after,
+        "ru_saved_pct": round(100 * (1 - after["ru_avg"] / before["ru_avg"]), 1) if before["ru_avg"] else 0.0,
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Compare fan-out vs routed filter queries (RU, latency)")
+    parser.add_argument("--service", action="append", required=True, help="service to query (repeatable)")
+    parser.add_argument("--days", default="1,7", help="comma-separated range lengths in days")
+    parser.add_argument("--end", help="range end (ISO8601, default now)")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", help="write results to this JSON file")
+    args = parser.parse_args()
+
+    end = datetime.fromisoformat(args.end).replace(tzinfo=timezone.utc) if args.end else datetime.now(timezone.utc)
+    container = await open_cosmos()
+    results = []
+    try:
+        for service in args.service:
+            for days in (int(d) for d in args.days.split(",")):
+                result = await compare(container, service, end - timedelta(days=days), end, args.repeat)
+                results.append(result)
+                print(f"{service:>16} {days:>3}d  {result['partitions']:>3} pk  "
+                      f"RU {result['fanout']['ru_avg']:>8} -> {result['routed']['ru_avg']:<8} "
+                      f"p50 {result['fanout']['latency_p50_ms']:>8} -> {result['routed']['latency_p50_ms']:<8} ms  "
+                      f"({result['ru_saved_pct']}% RU saved)")
+    finally:
+        await close_cosmos()
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"results": results}, f, indent=4)
+        print(f" Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,57 @@
+import os
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+
+# ---------------------------------------------------
+# Synthetic partition key: "<service>|<YYYY-MM-DD>"
+# ---------------------------------------------------
+# Stored in the "pk" field (container path /pk). Spreading one service's
+# writes over a new logical partition per UTC day keeps any partition from
+# growing without bound, and a filter on service + time range maps to a
+# known, small set of partitions instead of a fan-out over all of them.
+# The same formula is used by the Functions (function_app/partitioning.py).
+PARTITION_KEY_FIELD = "pk"
+# Above this many days a routed query is no cheaper than a plain fan-out
+ROUTER_MAX_PARTITIONS = int(os.getenv("ROUTER_MAX_PARTITIONS", "31"))
+
+
+def _utc(value) -> Optional[datetime]:
+    """
+    ISO8601 -> aware UTC datetime; naive timestamps are taken as UTC.
+    """
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return parsed.replace(tzinfo=timezone.utc) if parsed.tzinfo is None else parsed.astimezone(timezone.utc)
+
+
+def day_bucket(timestamp) -> str:
+    moment = _utc(timestamp) or datetime.now(timezone.utc)
+    return moment.strftime("%Y-%m-%d")
+
+
+def partition_key_for(log: dict) -> str:
+    return f"{log.get('service') or 'UnknownService'}|{day_bucket(log.get('timestamp'))}"
+
+
+def assign_partition_key(log: dict) -> dict:
+    log[PARTITION_KEY_FIELD] = partition_key_for(log)
+    return log
+
+
+def route(service: Optional[str] = None, start_time=None, end_time=None) -> Optional[List[str]]:
+    """
+    The partition keys a service + time-range filter can touch, or None when
+    the filter does not bound them (the query then fans out as before).
+    """
+    start, end = _utc(start_time), _utc(end_time)
+    if not service or start is None:
+        return None
+    end = end or datetime.now(timezone.utc)
+    days = (end.date() - start.date()).days + 1
+    if days < 1 or days > ROUTER_MAX_PARTITIONS:
+        return None
+    return [f"{service}|{(start.date() + timedelta(days=n)).isoformat()}" for n in range(days)]
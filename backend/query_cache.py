@@ -0,0 +1,164 @@
+import itertools
+import os
+import time
+from collections import OrderedDict, defaultdict
+from typing import Iterable, List, Optional
+from metadata_index import parse_timestamp
+
+# ---------------------------------------------------
+# Filter query builder + TTL result cache
+# ---------------------------------------------------
+# Query text only depends on *which* filters are set, so Cosmos reuses one
+# plan per shape; values travel as @parameters. Results are cached per
+# normalized filters + page and dropped when a matching log is inserted
+# through this API. Logs written elsewhere (e.g. the Functions) only show
+# up after the TTL, so keep it short. Entries are indexed by their
+# level/service/region filter values, so invalidation is a handful of
+# lookups instead of a scan, and a bulk write invalidates once.
+QUERY_CACHE_TTL_SECONDS = float(os.getenv("QUERY_CACHE_TTL_SECONDS", "30"))
+QUERY_CACHE_MAX_ENTRIES = int(os.getenv("QUERY_CACHE_MAX_ENTRIES", "512"))
+
+FILTER_FIELDS = ("level", "service", "region")
+
+
+def normalize_filters(level: Optional[str] = None, service: Optional[str] = None,
+                      region: Optional[str] = None, start_time: Optional[str] = None,
+                      end_time: Optional[str] = None) -> tuple:
+    return (level.upper() if level else None, service or None, region or None, start_time or None, end_time or None)
+
+
+def build_filter_query(level: Optional[str] = None, service: Optional[str] = None,
+                       region: Optional[str] = None, start_time: Optional[str] = None,
+                       end_time: Optional[str] = None, partitions: Optional[List[str]] = None):
+    """
+    Returns (query, parameters) with one @param per filter that is set.
+    `partitions` (from partitioning.route) restricts the query to those pk values.
+    """
+    level, service, region, start_time, end_time = normalize_filters(level, service, region, start_time, end_time)
+    clauses, parameters = [], []
+    for field, value in zip(FILTER_FIELDS, (level, service, region)):
+        if value is not None:
+            clauses.append(f"c.{field} = @{field}")
+            parameters.append({"name": f"@{field}", "value": value})
+    if start_time is not None:
+        clauses.append("c.timestamp >= @start_time")
+        parameters.append({"name": "@start_time", "value": start_time})
+    if end_time is not None:
+        clauses.append("c.timestamp <= @end_time")
+        parameters.append({"name": "@end_time", "value": end_time})
+    if partitions:
+        names = [f"@pk{n}" for n in range(len(partitions))]
+        clauses.append(f"c.pk IN ({', '.join(names)})")
+        parameters.extend({"name": name, "value": value} for name, value in zip(names, partitions))
+
+    query = "SELECT * FROM c"
+    if clauses:
+        query += " WHERE " + " AND ".join(clauses)
+    return query, parameters
+
+
+class RequestCharge:
+    """
+    response_hook for query_items: sums x-ms-request-charge over every page request.
+    """
+
+    def __init__(self):
+        self.total = 0.0
+
+    def __call__(self, headers, *_):
+        self.total += float(headers.get("x-ms-request-charge") or 0)
+
+
+class QueryResultCache:
+    def __init__(self, ttl: float = QUERY_CACHE_TTL_SECONDS, max_entries: int = QUERY_CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        # key -> (expires_at, (level, service, region), (start, end) epoch bounds, result, request charge)
+        self._entries = OrderedDict()
+        # (level, service, region) filter values, None = not filtered -> keys
+        self._by_filters = defaultdict(set)
+
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.ru_spent = 0.0
+        self.ru_saved = 0.0
+
+    def _drop(self, key):
+        entry = self._entries.pop(key)
+        keys = self._by_filters[entry[1]]
+        keys.discard(key)
+        if not keys:
+            del self._by_filters[entry[1]]
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                self._drop(key)
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        self.ru_saved += entry[4]
+        return entry[3]
+
+    def put(self, key, filters: tuple, result, charge: float = 0.0):
+        self.ru_spent += charge
+        if key in self._entries:
+            self._drop(key)
+        values = tuple(filters[:3])
+        # Time bounds are parsed once here, not on every invalidation
+        bounds = (parse_timestamp(filters[3]), parse_timestamp(filters[4]))
+        self._entries[key] = (time.monotonic() + self.ttl, values, bounds, result, charge)
+        self._by_filters[values].add(key)
+        while len(self._entries) > self.max_entries:
+            self._drop(next(iter(self._entries)))
+
+    def invalidate(self, log: dict):
+        self.invalidate_many([log])
+
+    def invalidate_many(self, logs: Iterable[dict]):
+        """
+        Drops every cached result whose filters one of the new logs matches.
+        """
+        # (level, service, region) -> (earliest, latest) timestamp; None = unknown
+        spans = {}
+        for log in logs:
+            values = normalize_filters(log.get("level"), log.get("service"), log.get("region"))[:3]
+            ts = parse_timestamp(log.get("timestamp"))
+            if values not in spans:
+                spans[values] = (ts, ts)
+            else:
+                low, high = spans[values]
+                if ts is None or low is None:
+                    spans[values] = (None, None)
+                else:
+                    spans[values] = (min(low, ts), max(high, ts))
+
+        stale = set()
+        for values, (low, high) in spans.items():
+            # A cached filter matches when each of its fields is unset or equal
+            for shape in itertools.product(*((None, v) if v is not None else (None,) for v in values)):
+                for key in self._by_filters.get(shape, ()):
+                    start, end = self._entries[key][2]
+                    if low is not None and ((end is not None and low > end) or (start is not None and high < start)):
+                        continue
+                    stale.add(key)
+        for key in stale:
+            self._drop(key)
+        self.invalidations += len(stale)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "invalidations": self.invalidations,
+            "ru_spent": round(self.ru_spent, 2),
+            "ru_saved": round(self.ru_saved, 2),
+        }
@@ -0,0 +1,182 @@
+import asyncio
+import os
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, List, Optional
+import numpy as np
+
+# ---------------------------------------------------
+# Micro-batching / cache settings
+# ---------------------------------------------------
+BATCH_WINDOW_MS = float(os.getenv("QUERY_BATCH_WINDOW_MS", "5"))
+BATCH_MAX_SIZE = int(os.getenv("QUERY_BATCH_MAX_SIZE", "32"))
+CACHE_SIZE = int(os.getenv("QUERY_CACHE_SIZE", "1024"))
+
+
+async def _run_in_default_executor(fn, *args):
+    return await asyncio.get_running_loop().run_in_executor(None, fn, *args)
+
+
+class QueryEmbedder:
+    """
+    Coalesces concurrent query encodes into one batched model call and keeps
+    a bounded LRU cache of query vectors.
+
+    Queries that arrive within BATCH_WINDOW_MS of each other (up to
+    BATCH_MAX_SIZE) share a single encode call.
+    """
+
+    def __init__(self, encode_fn: Callable[[List[str]], np.ndarray],
+                 window_ms: float = BATCH_WINDOW_MS,
+                 max_batch: int = BATCH_MAX_SIZE,
+                 cache_size: int = CACHE_SIZE,
+                 runner: Optional[Callable[..., Awaitable]] = None):
+        self.encode_fn = encode_fn
+        # Runs encode_fn off the event loop; defaults to the loop's executor
+        self.runner = runner or _run_in_default_executor
+        self.window = window_ms / 1000.0
+        self.max_batch = max_batch
+        self.cache_size = cache_size
+
+        self._cache: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._pending: Dict[str, asyncio.Future] = {}
+        # Flushed but not yet encoded; identical queries still join these
+        self._in_flight: Dict[str, asyncio.Future] = {}
+        self._flush_handle = None
+        self._tasks = set()
+
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.batches = 0
+        self.batched_queries = 0
+
+    # ---------------------------------------------------
+    # Cache
+    # ---------------------------------------------------
+    def _cache_get(self, key: str):
+        vector = self._cache.get(key)
+        if vector is not None:
+            self._cache.move_to_end(key)
+        return vector
+
+    def _cache_put(self, key: str, vector: np.ndarray):
+        vector.setflags(write=False)
+        self._cache[key] = vector
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    # ---------------------------------------------------
+    # Batching
+    # ---------------------------------------------------
+    async def embed(self, query: str) -> np.ndarray:
+        """
+        Returns the (1, dim) float32 embedding for one query.
+        """
+        key = query.strip()
+        cached = self._cache_get(key)
+        if cached is not None:
+            self.hits += 1
+            return cached
+
+        # Identical queries already waiting (or being encoded) share the same future
+        future = self._pending.get(key) or self._in_flight.get(key)
+        if future is not None:
+            self.coalesced += 1
+        else:
+            self.misses += 1
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            self._pending[key] = future
+
+            if len(self._pending) >= self.max_batch:
+                self._flush(loop)
+            elif self._flush_handle is None:
+                self._flush_handle = loop.call_later(self.window, self._flush, loop)
+
+        # Shielded: one caller going away must not cancel the result the others wait for
+        return await asyncio.shield(future)
+
+    async def embed_many(self, queries: List[str], runner: Optional[Callable[..., Awaitable]] = None) -> np.ndarray:
+        """
+        Returns a (len(queries), dim) matrix. Cache misses are encoded together
+        in a single model call, without waiting for the batching window.
+        """
+        keys = [q.strip() for q in queries]
+        vectors = {}
+        missing = []
+        for key in keys:
+            if key in vectors:
+                continue
+            cached = self._cache_get(key)
+            if cached is not None:
+                self.hits += 1
+                vectors[key] = cached
+            else:
+                self.misses += 1
+                vectors[key] = None
+                missing.append(key)
+
+        if missing:
+            self.batches += 1
+            self.batched_queries += len(missing)
+            encoded = await (runner or self.runner)(self.encode_fn, missing)
+            for i, key in enumerate(missing):
+                vector = np.ascontiguousarray(encoded[i:i + 1])
+                self._cache_put(key, vector)
+                vectors[key] = vector
+
+        return np.vstack([vectors[key] for key in keys])
+
+    def _flush(self, loop):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        batch, self._pending = self._pending, {}
+        self._in_flight.update(batch)
+        if batch:
+            # Keep a reference so the task isn't garbage collected mid-encode
+            task = loop.create_task(self._encode_batch(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _encode_batch(self, batch: Dict[str, asyncio.Future]):
+        texts = list(batch)
+        self.batches += 1
+        self.batched_queries += len(texts)
+
+        try:
+            vectors = await self.runner(self.encode_fn, texts)
+        except Exception as ex:
+            for future in batch.values():
+                if not future.done():
+                    future.set_exception(ex)
+            return
+        finally:
+            for text, future in batch.items():
+                if self._in_flight.get(text) is future:
+                    del self._in_flight[text]
+
+        for i, text in enumerate(texts):
+            vector = np.ascontiguousarray(vectors[i:i + 1])
+            self._cache_put(text, vector)
+            if not batch[text].done():
+                batch[text].set_result(vector)
+
+    # ---------------------------------------------------
+    # Stats
+    # ---------------------------------------------------
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "cache_hits": self.hits,
+            "cache_misses": self.misses,
+            "coalesced_duplicates": self.coalesced,
+            "cache_hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "cache_size": len(self._cache),
+            "cache_capacity": self.cache_size,
+            "batches": self.batches,
+            "avg_batch_size": round(self.batched_queries / self.batches, 2) if self.batches else 0.0,
+            "pending": len(self._pending) + len(self._in_flight),
+        }
@@ -0,0 +1,230 @@
+import json
+import os
+import threading
+import time
+from collections import Counter, defaultdict
+from typing import Dict, Optional, Tuple
+from metadata_index import parse_timestamp
+
+# ---------------------------------------------------
+# Dashboard rollups
+# ---------------------------------------------------
+# Log counts per (level, service, region), bucketed by minute and by hour
+# and updated as logs are stored. Dashboard reads cost O(buckets in range)
+# instead of a cross-partition GROUP BY over the whole container. A JSON
+# snapshot is written every ROLLUP_PERSIST_SECONDS so a restart recovers
+# everything up to the last snapshot.
+ROLLUP_FILE = os.getenv("ROLLUP_FILE", "rollups.json")
+ROLLUP_PERSIST_SECONDS = float(os.getenv("ROLLUP_PERSIST_SECONDS", "30"))
+# Minute buckets older than this are dropped (hour buckets are kept)
+ROLLUP_MINUTE_RETENTION_HOURS = int(os.getenv("ROLLUP_MINUTE_RETENTION_HOURS", "48"))
+# Upper bound on points returned by one timeseries request
+ROLLUP_MAX_POINTS = int(os.getenv("ROLLUP_MAX_POINTS", "2000"))
+
+GRANULARITIES = {"minute": 60, "hour": 3600}
+DIMENSIONS = ("level", "service", "region")
+
+Key = Tuple[str, str, str]
+
+
+def _key(log: dict) -> Key:
+    return (
+        str(log.get("level") or "UNKNOWN").upper(),
+        str(log.get("service") or "UnknownService"),
+        str(log.get("region") or "UnknownRegion"),
+    )
+
+
+def _matches(key: Key, level: Optional[str], service: Optional[str], region: Optional[str]) -> bool:
+    return ((not level or key[0] == level.upper())
+            and (not service or key[1] == service)
+            and (not region or key[2] == region))
+
+
+class Rollups:
+    def __init__(self, path: str = ROLLUP_FILE):
+        self.path = path
+        # granularity -> bucket start (epoch s) -> Counter[(level, service, region)]
+        self.buckets: Dict[str, Dict[int, Counter]] = {g: defaultdict(Counter) for g in GRANULARITIES}
+        self.totals: Counter = Counter()
+        self._lock = threading.Lock()
+        self._dirty = False
+        self.loaded = False
+        self._stop = threading.Event()
+        self._thread = None
+
+    # ---------------------------------------------------
+    # Updates
+    # ---------------------------------------------------
+    def add(self, log: dict, count: int = 1):
+        ts = parse_timestamp(log.get("timestamp"))
+        ts = time.time() if ts is None else ts
+        key = _key(log)
+
+        with self._lock:
+            for granularity, width in GRANULARITIES.items():
+                self.buckets[granularity][int(ts // width * width)][key] += count
+            self.totals[key] += count
+            self._dirty = True
+
+    def _expire_minutes(self):
+        cutoff = time.time() - ROLLUP_MINUTE_RETENTION_HOURS * 3600
+        minutes = self.buckets["minute"]
+        for bucket in [b for b in minutes if b < cutoff]:
+            del minutes[bucket]
+
+    # ---------------------------------------------------
+    # Reads
+    # ---------------------------------------------------
+    def _range(self, granularity: str, start_time, end_time) -> Tuple[int, int]:
+        width = GRANULARITIES[granularity]
+        end = parse_timestamp(end_time)
+        end = time.time() if end is None else end
+        start = parse_timestamp(start_time)
+        if start is None:
+            # Default window: the last 60 buckets
+            start = end - 60 * width
+        return int(start // width * width), int(end // width * width)
+
+    def _counters(self, granularity: str, lo: int, hi: int) -> list:
+        # Walk whichever is smaller: the buckets in range or the buckets stored
+        width = GRANULARITIES[granularity]
+        buckets = self.buckets[granularity]
+        if (hi - lo) // width < len(buckets):
+            return [buckets[b] for b in range(lo, hi + 1, width) if b in buckets]
+        return [counter for b, counter in buckets.items() if lo <= b <= hi]
+
+    def distribution(self, start_time=None, end_time=None, level: Optional[str] = None,
+                     service: Optional[str] = None, region: Optional[str] = None, by: str = "level") -> dict:
+        """
+        Counts grouped by one dimension over a time range (all time when no range is given).
+        Ranges reaching past the minute retention are rounded out to whole hours.
+        """
+        position = DIMENSIONS.index(by)
+        result = Counter()
+
+        with self._lock:
+            if start_time is None and end_time is None:
+                counters = [self.totals]
+            else:
+                start = parse_timestamp(start_time) or 0.0
+                recent = start >= time.time() - ROLLUP_MINUTE_RETENTION_HOURS * 3600
+                granularity = "minute" if recent else "hour"
+                counters = self._counters(granularity, *self._range(granularity, start, end_time))
+
+            for counter in counters:
+                for key, count in counter.items():
+                    if _matches(key, level, service, region):
+                        result[key[position]] += count
+
+        return {"distribution": [{by: value, "count": count} for value, count in result.most_common()]}
+
+    def timeseries(self, granularity: str = "minute", start_time=None, end_time=None,
+                   level: Optional[str] = None, service: Optional[str] = None,
+                   region: Optional[str] = None, by: str = "level") -> dict:
+        """
+        One point per bucket in [start_time, end_time], counts split by one dimension.
+        """
+        position = DIMENSIONS.index(by)
+        width = GRANULARITIES[granularity]
+        lo, hi = self._range(granularity, start_time, end_time)
+        if (hi - lo) // width >= ROLLUP_MAX_POINTS:
+            raise ValueError(f"Range spans more than {ROLLUP_MAX_POINTS} {granularity} buckets")
+
+        points = []
+        with self._lock:
+            buckets = self.buckets[granularity]
+            for bucket in range(lo, hi + 1, width):
+                counts = Counter()
+                for key, count in buckets.get(bucket, {}).items():
+                    if _matches(key, level, service, region):
+                        counts[key[position]] += count
+                points.append({"bucket": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(bucket)),
+                               "total": sum(counts.values()), "counts": dict(counts)})
+
+        return {"granularity": granularity, "by": by, "points": points}
+
+    # ---------------------------------------------------
+    # Persistence
+    # ---------------------------------------------------
+    def _snapshot(self) -> dict:
+        return {
+            "saved_at": time.time(),
+            "totals": [[*key, count] for key, count in self.totals.items()],
+            "buckets": {
+                granularity: {str(bucket): [[*key, count] for key, count in counter.items()]
+                              for bucket, counter in buckets.items()}
+                for granularity, buckets in self.buckets.items()
+            },
+        }
+
+    def save(self):
+        with self._lock:
+            if not self._dirty:
+                return
+            self._expire_minutes()
+            snapshot = self._snapshot()
+            self._dirty = False
+
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(snapshot, f)
+        os.replace(tmp, self.path)
+
+    def load(self) -> bool:
+        """
+        Adds the last snapshot to the live counters (logs ingested since
+        startup are kept). Returns False when there is no snapshot.
+        """
+        if self.loaded:
+            return True
+        if not os.path.exists(self.path):
+            return False
+        with open(self.path, "r") as f:
+            snapshot = json.load(f)
+
+        with self._lock:
+            for row in snapshot.get("totals", []):
+                self.totals[tuple(row[:3])] += row[3]
+            for granularity in GRANULARITIES:
+                for bucket, rows in snapshot.get("buckets", {}).get(granularity, {}).items():
+                    counter = self.buckets[granularity][int(bucket)]
+                    for row in rows:
+                        counter[tuple(row[:3])] += row[3]
+            self.loaded = True
+        print(f"🔹 Loaded rollups: {sum(self.totals.values())} logs")
+        return True
+
+    def start_background_persist(self, interval: float = ROLLUP_PERSIST_SECONDS):
+        if self._thread is not None:
+            return
+
+        def loop():
+            while not self._stop.wait(interval):
+                try:
+                    self.save()
+                except Exception as ex:
+                    print(f"⚠ Rollup snapshot failed: {ex}")
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=loop, name="rollup-persist", daemon=True)
+        self._thread.start()
+
+    def close(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.save()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "logs": sum(self.totals.values()),
+                "series": len(self.totals),
+                "minute_buckets": len(self.buckets["minute"]),
+                "hour_buckets": len(self.buckets["hour"]),
+            }
+
+
+rollups = Rollups()
@@ -0,0 +1,101 @@
+"""
+Sends/sec report: per-message connections vs. the pooled, batching senders.
+
+Sends the same messages to one queue three ways and prints sends/sec:
+
+    client-per-message  new ServiceBusClient + sender per message (old IntelligentLogInsightsAPI)
+    sender-per-message  shared client, sender opened / closed per message (old backend)
+    pooled              SenderPool: one long-lived sender, size-aware batches
+
+    python servicebus_bench.py --queue critical-alerts-queue --messages 200
+    python servicebus_bench.py --queue critical-alerts-queue --messages 2000 --skip-slow --json sb_bench.json
+
+Needs SERVICE_BUS_CONNECTION_STRING and an existing queue (messages are
+really sent; drain the queue afterwards).
+"""
+import argparse
+import json
+import time
+from concurrent.futures import wait
+from azure.servicebus import ServiceBusClient, ServiceBusMessage
+from servicebus_client import SERVICE_BUS_CONNECTION_STRING
+from servicebus_pool import SenderPool
+
+
+def make_messages(count: int, size: int):
+    body = "x" * size
+    return [ServiceBusMessage(json.dumps({"seq": n, "body": body})) for n in range(count)]
+
+
+def client_per_message(queue: str, messages) -> None:
+    for message in messages:
+        with ServiceBusClient.from_connection_string(SERVICE_BUS_CONNECTION_STRING) as client:
+            with client.get_queue_sender(queue) as sender:
+                sender.send_messages(message)
+
+
+def sender_per_message(queue: str, messages) -> None:
+    with ServiceBusClient.from_connection_string(SERVICE_BUS_CONNECTION_STRING) as client:
+        for message in messages:
+            with client.get_queue_sender(queue) as sender:
+                sender.send_messages(message)
+
+
+def pooled(queue: str, messages, max_messages: int, max_latency_ms: float) -> dict:
+    with ServiceBusClient.from_connection_string(SERVICE_BUS_CONNECTION_STRING) as client:
+        pool = SenderPool(lambda: client, max_messages=max_messages, max_latency_ms=max_latency_ms)
+        pool.open([queue])
+        try:
+            futures = [pool.submit(queue, message) for message in messages]
+            wait(futures)
+            for future in futures:
+                future.result()
+            return pool.stats()["queues"][0]
+        finally:
+            pool.close()
+
+
+def timed(fn, *args) -> dict:
+    start = time.perf_counter()
+    extra = fn(*args)
+    seconds = time.perf_counter() - start
+    count = len(args[1])
+    result = {"messages": count, "seconds": round(seconds, 3), "sends_per_sec": round(count / seconds, 1)}
+    if extra:
+        result["avg_batch_size"] = extra["avg_batch_size"]
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Service Bus sends/sec: per-message connections vs pooled senders")
+    parser.add_argument("--queue", required=True)
+    parser.add_argument("--messages", type=int, default=200)
+    parser.add_argument("--size", type=int, default=512, help="approximate message body size in bytes")
+    parser.add_argument("--batch-messages", type=int, default=100)
+    parser.add_argument("--batch-latency-ms", type=float, default=20)
+    parser.add_argument("--skip-slow", action="store_true", help="only run the pooled mode")
+    parser.add_argument("--json", help="write results to this JSON file")
+    args = parser.parse_args()
+
+    if not SERVICE_BUS_CONNECTION_STRING:
+        raise SystemExit("❌ Missing SERVICE_BUS_CONNECTION_STRING in .env")
+
+    results = {}
+    if not args.skip_slow:
+        results["client_per_message"] = timed(client_per_message, args.queue, make_messages(args.messages, args.size))
+        results["sender_per_message"] = timed(sender_per_message, args.queue, make_messages(args.messages, args.size))
+    results["pooled"] = timed(pooled, args.queue, make_messages(args.messages, args.size),
+                              args.batch_messages, args.batch_latency_ms)
+
+    for mode, result in results.items():
+        print(f"{mode:>20}  {result['messages']:>6} msgs  {result['seconds']:>8}s  "
+              f"{result['sends_per_sec']:>9} sends/s")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"queue": args.queue, "results": results}, f, indent=4)
+        print(f" Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
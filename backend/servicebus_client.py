@@ -1,57 +1,93 @@
-import os
-from dotenv import load_dotenv
-from azure.servicebus import ServiceBusClient, ServiceBusMessage
-
-load_dotenv()
-
-SERVICE_BUS_CONNECTION_STRING = os.getenv("SERVICE_BUS_CONNECTION_STRING")
-SERVICE_BUS_NAMESPACE = os.getenv("SERVICE_BUS_NAMESPACE")
-
-if not SERVICE_BUS_CONNECTION_STRING:
-    raise ValueError("❌ Missing SERVICE_BUS_CONNECTION_STRING in .env")
-
-# ---------------------------------------------------
-# Initialize Service Bus Client
-# ---------------------------------------------------
-sb_client = ServiceBusClient.from_connection_string(
-    conn_str=SERVICE_BUS_CONNECTION_STRING,
-    logging_enable=True
-)
-
-# ---------------------------------------------------
-# Send Message to Queue
-# ---------------------------------------------------
-def send_message_to_servicebus(queue_name: str, content: dict):
-    try:
-        sender = sb_client.get_queue_sender(queue_name)
-        with sender:
-            msg = ServiceBusMessage(str(content))
-            sender.send_messages(msg)
-        return {"status": "sent", "queue": queue_name, "content": content}
-
-    except Exception as e:
-        return {"error": str(e)}
-
-
-# ---------------------------------------------------
-# List Queues in Namespace
-# ---------------------------------------------------
-def list_servicebus_queues():
-    try:
-        admin = sb_client._connection.get_servicebus_management_client()
-        queues = admin.list_queues()
-        return {"queues": [q.name for q in queues]}
-    except Exception as e:
-        return {"error": str(e)}
-
-
-# ---------------------------------------------------
-# Check Namespace Health
-# ---------------------------------------------------
-def check_servicebus_health():
-    try:
-        admin = sb_client._connection.get_servicebus_management_client()
-        list(admin.list_queues())
-        return {"service_bus": "healthy", "namespace": SERVICE_BUS_NAMESPACE}
-    except Exception as e:
-        return {"service_bus": "unhealthy", "error": str(e)}
+import asyncio
+import os
+import threading
+from dotenv import load_dotenv
+from azure.servicebus import ServiceBusClient, ServiceBusMessage
+from servicebus_pool import SenderPool
+
+load_dotenv()
+
+SERVICE_BUS_CONNECTION_STRING = os.getenv("SERVICE_BUS_CONNECTION_STRING")
+SERVICE_BUS_NAMESPACE = os.getenv("SERVICE_BUS_NAMESPACE")
+# Queues whose senders are opened at startup; when set, the only queues
+# /send-to-queue accepts (otherwise any queue, senders connect on first send)
+SERVICE_BUS_QUEUES = [q.strip() for q in os.getenv("SERVICE_BUS_QUEUES", "").split(",") if q.strip()]
+
+# ---------------------------------------------------
+# Initialize Service Bus Client (lazy, on first use)
+# ---------------------------------------------------
+_sb_client = None
+_sb_client_lock = threading.Lock()
+
+
+def get_sb_client():
+    global _sb_client
+
+    with _sb_client_lock:
+        if _sb_client is None:
+            if not SERVICE_BUS_CONNECTION_STRING:
+                raise ValueError("❌ Missing SERVICE_BUS_CONNECTION_STRING in .env")
+            _sb_client = ServiceBusClient.from_connection_string(
+                conn_str=SERVICE_BUS_CONNECTION_STRING,
+                logging_enable=True
+            )
+        return _sb_client
+
+# ---------------------------------------------------
+# Long-lived, batching senders (one per queue)
+# ---------------------------------------------------
+sender_pool = SenderPool(get_sb_client, queues=SERVICE_BUS_QUEUES)
+
+
+def open_servicebus():
+    """
+    Startup: creates the client and connects the SERVICE_BUS_QUEUES senders.
+    """
+    sender_pool.open(SERVICE_BUS_QUEUES)
+    return get_sb_client()
+
+
+def close_servicebus():
+    global _sb_client
+    sender_pool.close()
+    with _sb_client_lock:
+        client, _sb_client = _sb_client, None
+    if client is not None:
+        client.close()
+
+
+# ---------------------------------------------------
+# Send Message to Queue
+# ---------------------------------------------------
+async def send_message_to_servicebus(queue_name: str, content: dict):
+    try:
+        # Resolves once the batch carrying the message has been sent
+        await asyncio.wrap_future(sender_pool.submit(queue_name, ServiceBusMessage(str(content))))
+        return {"status": "sent", "queue": queue_name, "content": content}
+
+    except Exception as e:
+        return {"error": str(e)}
+
+
+# ---------------------------------------------------
+# List Queues in Namespace
+# ---------------------------------------------------
+def list_servicebus_queues():
+    try:
+        admin = get_sb_client()._connection.get_servicebus_management_client()
+        queues = admin.list_queues()
+        return {"queues": [q.name for q in queues]}
+    except Exception as e:
+        return {"error": str(e)}
+
+
+# ---------------------------------------------------
+# Check Namespace Health
+# ---------------------------------------------------
+def check_servicebus_health():
+    try:
+        admin = get_sb_client()._connection.get_servicebus_management_client()
+        list(admin.list_queues())
+        return {"service_bus": "healthy", "namespace": SERVICE_BUS_NAMESPACE}
+    except Exception as e:
+        return {"service_bus": "unhealthy", "error": str(e)}
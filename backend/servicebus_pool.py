@@ -0,0 +1,288 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from azure.servicebus import ServiceBusClient, ServiceBusMessage
+from azure.servicebus.exceptions import MessageSizeExceededError
+
+# ---------------------------------------------------
+# Service Bus sender pool (one long-lived sender per queue)
+# ---------------------------------------------------
+# Opening a client / sender costs a full AMQP connection + link handshake,
+# so senders are created once and kept open until close(). Messages are
+# queued per queue and a flusher thread packs them into size-aware
+# ServiceBusMessageBatches, sent when SB_BATCH_MAX_MESSAGES are waiting or
+# the oldest has waited SB_BATCH_MAX_LATENCY_MS. submit() returns a Future
+# that resolves once the batch holding the message was sent.
+# Queues opened at startup stay connected; senders created on demand for
+# other queues are closed after SB_SENDER_IDLE_SECONDS without a send, and
+# the least recently used one once there are more than SB_MAX_SENDERS.
+# IntelligentLogInsightsAPI deploys on its own and keeps a copy of this
+# module (IntelligentLogInsightsAPI/servicebus_pool.py); change both together.
+SB_BATCH_MAX_MESSAGES = int(os.getenv("SB_BATCH_MAX_MESSAGES", "100"))
+SB_BATCH_MAX_LATENCY_MS = float(os.getenv("SB_BATCH_MAX_LATENCY_MS", "20"))
+SB_SEND_TIMEOUT_SECONDS = float(os.getenv("SB_SEND_TIMEOUT_SECONDS", "30"))
+SB_MAX_SENDERS = int(os.getenv("SB_MAX_SENDERS", "16"))
+SB_SENDER_IDLE_SECONDS = float(os.getenv("SB_SENDER_IDLE_SECONDS", "300"))
+
+Pending = Tuple[ServiceBusMessage, Future, float]
+
+
+class QueueSender:
+    """
+    The long-lived sender of one queue and the messages waiting for it.
+    """
+
+    def __init__(self, get_client: Callable[[], ServiceBusClient], queue_name: str,
+                 max_messages: int = SB_BATCH_MAX_MESSAGES, max_latency_ms: float = SB_BATCH_MAX_LATENCY_MS):
+        self.queue_name = queue_name
+        self.max_messages = max_messages
+        self.max_latency = max_latency_ms / 1000
+        self._get_client = get_client
+        self._sender = None
+        self._pending: List[Pending] = []
+        self._cond = threading.Condition()
+        # The SDK sender is not thread-safe: used by the flusher, or open() at startup
+        self._sender_lock = threading.Lock()
+        self._closed = False
+
+        self.sent = 0
+        self.failed = 0
+        self.batches = 0
+        self.connects = 0
+        self.last_error = None
+
+        self._thread = threading.Thread(target=self._run, name=f"sb-sender-{queue_name}", daemon=True)
+        self._thread.start()
+
+    def submit(self, message: ServiceBusMessage) -> Future:
+        future = Future()
+        with self._cond:
+            if self._closed:
+                raise RuntimeError(f"Sender for '{self.queue_name}' is closed")
+            self._pending.append((message, future, time.monotonic()))
+            if len(self._pending) == 1 or len(self._pending) >= self.max_messages:
+                self._cond.notify()
+        return future
+
+    def open(self):
+        """
+        Creates the sender and opens its link; safe to call again.
+        """
+        with self._sender_lock:
+            self._connect()
+
+    # ---------------------------------------------------
+    # Flusher thread
+    # ---------------------------------------------------
+    def _connect(self):
+        if self._sender is None:
+            self._sender = self._get_client().get_queue_sender(self.queue_name)
+            self._sender.create_message_batch()  # opens the link, with the SDK's retry
+            self.connects += 1
+        return self._sender
+
+    def _drop_sender(self):
+        sender, self._sender = self._sender, None
+        if sender is not None:
+            try:
+                sender.close()
+            except Exception:
+                pass
+
+    def _next_flush(self) -> List[Pending]:
+        with self._cond:
+            while not self._pending and not self._closed:
+                self._cond.wait()
+            deadline = self._pending[0][2] + self.max_latency if self._pending else 0
+            while not self._closed and len(self._pending) < self.max_messages:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            pending, self._pending = self._pending[:self.max_messages], self._pending[self.max_messages:]
+            return pending
+
+    def _run(self):
+        while True:
+            pending = self._next_flush()
+            if not pending:
+                with self._cond:
+                    if self._closed:
+                        break
+                continue
+            with self._sender_lock:
+                self._flush([(message, future) for message, future, _ in pending])
+        with self._sender_lock:
+            self._drop_sender()
+
+    def _send(self, sender, batch, futures: List[Future]):
+        sender.send_messages(batch)
+        self.sent += len(futures)
+        self.batches += 1
+        for future in futures:
+            future.set_result(None)
+
+    def _flush(self, messages: List[Tuple[ServiceBusMessage, Future]]):
+        waiting: List[Future] = []
+        try:
+            sender = self._connect()
+            batch = sender.create_message_batch()
+            for message, future in messages:
+                try:
+                    batch.add_message(message)
+                except MessageSizeExceededError:
+                    # Batch is full: send it and start the next one with this message
+                    if waiting:
+                        self._send(sender, batch, waiting)
+                        waiting = []
+                        batch = sender.create_message_batch()
+                    try:
+                        batch.add_message(message)
+                    except MessageSizeExceededError as ex:
+                        # Too large even on its own
+                        self.failed += 1
+                        future.set_exception(ex)
+                        continue
+                waiting.append(future)
+            if waiting:
+                self._send(sender, batch, waiting)
+        except Exception as ex:
+            # The SDK already retried; drop the link so the next flush reconnects
+            self.last_error = str(ex)
+            self._drop_sender()
+            for _, future in messages:
+                if not future.done():
+                    self.failed += 1
+                    future.set_exception(ex)
+
+    def close(self, timeout: Optional[float] = SB_SEND_TIMEOUT_SECONDS):
+        """
+        Flushes what is queued, then closes the sender.
+        """
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._thread.join(timeout)
+
+    def stats(self) -> dict:
+        with self._cond:
+            queued = len(self._pending)
+        return {
+            "queue": self.queue_name,
+            "connected": self._sender is not None,
+            "queued": queued,
+            "sent": self.sent,
+            "failed": self.failed,
+            "batches": self.batches,
+            "avg_batch_size": round(self.sent / self.batches, 1) if self.batches else 0,
+            "connects": self.connects,
+            "last_error": self.last_error,
+        }
+
+
+class SenderPool:
+    """
+    queue name -> QueueSender, all on one shared ServiceBusClient.
+    `queues`, when given, is the only set of queue names the pool accepts.
+    """
+
+    def __init__(self, get_client: Callable[[], ServiceBusClient],
+                 max_messages: int = SB_BATCH_MAX_MESSAGES, max_latency_ms: float = SB_BATCH_MAX_LATENCY_MS,
+                 queues: Optional[Iterable[str]] = None, max_senders: int = SB_MAX_SENDERS,
+                 idle_seconds: float = SB_SENDER_IDLE_SECONDS):
+        self._get_client = get_client
+        self.max_messages = max_messages
+        self.max_latency_ms = max_latency_ms
+        self.queues = frozenset(queues) if queues else None
+        self.max_senders = max_senders
+        self.idle_seconds = idle_seconds
+        # Least recently used first; opened (pinned) queues are never evicted
+        self._senders: "OrderedDict[str, QueueSender]" = OrderedDict()
+        self._used_at: Dict[str, float] = {}
+        self._pinned = set()
+        self._lock = threading.Lock()
+        self.evicted = 0
+
+    def _checkout(self, queue_name: str) -> Tuple[QueueSender, List[QueueSender]]:
+        """
+        Under self._lock: the queue's sender plus the senders to retire.
+        """
+        if self.queues is not None and queue_name not in self.queues:
+            raise ValueError(f"Queue '{queue_name}' is not configured for this sender pool")
+        now = time.monotonic()
+        sender = self._senders.get(queue_name)
+        if sender is None:
+            sender = QueueSender(self._get_client, queue_name, self.max_messages, self.max_latency_ms)
+            self._senders[queue_name] = sender
+        else:
+            self._senders.move_to_end(queue_name)
+        self._used_at[queue_name] = now
+
+        evicted = []
+        on_demand = len(self._senders) - len(self._pinned & self._senders.keys())
+        for name in list(self._senders):
+            if name == queue_name or name in self._pinned:
+                continue
+            if on_demand <= self.max_senders and now - self._used_at[name] <= self.idle_seconds:
+                break
+            evicted.append(self._senders.pop(name))
+            del self._used_at[name]
+            on_demand -= 1
+        self.evicted += len(evicted)
+        return sender, evicted
+
+    @staticmethod
+    def _retire(senders: List[QueueSender]):
+        # close() flushes what is still queued; not on the caller's thread
+        for sender in senders:
+            threading.Thread(target=sender.close, name=f"sb-retire-{sender.queue_name}", daemon=True).start()
+
+    def sender(self, queue_name: str) -> QueueSender:
+        with self._lock:
+            sender, evicted = self._checkout(queue_name)
+        self._retire(evicted)
+        return sender
+
+    def open(self, queue_names: Iterable[str] = ()):
+        """
+        Startup: connects the senders of the known queues up front.
+        """
+        for queue_name in queue_names:
+            with self._lock:
+                self._pinned.add(queue_name)
+            self.sender(queue_name).open()
+
+    def submit(self, queue_name: str, message: ServiceBusMessage) -> Future:
+        # Under the pool lock, so an evicted sender is never handed a message
+        with self._lock:
+            sender, evicted = self._checkout(queue_name)
+            future = sender.submit(message)
+        self._retire(evicted)
+        return future
+
+    def send(self, queue_name: str, message: ServiceBusMessage, timeout: float = SB_SEND_TIMEOUT_SECONDS):
+        """
+        Blocking send (waits for the batch holding the message).
+        """
+        return self.submit(queue_name, message).result(timeout)
+
+    def close(self):
+        with self._lock:
+            senders, self._senders = list(self._senders.values()), OrderedDict()
+            self._used_at.clear()
+        for sender in senders:
+            sender.close()
+
+    def stats(self) -> dict:
+        with self._lock:
+            senders = list(self._senders.values())
+        return {
+            "max_batch_messages": self.max_messages,
+            "max_batch_latency_ms": self.max_latency_ms,
+            "max_senders": self.max_senders,
+            "evicted": self.evicted,
+            "queues": [sender.stats() for sender in senders],
+        }
@@ -0,0 +1,211 @@
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import uuid
+from typing import List, Optional
+import ingest_hooks
+import partitioning
+from log_store import (LogStore, LogExists, AGGREGATE_FIELDS, LOGS_PAGE_SIZE, encode_cursor, decode_cursor,
+                       InvalidCursor)
+
+# ---------------------------------------------------
+# Local embedded log store (LOG_STORE=sqlite)
+# ---------------------------------------------------
+# One table with the filterable fields as indexed columns and the full log
+# as JSON. Paging is keyset-based on the insert sequence, so a cursor
+# costs the same at any depth. Calls run in a worker thread; one
+# connection is shared behind a lock (SQLite serialises writers anyway).
+SQLITE_PATH = os.getenv("LOG_STORE_SQLITE_PATH", "logs.db")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS logs (
+    seq       INTEGER PRIMARY KEY AUTOINCREMENT,
+    id        TEXT NOT NULL UNIQUE,
+    pk        TEXT,
+    level     TEXT,
+    service   TEXT,
+    region    TEXT,
+    timestamp TEXT,
+    doc       TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS logs_level_ts   ON logs (level, timestamp);
+CREATE INDEX IF NOT EXISTS logs_service_ts ON logs (service, timestamp);
+CREATE INDEX IF NOT EXISTS logs_region     ON logs (region);
+CREATE INDEX IF NOT EXISTS logs_ts         ON logs (timestamp);
+"""
+
+
+def _where(level=None, service=None, region=None, start_time=None, end_time=None):
+    clauses, params = [], []
+    for column, value in (("level", level.upper() if level else None), ("service", service), ("region", region)):
+        if value:
+            clauses.append(f"{column} = ?")
+            params.append(value)
+    if start_time:
+        clauses.append("timestamp >= ?")
+        params.append(start_time)
+    if end_time:
+        clauses.append("timestamp <= ?")
+        params.append(end_time)
+    return clauses, params
+
+
+class SqliteLogStore(LogStore):
+    name = "sqlite"
+
+    def __init__(self, path: str = SQLITE_PATH):
+        self.path = path
+        self._conn = None
+        self._lock = threading.Lock()
+
+    # ---------------------------------------------------
+    # Connection
+    # ---------------------------------------------------
+    def _connect(self) -> sqlite3.Connection:
+        with self._lock:
+            if self._conn is None:
+                conn = sqlite3.connect(self.path, check_same_thread=False)
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("PRAGMA synchronous=NORMAL")
+                conn.executescript(SCHEMA)
+                self._conn = conn
+            return self._conn
+
+    def _run(self, fn, *args):
+        conn = self._connect()
+        with self._lock:
+            return fn(conn, *args)
+
+    async def open(self):
+        await asyncio.to_thread(self._connect)
+
+    async def close(self):
+        with self._lock:
+            conn, self._conn = self._conn, None
+        if conn is not None:
+            conn.close()
+
+    # ---------------------------------------------------
+    # Writes
+    # ---------------------------------------------------
+    @staticmethod
+    def _prepare(log: dict) -> tuple:
+        partitioning.assign_partition_key(log)
+        return (log["id"], log.get("pk"), str(log.get("level") or "").upper(), log.get("service"),
+                log.get("region"), log.get("timestamp"), json.dumps(log, default=str))
+
+    @staticmethod
+    def _insert_rows(conn, logs: List[dict]) -> List[Optional[str]]:
+        # One transaction; a duplicate id only fails its own row
+        errors = []
+        with conn:
+            for log in logs:
+                try:
+                    conn.execute("INSERT INTO logs (id, pk, level, service, region, timestamp, doc) "
+                                 "VALUES (?, ?, ?, ?, ?, ?, ?)", SqliteLogStore._prepare(log))
+                    errors.append(None)
+                except sqlite3.IntegrityError as ex:
+                    errors.append(str(ex))
+        return errors
+
+    @staticmethod
+    def _is_duplicate(error: str) -> bool:
+        return error.startswith("UNIQUE constraint failed")
+
+    async def insert(self, log: dict) -> dict:
+        log["id"] = log.get("id") or log.get("timestamp") or str(uuid.uuid4())
+        error = (await asyncio.to_thread(self._run, self._insert_rows, [log]))[0]
+        if error:
+            if self._is_duplicate(error):
+                raise LogExists(log["id"])
+            raise sqlite3.IntegrityError(error)
+        ingest_hooks.publish([log])
+        return {"status": "inserted", "log": log}
+
+    async def bulk_insert(self, logs: List[dict]) -> dict:
+        for log in logs:
+            log["id"] = log.get("id") or log.get("timestamp") or str(uuid.uuid4())
+        errors = await asyncio.to_thread(self._run, self._insert_rows, logs)
+
+        statuses = []
+        for index, (log, error) in enumerate(zip(logs, errors)):
+            if error:
+                status = 409 if self._is_duplicate(error) else 400
+                statuses.append({"index": index, "id": log["id"], "status": status, "error": error})
+            else:
+                statuses.append({"index": index, "id": log["id"], "status": 201})
+        ingest_hooks.publish(log for log, error in zip(logs, errors) if not error)
+
+        inserted = errors.count(None)
+        return {"status": "completed", "inserted": inserted, "failed": len(logs) - inserted, "items": statuses}
+
+    # ---------------------------------------------------
+    # Reads
+    # ---------------------------------------------------
+    async def get(self, log_id: str, partition_key=None) -> Optional[dict]:
+        def read(conn):
+            row = conn.execute("SELECT doc FROM logs WHERE id = ?", (log_id,)).fetchone()
+            return json.loads(row[0]) if row else None
+        return await asyncio.to_thread(self._run, read)
+
+    @staticmethod
+    def _after(cursor) -> int:
+        token = decode_cursor(cursor)
+        if token is None:
+            return 0
+        if not token.isdigit():
+            raise InvalidCursor("Invalid cursor")
+        return int(token)
+
+    def _read_page(self, conn, limit: int, after: int, filters: dict):
+        clauses, params = _where(**filters)
+        clauses.append("seq > ?")
+        rows = conn.execute(f"SELECT seq, doc FROM logs WHERE {' AND '.join(clauses)} ORDER BY seq LIMIT ?",
+                            params + [after, limit + 1]).fetchall()
+        more = len(rows) > limit
+        rows = rows[:limit]
+        return [json.loads(doc) for _, doc in rows], (rows[-1][0] if more else None)
+
+    async def page(self, limit: int = LOGS_PAGE_SIZE, cursor: str = None, **filters) -> dict:
+        items, last = await asyncio.to_thread(self._run, self._read_page, limit, self._after(cursor), filters)
+        return {"items": items, "count": len(items), "next_cursor": encode_cursor(last)}
+
+    def iter_pages(self, page_size: int = LOGS_PAGE_SIZE, cursor: str = None, fields=None, **filters):
+        after = self._after(cursor)  # a bad cursor fails here, before any response is sent
+
+        async def pages(after):
+            while True:
+                items, last = await asyncio.to_thread(self._run, self._read_page, page_size, after, filters)
+                if fields:
+                    items = [{f: item.get(f) for f in fields} for item in items]
+                if items:
+                    yield items
+                if last is None:
+                    return
+                after = last
+
+        return pages(after)
+
+    async def count_by(self, field: str = "level", **filters) -> List[dict]:
+        if field not in AGGREGATE_FIELDS:
+            raise ValueError(f"Cannot group by '{field}'")
+        clauses, params = _where(**filters)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+
+        def count(conn):
+            rows = conn.execute(f"SELECT {field}, COUNT(1) FROM logs {where} GROUP BY {field}", params).fetchall()
+            return [{field: value, "count": n} for value, n in rows]
+        return await asyncio.to_thread(self._run, count)
+
+    async def top(self, level: str = "CRITICAL", limit: int = 10) -> List[dict]:
+        def read(conn):
+            rows = conn.execute("SELECT doc FROM logs WHERE level = ? ORDER BY timestamp DESC LIMIT ?",
+                                (level.upper(), limit)).fetchall()
+            return [json.loads(doc) for doc, in rows]
+        return await asyncio.to_thread(self._run, read)
+
+    async def stats(self) -> dict:
+        rows = await asyncio.to_thread(self._run, lambda conn: conn.execute("SELECT COUNT(1) FROM logs").fetchone()[0])
+        return {"store": self.name, "path": self.path, "logs": rows}
@@ -0,0 +1,115 @@
+import asyncio
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from change_feed import ChangeFeedProcessor, FileLeaseStore, TransientFailure, range_key
+
+RANGE = {"min": "", "max": "FF"}
+KEY = range_key(RANGE)
+
+
+class Page:
+    def __init__(self, items):
+        self.items = items
+
+    async def __aiter__(self):
+        for item in self.items:
+            yield item
+
+
+class Pages:
+    def __init__(self, items, pos, size):
+        self.items, self.pos, self.size = items, pos, size
+        self.continuation_token = None
+        self.done = False
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if self.done:
+            raise StopAsyncIteration
+        chunk = self.items[self.pos:self.pos + self.size]
+        self.pos += len(chunk)
+        self.continuation_token = str(self.pos)
+        self.done = not chunk
+        return Page(chunk)
+
+
+class FeedContainer:
+    """A single feed range; continuation tokens are offsets into `items`."""
+
+    def __init__(self, items):
+        self.items = items
+
+    def query_items_change_feed(self, continuation=None, max_item_count=100, **_):
+        container = self
+
+        class Feed:
+            def by_page(self):
+                return Pages(container.items, int(continuation or 0), max_item_count)
+
+        return Feed()
+
+
+def processor(tmp_path, handler):
+    return ChangeFeedProcessor(None, handler, leases=FileLeaseStore(str(tmp_path / "leases.json")),
+                               dead_letter_path=str(tmp_path / "dead.jsonl"))
+
+
+def dead_letters(tmp_path):
+    path = tmp_path / "dead.jsonl"
+    return [json.loads(line)["item"]["id"] for line in path.read_text().splitlines()] if path.exists() else []
+
+
+def test_transient_failure_retries_the_page_without_advancing(tmp_path):
+    container = FeedContainer([{"id": "a"}, {"id": "b"}])
+    applied, failures = [], [1]
+
+    async def handler(logs):
+        if failures[0]:
+            failures[0] -= 1
+            raise RuntimeError("model unavailable")
+        applied.extend(log["id"] for log in logs)
+
+    feed = processor(tmp_path, handler)
+    with pytest.raises(TransientFailure):
+        asyncio.run(feed._read_once(container, KEY, RANGE))
+    assert feed._pending == {} and feed.dead_lettered == 0
+
+    assert asyncio.run(feed._read_once(container, KEY, RANGE)) == 2
+    assert applied == ["a", "b"]
+    assert feed._pending == {KEY: "2"}
+    assert dead_letters(tmp_path) == []
+
+
+def test_only_bad_documents_are_dead_lettered(tmp_path):
+    container = FeedContainer([{"id": "a"}, {"id": "poison"}, {"id": "b"}])
+    applied, outages = [], {"b": 1}
+
+    async def handler(logs):
+        if any(log["id"] == "poison" for log in logs):
+            raise ValueError("unparseable timestamp")
+        for log in logs:
+            if outages.get(log["id"]):
+                outages[log["id"]] -= 1
+                raise OSError("disk unavailable")
+        applied.extend(log["id"] for log in logs)
+
+    feed = processor(tmp_path, handler)
+    # "a" goes through and "poison" is dead-lettered before "b" hits the outage
+    with pytest.raises(TransientFailure):
+        asyncio.run(feed._read_once(container, KEY, RANGE))
+    assert feed._pending == {}
+
+    # The replay applies only what is left of the page
+    asyncio.run(feed._read_once(container, KEY, RANGE))
+    assert applied == ["a", "b"]
+    assert dead_letters(tmp_path) == ["poison"]
+    assert feed._pending == {KEY: "3"}
+    assert feed.stats()["dead_lettered"] == 1
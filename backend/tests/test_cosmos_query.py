@@ -0,0 +1,51 @@
+import asyncio
+import os
+import sys
+
+from azure.cosmos import exceptions
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cosmos_query import _write_batch
+
+
+class BatchContainer:
+    def __init__(self, error):
+        self.error = error
+        self.calls = 0
+
+    async def execute_item_batch(self, operations, partition_key):
+        self.calls += 1
+        raise self.error
+
+
+def write(container, logs):
+    statuses = [None] * len(logs)
+    asyncio.run(_write_batch(container, "api|2025-01-01", list(enumerate(logs)), statuses))
+    return statuses
+
+
+def test_rejected_operation_is_dropped_and_the_rest_retried():
+    error = exceptions.CosmosBatchOperationError(
+        error_index=1, headers={}, status_code=409, message="conflict",
+        operation_responses=[{"statusCode": 424}, {"statusCode": 409, "message": "exists"}])
+
+    class FailOnce(BatchContainer):
+        async def execute_item_batch(self, operations, partition_key):
+            self.calls += 1
+            if self.calls == 1:
+                raise self.error
+
+    container = FailOnce(error)
+    statuses = write(container, [{"id": "a"}, {"id": "b"}])
+    assert [s["status"] for s in statuses] == [201, 409]
+    assert container.calls == 2
+
+
+def test_batch_error_without_failing_operation_fails_every_entry():
+    error = exceptions.CosmosBatchOperationError(error_index=None, headers={}, status_code=400,
+                                                 message="bad batch")
+    container = BatchContainer(error)
+    statuses = write(container, [{"id": "a"}, {"id": "b"}])
+    assert [s["status"] for s in statuses] == [400, 400]
+    assert container.calls == 1
@@ -0,0 +1,63 @@
+import asyncio
+import os
+import sys
+import threading
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from embedding_executor import CpuExecutor
+from query_embedder import QueryEmbedder
+
+
+def test_executor_releases_queue_slot_of_cancelled_job():
+    executor = CpuExecutor(workers=1, max_queue=4)
+    release = threading.Event()
+
+    async def run():
+        busy = asyncio.create_task(executor.run(release.wait))
+        await asyncio.sleep(0.05)
+        # Queued behind the busy worker, then abandoned by its caller
+        waiting = asyncio.create_task(executor.run(lambda: "never"))
+        await asyncio.sleep(0.05)
+        assert executor.stats()["queue_depth"] == 1
+        waiting.cancel()
+        await asyncio.sleep(0.05)
+        release.set()
+        await busy
+
+    try:
+        asyncio.run(run())
+        assert executor.stats()["queue_depth"] == 0
+        assert executor.stats()["in_flight"] == 0
+    finally:
+        executor.shutdown()
+
+
+def test_embedder_caller_cancellation_does_not_cancel_shared_encode():
+    calls = []
+
+    def encode(texts):
+        calls.append(list(texts))
+        return np.ones((len(texts), 4), dtype="float32")
+
+    async def slow_runner(fn, *args):
+        await asyncio.sleep(0.05)
+        return fn(*args)
+
+    async def run():
+        embedder = QueryEmbedder(encode, window_ms=1, runner=slow_runner)
+        first = asyncio.create_task(embedder.embed("disk full"))
+        await asyncio.sleep(0.01)
+        # Joins the batch that is already being encoded
+        second = asyncio.create_task(embedder.embed("disk full"))
+        await asyncio.sleep(0)
+        first.cancel()
+        vector = await second
+        return embedder, vector
+
+    embedder, vector = asyncio.run(run())
+    assert vector.shape == (1, 4)
+    assert calls == [["disk full"]]
+    assert embedder.stats()["coalesced_duplicates"] == 1
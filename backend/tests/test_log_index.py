@@ -0,0 +1,139 @@
+import importlib
+import os
+import sys
+import zlib
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from metadata_index import MetadataIndex
+
+
+def fake_encode(texts):
+    # Bag-of-words hashing: deterministic, no model download
+    out = np.zeros((len(texts), 64), dtype="float32")
+    for i, text in enumerate(texts):
+        for word in text.lower().split():
+            out[i, zlib.crc32(word.encode()) % 64] += 1
+    out /= np.maximum(np.linalg.norm(out, axis=1, keepdims=True), 1e-9)
+    return out
+
+
+@pytest.fixture
+def open_index(tmp_path, monkeypatch):
+    """
+    Returns a function that (re)imports generate_embedding_faiss on a fresh
+    index directory; calling it again simulates a process restart.
+    """
+    monkeypatch.setenv("VECTOR_INDEX_DIR", str(tmp_path))
+    monkeypatch.setenv("VECTOR_INDEX_FILE", str(tmp_path / "legacy.index"))
+    monkeypatch.setenv("VECTOR_TEXTS_FILE", str(tmp_path / "legacy.json"))
+
+    def load():
+        import generate_embedding_faiss
+        module = importlib.reload(generate_embedding_faiss)
+        monkeypatch.setattr(module, "encode_texts", fake_encode)
+        return module
+
+    return load
+
+
+def templates(g):
+    return sorted(record["template"] for _, record in g.store.records())
+
+
+def test_failed_encode_leaves_no_trace(open_index, monkeypatch):
+    g = open_index()
+    g.index_logs([{"id": "a", "message": "User alice logged in"}])
+
+    def unavailable(texts):
+        raise RuntimeError("model unavailable")
+
+    monkeypatch.setattr(g, "encode_texts", unavailable)
+    with pytest.raises(RuntimeError):
+        g.index_logs([{"id": "b", "message": "Disk full on volume data"},
+                      {"id": "c", "message": "User bob logged in"}])
+    monkeypatch.setattr(g, "encode_texts", fake_encode)
+
+    # The rolled-back batch created no template and changed no existing one
+    g.index_logs([{"id": "d", "message": "Cache miss for key session"}])
+    assert templates(g) == ["Cache miss for key session", "User alice logged in"]
+    assert [m["id"] for m in g._members[0]] == ["a"]
+
+    # The same log indexes cleanly on the retry
+    g.index_logs([{"id": "e", "message": "Disk full on volume data"}])
+    assert len(g.miner.clusters) == g.store.total_rows() == 3
+
+
+def test_multi_field_filter_skips_split_template_matches(open_index):
+    g = open_index()
+    g.index_logs([
+        {"id": "1", "message": "Payment declined for order 1", "level": "CRITICAL", "service": "checkout"},
+        {"id": "2", "message": "Payment declined for order 2", "level": "ERROR", "service": "payment-service"},
+        {"id": "3", "message": "Card gateway timeout reached", "level": "CRITICAL", "service": "payment-service"},
+    ])
+
+    # The "Payment declined" template passes level and service through two
+    # different members; no single member matches both, so it is not a hit
+    response = g.semantic_search_logs("Payment declined", top_k=1,
+                                      filters={"level": "CRITICAL", "service": "payment-service"})
+    assert [r["log_ids"] for r in response["results"]] == [["3"]]
+    assert response["results"][0]["count"] == 1
+
+
+def test_members_of_unflushed_rows_do_not_survive_a_crash(open_index):
+    g = open_index()
+    g.index_logs([{"id": "a", "message": "User alice logged in"}])
+    g.store.flush()
+    g.index_logs([{"id": "b", "message": "Disk full on volume data"},
+                  {"id": "c", "message": "User bob logged in"}])
+    with open(g.MEMBERS_FILE) as f:
+        assert [line for line in f if '"b"' in line] == []
+
+    # Restart without flushing: row 1 is gone and gets reused by a new template
+    g = open_index()
+    assert g.load_index().total_rows() == 1
+    g.index_logs([{"id": "d", "message": "Cache miss for key session"}])
+    g.store.flush()
+    assert [m["id"] for m in g._members[1]] == ["d"]
+
+    g = open_index()
+    g.load_index()
+    assert {row: [m["id"] for m in members] for row, members in g._members.items()} == {0: ["a"], 1: ["d"]}
+
+
+def test_metadata_candidates_intersect_filters_and_time_range():
+    index = MetadataIndex()
+    index.add(0, {"level": "error", "service": "api", "timestamp": "2025-01-01T00:00:00"})
+    index.add(1, {"level": "ERROR", "service": "worker", "timestamp": "2025-01-01T01:00:00"})
+    index.add(2, {"level": "INFO", "service": "api", "timestamp": "2025-01-01T02:00:00Z"})
+    index.add(3, {"level": "ERROR", "service": "api"})
+
+    assert index.candidates() is None
+    assert index.candidates(level="Error").tolist() == [0, 1, 3]
+    assert index.candidates(level="ERROR", service="api").tolist() == [0, 3]
+    assert index.candidates(start_time="2025-01-01T00:30:00").tolist() == [1, 2]
+    assert index.candidates(service="api", end_time="2025-01-01T01:00:00").tolist() == [0]
+    assert index.candidates(service="missing").tolist() == []
+
+
+def test_time_range_matches_rows_by_member_span(open_index):
+    index = MetadataIndex()
+    for minute in range(0, 60, 10):
+        index.add(0, {"timestamp": f"2025-01-01T00:{minute:02d}:00"})
+    index.add(1, {"timestamp": "2025-01-01T03:00:00"})
+
+    assert index.candidates(start_time="2025-01-01T00:50:00").tolist() == [0, 1]
+    assert index.candidates(end_time="2025-01-01T00:00:00").tolist() == [0]
+    assert index.candidates(start_time="2025-01-01T01:00:00", end_time="2025-01-01T02:00:00").tolist() == []
+
+    # A span can overlap the range without any member inside it; search drops that template
+    g = open_index()
+    g.index_logs([{"id": "a", "message": "Disk full on volume data", "timestamp": "2025-01-01T00:00:00"},
+                  {"id": "b", "message": "Disk full on volume logs", "timestamp": "2025-01-01T02:00:00"},
+                  {"id": "c", "message": "Cache miss for key session", "timestamp": "2025-01-01T01:00:00"}])
+    response = g.semantic_search_logs("Disk full", top_k=2, filters={"start_time": "2025-01-01T00:30:00",
+                                                                      "end_time": "2025-01-01T01:30:00"})
+    assert [r["log_ids"] for r in response["results"]] == [["c"]]
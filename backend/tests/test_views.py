@@ -0,0 +1,64 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from query_cache import QueryResultCache, build_filter_query, normalize_filters
+from rollups import Rollups
+
+
+def test_filter_query_is_parameterised():
+    query, parameters = build_filter_query(level="error", service="api'; DROP", start_time="2025-01-01T00:00:00")
+    assert query == "SELECT * FROM c WHERE c.level = @level AND c.service = @service AND c.timestamp >= @start_time"
+    assert {p["name"]: p["value"] for p in parameters} == {
+        "@level": "ERROR", "@service": "api'; DROP", "@start_time": "2025-01-01T00:00:00"}
+
+
+def test_cache_invalidates_only_matching_filters():
+    cache = QueryResultCache(ttl=60)
+    cache.put("errors", normalize_filters("error"), 1)
+    cache.put("api-info", normalize_filters("info", "api"), 2)
+    cache.put("api-eu-jan1", normalize_filters(None, "api", "eu", "2024-01-01T00:00:00", "2024-01-02T00:00:00"), 3)
+    cache.put("all", normalize_filters(), 4)
+
+    cache.invalidate_many([{"level": "ERROR", "service": "api", "region": "eu", "timestamp": "2024-03-01T00:00:00"}])
+    assert cache.get("errors") is None and cache.get("all") is None
+    # Different level; outside the cached time range
+    assert cache.get("api-info") == 2 and cache.get("api-eu-jan1") == 3
+
+    cache.invalidate({"level": "INFO", "service": "api", "region": "eu", "timestamp": "2024-01-01T05:00:00"})
+    assert cache.get("api-info") is None and cache.get("api-eu-jan1") is None
+    assert cache.stats()["entries"] == 0 and not cache._by_filters
+
+
+def test_cache_evicts_least_recently_used():
+    cache = QueryResultCache(ttl=60, max_entries=2)
+    cache.put("a", normalize_filters("error"), 1)
+    cache.put("b", normalize_filters("info"), 2)
+    cache.get("a")
+    cache.put("c", normalize_filters("warning"), 3)
+    assert cache.get("b") is None and cache.get("a") == 1 and cache.get("c") == 3
+    assert sum(map(len, cache._by_filters.values())) == 2
+
+
+def test_rollups_count_incrementally_by_dimension(tmp_path):
+    rollups = Rollups(str(tmp_path / "rollups.json"))
+    for level, service, region, minute in [("ERROR", "api", "eu", 0), ("error", "api", "us", 0),
+                                           ("INFO", "worker", "eu", 1), ("ERROR", "worker", "eu", 61)]:
+        rollups.add({"level": level, "service": service, "region": region,
+                     "timestamp": f"2025-01-01T{minute // 60:02d}:{minute % 60:02d}:00+00:00"})
+
+    assert rollups.distribution()["distribution"] == [{"level": "ERROR", "count": 3}, {"level": "INFO", "count": 1}]
+    assert rollups.distribution(region="eu", by="service")["distribution"] == [
+        {"service": "worker", "count": 2}, {"service": "api", "count": 1}]
+    assert rollups.distribution(start_time="2025-01-01T00:00:00+00:00", end_time="2025-01-01T00:30:00+00:00",
+                                level="error")["distribution"] == [{"level": "ERROR", "count": 2}]
+
+    points = rollups.timeseries("hour", "2025-01-01T00:00:00+00:00", "2025-01-01T01:00:00+00:00", service="worker")
+    assert [(p["bucket"], p["total"]) for p in points["points"]] == [
+        ("2025-01-01T00:00:00Z", 1), ("2025-01-01T01:00:00Z", 1)]
+
+    rollups.save()
+    restored = Rollups(rollups.path)
+    assert restored.load()
+    assert restored.distribution() == rollups.distribution()
@@ -0,0 +1,68 @@
+import heapq
+import itertools
+import os
+import threading
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+from metadata_index import parse_timestamp
+
+# ---------------------------------------------------
+# Most recent CRITICAL / ERROR events per service
+# ---------------------------------------------------
+# One bounded min-heap (keyed on timestamp) per (level, service): the
+# oldest event is evicted first, so late or out-of-order logs still land
+# in the right place. Fed by the ingest hooks, seeded from Cosmos at startup.
+TOP_EVENTS_LEVELS = tuple(l.strip().upper() for l in os.getenv("TOP_EVENTS_LEVELS", "CRITICAL,ERROR").split(","))
+TOP_EVENTS_PER_SERVICE = int(os.getenv("TOP_EVENTS_PER_SERVICE", "100"))
+
+
+class TopEvents:
+    def __init__(self, levels=TOP_EVENTS_LEVELS, per_service: int = TOP_EVENTS_PER_SERVICE):
+        self.levels = levels
+        self.per_service = per_service
+        # (level, service) -> heap of (timestamp, seq, log)
+        self._heaps: Dict[Tuple[str, str], list] = defaultdict(list)
+        self._ids: Dict[Tuple[str, str], set] = defaultdict(set)
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+
+    def add(self, log: dict):
+        level = str(log.get("level") or "").upper()
+        if level not in self.levels:
+            return
+        ts = parse_timestamp(log.get("timestamp"))
+        if ts is None:
+            return
+
+        key = (level, str(log.get("service") or "UnknownService"))
+        with self._lock:
+            ids = self._ids[key]
+            if log.get("id") in ids:
+                return  # already seen (seed and ingest can overlap)
+            heap = self._heaps[key]
+            entry = (ts, next(self._seq), log)
+            if len(heap) < self.per_service:
+                heapq.heappush(heap, entry)
+            elif ts > heap[0][0]:
+                evicted = heapq.heapreplace(heap, entry)
+                ids.discard(evicted[2].get("id"))
+            else:
+                return
+            ids.add(log.get("id"))
+
+    def top(self, k: int = 10, level: str = "CRITICAL", service: Optional[str] = None, since=None) -> List[dict]:
+        """
+        The k most recent events of one level, newest first.
+        """
+        level = level.upper()
+        start = parse_timestamp(since)
+        with self._lock:
+            entries = [entry
+                       for (lvl, svc), heap in self._heaps.items()
+                       if lvl == level and (service is None or svc == service)
+                       for entry in heap
+                       if start is None or entry[0] >= start]
+        return [log for _, _, log in heapq.nlargest(k, entries)]
+
+
+top_events = TopEvents()
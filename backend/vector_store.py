@@ -0,0 +1,496 @@
+import heapq
+import json
+import os
+import shutil
+import threading
+import time
+import faiss
+import numpy as np
+from typing import List, Optional
+from metadata_index import MetadataIndex
+
+# ---------------------------------------------------
+# Segment layout / compaction settings
+# ---------------------------------------------------
+# Appends are buffered in memory and written out as an immutable segment
+# once FLUSH_ROWS logs have arrived (or FLUSH_SECONDS have passed).
+FLUSH_ROWS = int(os.getenv("VECTOR_FLUSH_ROWS", "256"))
+FLUSH_SECONDS = float(os.getenv("VECTOR_FLUSH_SECONDS", "30"))
+
+# Once MERGE_FACTOR small segments pile up at the tail they are merged into one.
+MERGE_FACTOR = int(os.getenv("VECTOR_MERGE_FACTOR", "8"))
+SEGMENT_MAX_ROWS = int(os.getenv("VECTOR_SEGMENT_MAX_ROWS", "200000"))
+COMPACT_INTERVAL = float(os.getenv("VECTOR_COMPACT_INTERVAL", "10"))
+
+MANIFEST_NAME = "manifest.json"
+
+# ---------------------------------------------------
+# Storage mode for flushed segments
+# ---------------------------------------------------
+#   flat  - exact float32 (4 bytes/dim)
+#   fp16  - float16 scalar quantization (2 bytes/dim)
+#   int8  - 8-bit scalar quantization (1 byte/dim)
+#   pq    - product quantization (PQ_M bytes/vector) as a fast first pass;
+#           with PQ_RERANK > 0 the best PQ_RERANK * top_k candidates are
+#           re-scored from 8-bit codes (+1 byte/dim). Needs PQ_MIN_TRAIN
+#           vectors to train a shared codebook, segments stay flat until then
+# The in-memory append buffer is always exact float32.
+#
+# PQ defaults target recall@10 >= 0.95 against exact search. PQ codes alone
+# score ~0.19 at M=48 on clustered 384-d embeddings; with re-ranking pq matches
+# int8 recall (~0.98) while scanning 24-byte codes. Measure with
+# benchmark_vector_index.py before trading recall for size (PQ_RERANK=0).
+INDEX_MODES = ("flat", "fp16", "int8", "pq")
+INDEX_MODE = os.getenv("VECTOR_INDEX_MODE", "flat").lower()
+PQ_M = int(os.getenv("VECTOR_PQ_M", "24"))
+PQ_NBITS = int(os.getenv("VECTOR_PQ_NBITS", "8"))
+# k-means on 2^PQ_NBITS centroids wants ~39 points per centroid
+PQ_MIN_TRAIN = int(os.getenv("VECTOR_PQ_MIN_TRAIN", "10000"))
+PQ_RERANK = int(os.getenv("VECTOR_PQ_RERANK", "20"))
+PQ_CODEBOOK_NAME = "pq_codebook.index"
+
+
+def build_index(embeddings: np.ndarray, mode: str = "flat", codebook=None,
+                pq_m: int = PQ_M, pq_rerank: int = PQ_RERANK):
+    """
+    Builds an inner-product FAISS index over unit vectors in the given storage mode.
+    For "pq", pass a trained (empty) IndexPQ as codebook to skip training.
+    """
+    dim = embeddings.shape[1]
+    if mode == "flat":
+        index = faiss.IndexFlatIP(dim)
+    elif mode == "fp16":
+        index = faiss.IndexScalarQuantizer(dim, faiss.ScalarQuantizer.QT_fp16, faiss.METRIC_INNER_PRODUCT)
+    elif mode == "int8":
+        index = faiss.IndexScalarQuantizer(dim, faiss.ScalarQuantizer.QT_8bit, faiss.METRIC_INNER_PRODUCT)
+    elif mode == "pq":
+        if codebook is not None:
+            index = faiss.clone_index(codebook)
+        else:
+            index = faiss.IndexPQ(dim, pq_m, PQ_NBITS, faiss.METRIC_INNER_PRODUCT)
+        if pq_rerank > 0:
+            # Trains only the 8-bit re-rank codes; the PQ codebook stays shared
+            if not index.is_trained:
+                index.train(embeddings)
+            refine = faiss.IndexScalarQuantizer(dim, faiss.ScalarQuantizer.QT_8bit, faiss.METRIC_INNER_PRODUCT)
+            refine.train(embeddings)
+            index = faiss.IndexRefine(index, refine)
+            index.k_factor = pq_rerank
+    else:
+        raise ValueError(f"Unknown vector index mode '{mode}', expected one of {INDEX_MODES}")
+
+    if not index.is_trained:
+        index.train(embeddings)
+    index.add(embeddings)
+    return index
+
+
+def _read_index(path: str):
+    # Memory-map the vectors instead of copying them onto the heap
+    try:
+        return faiss.read_index(path, faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY)
+    except RuntimeError:
+        return faiss.read_index(path)
+
+
+def _to_cosine(index, score: float) -> float:
+    # Older indexes were built with IndexFlatL2 (squared distance between unit vectors)
+    if index.metric_type == faiss.METRIC_L2:
+        return 1.0 - float(score) / 2.0
+    return float(score)
+
+
+def _write_json_atomic(path: str, data):
+    with open(path + ".tmp", "w") as f:
+        json.dump(data, f)
+    os.replace(path + ".tmp", path)
+
+
+class Segment:
+    """
+    One immutable, memory-mapped FAISS index + the records for its rows.
+    Rows are addressed globally as offset + local row.
+    """
+
+    def __init__(self, name: str, index, records: list, offset: int):
+        self.name = name
+        self.index = index
+        self.records = records
+        self.offset = offset
+
+    @property
+    def rows(self) -> int:
+        return self.index.ntotal
+
+
+class VectorStore:
+    """
+    Append-only vector index made of immutable segments.
+
+    - append() adds vectors to an in-memory buffer that is searchable at once
+    - flush() writes the buffer out as a new segment
+    - compact() merges small tail segments in the background
+    Row order never changes, so a log keeps the same global row id forever.
+    """
+
+    def __init__(self, index_dir: str, legacy_index: Optional[str] = None, legacy_records: Optional[str] = None,
+                 mode: str = INDEX_MODE):
+        if mode not in INDEX_MODES:
+            raise ValueError(f"Unknown vector index mode '{mode}', expected one of {INDEX_MODES}")
+        self.index_dir = index_dir
+        self.mode = mode
+        self._codebook = None
+        self.legacy_index = legacy_index
+        self.legacy_records = legacy_records
+
+        self.segments: List[Segment] = []
+        self.metadata = MetadataIndex()
+        self.next_segment = 1
+        self.dim = None
+
+        self._buffer = None
+        self._buffer_records = []
+        self._buffer_started = None
+        # fn(durable_rows), called under the store lock once rows are on disk
+        self._flush_listeners = []
+
+        self._lock = threading.RLock()
+        self._merge_lock = threading.Lock()
+        self._loaded = False
+        self._stop = threading.Event()
+        self._worker = None
+
+    # ---------------------------------------------------
+    # Loading
+    # ---------------------------------------------------
+    def _path(self, name: str, ext: str) -> str:
+        return os.path.join(self.index_dir, f"{name}.{ext}")
+
+    def load(self):
+        with self._lock:
+            if self._loaded:
+                return self
+            os.makedirs(self.index_dir, exist_ok=True)
+
+            manifest_path = os.path.join(self.index_dir, MANIFEST_NAME)
+            if not os.path.exists(manifest_path):
+                self._adopt_legacy_index()
+
+            if os.path.exists(manifest_path):
+                with open(manifest_path, "r") as f:
+                    manifest = json.load(f)
+                self.next_segment = manifest["next_segment"]
+                offset = 0
+                for entry in manifest["segments"]:
+                    segment = self._open_segment(entry["name"], offset)
+                    self.segments.append(segment)
+                    self._index_metadata(segment.records, offset)
+                    offset += segment.rows
+
+            if self.segments:
+                self.dim = self.segments[0].index.d
+            self._loaded = True
+            print(f"🔹 Loaded vector index: {self.total_rows()} logs in {len(self.segments)} segments")
+            return self
+
+    def _open_segment(self, name: str, offset: int) -> Segment:
+        index = _read_index(self._path(name, "index"))
+        with open(self._path(name, "json"), "r") as f:
+            records = json.load(f)
+        return Segment(name, index, records, offset)
+
+    def _index_metadata(self, records: list, offset: int):
+        for i, record in enumerate(records):
+            if isinstance(record, dict):
+                self.metadata.add(offset + i, record)
+
+    def _adopt_legacy_index(self):
+        # A single-file index from save_logs_to_index becomes segment #1
+        if not self.legacy_index or not os.path.exists(self.legacy_index):
+            return
+        name = self._new_segment_name()
+        shutil.copyfile(self.legacy_index, self._path(name, "index"))
+        shutil.copyfile(self.legacy_records, self._path(name, "json"))
+        self._write_manifest([name])
+
+    def _new_segment_name(self) -> str:
+        name = f"seg-{self.next_segment:06d}"
+        self.next_segment += 1
+        return name
+
+    def _write_manifest(self, names: List[str]):
+        _write_json_atomic(
+            os.path.join(self.index_dir, MANIFEST_NAME),
+            {"next_segment": self.next_segment, "segments": [{"name": n} for n in names]},
+        )
+
+    def _pq_codebook(self, embeddings: np.ndarray):
+        # Trained once on the first large enough segment, then shared by every PQ segment
+        if self._codebook is None:
+            path = os.path.join(self.index_dir, PQ_CODEBOOK_NAME)
+            if os.path.exists(path):
+                self._codebook = faiss.read_index(path)
+            elif len(embeddings) >= PQ_MIN_TRAIN:
+                codebook = faiss.IndexPQ(embeddings.shape[1], PQ_M, PQ_NBITS, faiss.METRIC_INNER_PRODUCT)
+                codebook.train(embeddings)
+                faiss.write_index(codebook, path + ".tmp")
+                os.replace(path + ".tmp", path)
+                self._codebook = codebook
+        return self._codebook
+
+    def _build_segment_index(self, embeddings: np.ndarray):
+        if self.mode == "pq":
+            codebook = self._pq_codebook(embeddings)
+            if codebook is None:
+                return build_index(embeddings, "flat")
+            return build_index(embeddings, "pq", codebook)
+        return build_index(embeddings, self.mode)
+
+    def _write_segment(self, name: str, embeddings: np.ndarray, records: list):
+        index = self._build_segment_index(embeddings)
+        faiss.write_index(index, self._path(name, "index") + ".tmp")
+        os.replace(self._path(name, "index") + ".tmp", self._path(name, "index"))
+        _write_json_atomic(self._path(name, "json"), records)
+
+    def _remove_segment_files(self, name: str):
+        for ext in ("index", "json"):
+            try:
+                os.remove(self._path(name, ext))
+            except OSError:
+                # Still mapped by a reader on some platforms; left for the next cleanup
+                pass
+
+    def records(self) -> list:
+        """
+        (row, record) for every row, in row order.
+        """
+        with self._lock:
+            segments = list(self.segments)
+            buffered = list(self._buffer_records)
+        rows = [(s.offset + i, r) for s in segments for i, r in enumerate(s.records)]
+        offset = sum(s.rows for s in segments)
+        return rows + [(offset + i, r) for i, r in enumerate(buffered)]
+
+    def add_metadata(self, row: int, record: dict):
+        """
+        Adds extra filterable metadata for an existing row (e.g. another log sharing its template).
+        """
+        with self._lock:
+            self.metadata.add(row, record)
+
+    def add_flush_listener(self, fn):
+        """
+        fn(durable_rows) runs after every flush / rebuild, once rows below durable_rows are on disk.
+        """
+        self._flush_listeners.append(fn)
+
+    def _notify_flushed(self):
+        durable = sum(s.rows for s in self.segments)
+        for fn in self._flush_listeners:
+            fn(durable)
+
+    def total_rows(self) -> int:
+        with self._lock:
+            buffered = self._buffer.ntotal if self._buffer is not None else 0
+            return sum(s.rows for s in self.segments) + buffered
+
+    # ---------------------------------------------------
+    # Writes
+    # ---------------------------------------------------
+    def append(self, records: list, embeddings: np.ndarray):
+        """
+        Appends rows; they are searchable immediately and persisted on the next flush.
+        """
+        if not records:
+            return
+        self.load()
+        with self._lock:
+            if self._buffer is None:
+                self.dim = self.dim or embeddings.shape[1]
+                self._buffer = faiss.IndexFlatIP(self.dim)
+                self._buffer_started = time.time()
+            self._index_metadata(records, self.total_rows())
+            self._buffer.add(embeddings)
+            self._buffer_records.extend(records)
+            should_flush = self._buffer.ntotal >= FLUSH_ROWS
+
+        if should_flush:
+            try:
+                self.flush()
+            except Exception as ex:
+                # The rows are appended either way: they stay buffered and the next flush retries
+                print(f"⚠ Vector index flush failed: {ex}")
+
+    def flush(self):
+        """
+        Writes buffered rows out as a new immutable segment.
+        """
+        with self._lock:
+            if self._buffer is None or self._buffer.ntotal == 0:
+                return
+            embeddings = self._buffer.reconstruct_n(0, self._buffer.ntotal)
+            records = self._buffer_records
+
+            name = self._new_segment_name()
+            self._write_segment(name, embeddings, records)
+            self._write_manifest([s.name for s in self.segments] + [name])
+
+            offset = sum(s.rows for s in self.segments)
+            self.segments.append(self._open_segment(name, offset))
+            self._buffer, self._buffer_records, self._buffer_started = None, [], None
+            self._notify_flushed()
+
+    def replace_all(self, records: list, embeddings: np.ndarray):
+        """
+        Full rebuild: one fresh segment replaces everything on disk.
+        """
+        self.load()
+        with self._merge_lock, self._lock:
+            old = [s.name for s in self.segments]
+            name = self._new_segment_name()
+            self._write_segment(name, embeddings, records)
+            self._write_manifest([name])
+
+            self.segments = [self._open_segment(name, 0)]
+            self.metadata = MetadataIndex()
+            self._index_metadata(records, 0)
+            self.dim = embeddings.shape[1]
+            self._buffer, self._buffer_records, self._buffer_started = None, [], None
+            self._notify_flushed()
+
+        for name in old:
+            self._remove_segment_files(name)
+
+    # ---------------------------------------------------
+    # Background merge / compaction
+    # ---------------------------------------------------
+    def _pick_merge_run(self) -> List[Segment]:
+        # Flushes land at the tail, so small segments collect there
+        run = []
+        for segment in reversed(self.segments):
+            if segment.rows >= SEGMENT_MAX_ROWS:
+                break
+            run.insert(0, segment)
+        return run if len(run) >= MERGE_FACTOR else []
+
+    def compact(self) -> bool:
+        """
+        Merges the tail run of small segments into one. Returns True if a merge happened.
+        """
+        with self._merge_lock:
+            with self._lock:
+                run = self._pick_merge_run()
+                if not run:
+                    return False
+                name = self._new_segment_name()
+
+            # Heavy lifting happens outside the main lock; segments are immutable
+            embeddings = np.vstack([s.index.reconstruct_n(0, s.rows) for s in run])
+            records = [r for s in run for r in s.records]
+            self._write_segment(name, embeddings, records)
+            merged = self._open_segment(name, run[0].offset)
+
+            with self._lock:
+                # Segments flushed while we were merging stay after the merged one
+                first = self.segments.index(run[0])
+                segments = self.segments[:first] + [merged] + self.segments[first + len(run):]
+                self._write_manifest([s.name for s in segments])
+                self.segments = segments
+
+        for segment in run:
+            self._remove_segment_files(segment.name)
+        print(f"🔹 Compacted {len(run)} segments into {name} ({merged.rows} logs)")
+        return True
+
+    def _background_loop(self):
+        while not self._stop.wait(COMPACT_INTERVAL):
+            try:
+                with self._lock:
+                    stale = self._buffer_started and time.time() - self._buffer_started >= FLUSH_SECONDS
+                if stale:
+                    self.flush()
+                while self.compact():
+                    pass
+            except Exception as ex:
+                print(f"⚠ Vector index compaction failed: {ex}")
+
+    def start_background_compaction(self):
+        if self._worker is None:
+            self._stop.clear()
+            self._worker = threading.Thread(target=self._background_loop, name="vector-compaction", daemon=True)
+            self._worker.start()
+
+    def close(self):
+        self._stop.set()
+        if self._worker is not None:
+            self._worker.join(timeout=5)
+            self._worker = None
+        self.flush()
+
+    # ---------------------------------------------------
+    # Search
+    # ---------------------------------------------------
+    def candidates(self, **filters) -> Optional[np.ndarray]:
+        """
+        Global row ids matching the metadata filters (None = no filter given).
+        """
+        self.load()
+        with self._lock:
+            return self.metadata.candidates(**filters)
+
+    @staticmethod
+    def _search_index(index, queries: np.ndarray, top_k: int, local_ids: Optional[np.ndarray]):
+        if local_ids is None:
+            return index.search(queries, min(top_k, index.ntotal))
+        if isinstance(index, (faiss.IndexPQ, faiss.IndexRefine)):
+            # No search params for these: decode just the candidate rows and score those
+            if isinstance(index, faiss.IndexRefine):
+                index = faiss.downcast_index(index.refine_index)
+            vectors = index.reconstruct_batch(local_ids)
+            scores = queries @ vectors.T
+            k = min(top_k, len(local_ids))
+            order = np.argsort(-scores, axis=1)[:, :k]
+            return np.take_along_axis(scores, order, axis=1), local_ids[order]
+        # Only the pre-filtered rows are scored
+        params = faiss.SearchParameters(sel=faiss.IDSelectorBatch(local_ids))
+        return index.search(queries, min(top_k, len(local_ids)), params=params)
+
+    @staticmethod
+    def _local_ids(candidates: Optional[np.ndarray], offset: int, rows: int) -> Optional[np.ndarray]:
+        if candidates is None:
+            return None
+        lo, hi = np.searchsorted(candidates, [offset, offset + rows])
+        return candidates[lo:hi] - offset
+
+    def search(self, queries: np.ndarray, top_k: int, candidates: Optional[np.ndarray] = None) -> List[List[dict]]:
+        """
+        Returns, for each query row, the top_k hits as {"row", "score", "record"}.
+        If candidates (sorted global row ids) is given, only those rows are scored.
+        """
+        self.load()
+        with self._lock:
+            segments = list(self.segments)
+            buffered = []
+            if self._buffer is not None and self._buffer.ntotal:
+                buffered_offset = sum(s.rows for s in segments)
+                local_ids = self._local_ids(candidates, buffered_offset, self._buffer.ntotal)
+                if local_ids is None or len(local_ids):
+                    scores, ids = self._search_index(self._buffer, queries, top_k, local_ids)
+                    buffered = [(scores, ids, self._buffer, list(self._buffer_records), buffered_offset)]
+
+        hits = [[] for _ in range(len(queries))]
+        partials = list(buffered)
+        for segment in segments:
+            local_ids = self._local_ids(candidates, segment.offset, segment.rows)
+            if segment.rows == 0 or (local_ids is not None and len(local_ids) == 0):
+                continue
+            scores, ids = self._search_index(segment.index, queries, top_k, local_ids)
+            partials.append((scores, ids, segment.index, segment.records, segment.offset))
+
+        for scores, ids, index, records, offset in partials:
+            for q in range(len(queries)):
+                for score, idx in zip(scores[q].tolist(), ids[q].tolist()):
+                    if idx >= 0:
+                        hits[q].append({"row": offset + idx, "score": _to_cosine(index, score), "record": records[idx]})
+
+        return [heapq.nlargest(top_k, h, key=lambda hit: hit["score"]) for h in hits]
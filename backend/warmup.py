@@ -0,0 +1,86 @@
+import asyncio
+import inspect
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict
+
+# ---------------------------------------------------
+# Startup / warmup phase timings
+# ---------------------------------------------------
+# Each phase is recorded as {"status", "seconds", "finished_at"[, "error"]}.
+# A failed phase only marks that dependency as unavailable; the API keeps serving.
+# A phase never runs twice at once: a POST /warmup that arrives while the
+# startup warmup is still in a phase waits for that run instead.
+STARTED_AT = time.perf_counter()
+
+_phases: Dict[str, dict] = {}
+_lock = threading.Lock()
+# name -> task of the run in progress (event loop only)
+_running: Dict[str, asyncio.Task] = {}
+
+
+def record_phase(name: str, seconds: float, status: str = "ok", error: str = None):
+    entry = {
+        "status": status,
+        "seconds": round(seconds, 4),
+        "finished_at": datetime.utcnow().isoformat(),
+    }
+    if error:
+        entry["error"] = error
+    with _lock:
+        _phases[name] = entry
+
+
+async def run_phase(name: str, fn: Callable[[], object]) -> dict:
+    """
+    Runs one initialisation step, timing it and capturing failures.
+    Coroutine functions run on the event loop; blocking ones in a worker thread.
+    """
+    start = time.perf_counter()
+    try:
+        if inspect.iscoroutinefunction(fn):
+            await fn()
+        else:
+            await asyncio.to_thread(fn)
+        record_phase(name, time.perf_counter() - start)
+    except Exception as ex:
+        record_phase(name, time.perf_counter() - start, status="error", error=str(ex))
+        print(f"⚠ Warmup phase '{name}' failed: {ex}")
+    return _phases[name]
+
+
+async def run_warmup(phases: Dict[str, Callable[[], object]], force: bool = False) -> dict:
+    """
+    Runs every phase that has not succeeded yet (or all of them with force=True).
+    """
+    for name, fn in phases.items():
+        task = _running.get(name)
+        if task is None:
+            with _lock:
+                done = _phases.get(name, {}).get("status") == "ok"
+            if done and not force:
+                continue
+            task = asyncio.create_task(run_phase(name, fn))
+            _running[name] = task
+            task.add_done_callback(lambda _, name=name: _running.pop(name, None))
+        # Shielded: a cancelled caller must not cancel a run others wait on
+        await asyncio.shield(task)
+    return startup_report()
+
+
+def phase_status(name: str) -> str:
+    if name in _running:
+        return "running"
+    with _lock:
+        return _phases.get(name, {}).get("status", "not_started")
+
+
+def startup_report() -> dict:
+    with _lock:
+        phases = {name: dict(entry) for name, entry in _phases.items()}
+    return {
+        "uptime_seconds": round(time.perf_counter() - STARTED_AT, 3),
+        "ready": bool(phases) and all(p["status"] == "ok" for p in phases.values()),
+        "phases": phases,
+    }